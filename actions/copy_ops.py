@@ -0,0 +1,324 @@
+# actions/copy_ops.py
+"""
+📋 Copy / Move Operations - نسخ ونقل بدون مرور البيانات عبر Python
+- النسخ داخل النواة: os.copy_file_range ثم os.sendfile ثم قراءة/كتابة بمخزن ثابت
+- النقل على نفس القرص: rename فقط (O(1))، وبين الأقراص: نسخ ثم حذف المصدر عبر الـ Journal
+- النسخ الشجري: الملفات الصغيرة تُنسخ بالتوازي، والنتيجة تظهر مرة واحدة (rename للمجلد المؤقت)
+- التقدم يُرسل لـ context.report_progress (شريط الحالة في الـ GUI)
+"""
+import errno
+import os
+import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from core.base_action import BaseAction
+from core.cancellation import check
+
+COPY_CHUNK_SIZE = 64 * 1024 * 1024   # لكل استدعاء copy_file_range/sendfile (يحدد دقة التقدم)
+FALLBACK_BUFFER = 1024 * 1024
+SMALL_FILE = 1024 * 1024             # ملفات أصغر من هذا تُنسخ بالتوازي في copy_tree
+COPY_WORKERS = 8
+PROGRESS_INTERVAL = 0.25             # ثوانٍ بين رسائل التقدم
+
+
+def _human(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class _Progress:
+    """تجميع التقدم من عدة Threads مع رسالة كل PROGRESS_INTERVAL على الأكثر"""
+
+    def __init__(self, context, label: str, total: int):
+        self.context = context
+        self.label = label
+        self.total = max(total, 1)
+        self.done = 0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, nbytes: int):
+        with self._lock:
+            self.done += nbytes
+            now = time.monotonic()
+            if now - self._last < PROGRESS_INTERVAL and self.done < self.total:
+                return
+            self._last = now
+            done = self.done
+        self.context.report_progress(
+            f"{self.label}: {min(100, done * 100 // self.total)}% ({_human(done)} / {_human(self.total)})")
+
+
+def copy_fd(src_fd: int, dst_fd: int, size: int, progress=None, token=None):
+    """
+    نسخ محتوى ملف مفتوح لآخر: copy_file_range (نفس النظام: reflink/server-side) ← sendfile ← buffer.
+    token: فحص الإلغاء بين الدفعات
+    """
+    offset = 0
+    copy_range = getattr(os, "copy_file_range", None)
+    sendfile = getattr(os, "sendfile", None) if os.name != "nt" else None
+
+    for method in ("copy_file_range", "sendfile"):
+        fn = copy_range if method == "copy_file_range" else sendfile
+        if fn is None:
+            continue
+        try:
+            while offset < size:
+                check(token)
+                count = min(COPY_CHUNK_SIZE, size - offset)
+                if method == "copy_file_range":
+                    sent = fn(src_fd, dst_fd, count, offset, offset)
+                else:
+                    os.lseek(dst_fd, offset, os.SEEK_SET)
+                    sent = fn(dst_fd, src_fd, offset, count)
+                if sent == 0:
+                    break  # الملف تقلص أثناء النسخ
+                offset += sent
+                if progress is not None:
+                    progress.advance(sent)
+            return offset
+        except OSError as e:
+            # غير مدعوم على هذا النظام/الزوج من الملفات: الطريقة التالية من حيث توقفنا
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                               errno.ENOTSUP, errno.EBADF, errno.EPERM):
+                raise
+
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    buffer = bytearray(FALLBACK_BUFFER)
+    view = memoryview(buffer)
+    with open(src_fd, "rb", buffering=0, closefd=False) as src, \
+            open(dst_fd, "wb", buffering=0, closefd=False) as dst:
+        while True:
+            check(token)
+            n = src.readinto(buffer)
+            if not n:
+                break
+            dst.write(view[:n])
+            offset += n
+            if progress is not None:
+                progress.advance(n)
+    return offset
+
+
+def copy_file(src, dest, progress=None, token=None):
+    """نسخ ملف واحد مع الصلاحيات والتواريخ (dest يُنشأ أو يُستبدل)"""
+    check(token)
+    flags = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+    src_fd = os.open(src, flags)
+    try:
+        st = os.fstat(src_fd)
+        dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+                         stat.S_IMODE(st.st_mode) | 0o200)
+        try:
+            copy_fd(src_fd, dst_fd, st.st_size, progress, token)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src, dest)
+
+
+def _within(path, folder) -> bool:
+    """path هو folder أو داخله (بعد حل الروابط)"""
+    path, folder = os.path.realpath(path), os.path.realpath(folder)
+    return os.path.commonpath([path, folder]) == folder
+
+
+def copy_tree(src, dest, progress=None, workers: int = COPY_WORKERS, token=None):
+    """
+    نسخ شجري: المجلدات والروابط بالترتيب، ثم الملفات الصغيرة على Thread Pool
+    (زمن فتح/إغلاق الملفات يغلب على حجمها) والكبيرة واحداً تلو الآخر.
+    """
+    src, dest = str(src), str(dest)
+    if _within(dest, src):
+        # os.walk سيدخل النسخة نفسها بلا نهاية (حتى ENAMETOOLONG)
+        raise ValueError(f"Cannot copy a directory into itself: {src} -> {dest}")
+    small, large, dirs = [], [], []
+    os.makedirs(dest)
+    for root, dirnames, filenames in os.walk(src):
+        check(token)
+        rel = os.path.relpath(root, src)
+        target_root = dest if rel == "." else os.path.join(dest, rel)
+        for name in dirnames:
+            s, d = os.path.join(root, name), os.path.join(target_root, name)
+            if os.path.islink(s):
+                os.symlink(os.readlink(s), d)
+            else:
+                os.mkdir(d)
+                dirs.append((s, d))
+        for name in filenames:
+            s, d = os.path.join(root, name), os.path.join(target_root, name)
+            if os.path.islink(s):
+                os.symlink(os.readlink(s), d)
+                continue
+            (small if os.path.getsize(s) < SMALL_FILE else large).append((s, d))
+
+    if small:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # list(): إظهار أول خطأ
+            list(pool.map(lambda pair: copy_file(*pair, progress=progress, token=token), small))
+    for s, d in large:
+        copy_file(s, d, progress, token)
+    for s, d in reversed(dirs):
+        shutil.copystat(s, d)  # بعد الملفات: الكتابة داخل المجلد تغير تاريخه
+    shutil.copystat(src, dest)
+
+
+def tree_size(path) -> int:
+    total = 0
+    for root, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _path(context, name) -> Path:
+    return Path(name) if os.path.isabs(name) else context.cwd / name
+
+
+class _TransferAction(BaseAction):
+    verb = "📋 Copying"
+    operation = "copy"
+    timeout = 3600.0  # النسخ الكبير بطيء لكنه يرسل تقدماً ويفحص الإلغاء بين الدفعات
+
+    def __init__(self, context, src, dest):
+        super().__init__(context)
+        self.src = _path(context, src)
+        self.dest = _path(context, dest)
+        self.path = self.dest
+        self.backups = []
+        self.done = False
+
+    def resources(self):
+        return [self.src, self.dest]
+
+    def _resolve_target(self):
+        """الوجهة مجلد موجود: النسخ/النقل إلى داخله بنفس الاسم (كما في cp/mv)"""
+        if self.dest.is_dir() and self.dest != self.src:
+            self.path = self.dest / self.src.name
+        if self.src.is_dir() and not self.src.is_symlink() and self.path != self.src \
+                and _within(self.path, self.src):
+            raise ValueError(f"Cannot {self.operation} a directory into itself: {self.src} -> {self.path}")
+
+    def _progress(self, total: int):
+        return _Progress(self.context, f"{self.verb} {self.src.name}", total)
+
+    def _copy(self, token=None):
+        """نسخ src إلى self.path عبر اسم مؤقت (نفس مجلد الوجهة) ثم rename: لا نتيجة جزئية"""
+        is_tree = self.src.is_dir()
+        if os.path.lexists(self.path):
+            if is_tree or self.path.is_dir():
+                raise FileExistsError(f"Destination exists: {self.path}")
+            self.backups = [self.journal.backup(self.path, keep=True)]  # يُستبدل بـ os.replace
+
+        tmp = self.journal.temp_name(self.path)
+        self.journal.created_many(([] if self.backups else [self.path]) + [tmp], tree=is_tree)
+        if is_tree:
+            copy_tree(self.src, tmp, self._progress(tree_size(self.src)), token=token)
+        else:
+            copy_file(self.src, tmp, self._progress(self.src.stat().st_size), token)
+        os.replace(tmp, self.path)
+
+    def _undo_copy(self):
+        for backup in self.backups:
+            self.journal.restore(backup)
+        if not self.backups and os.path.lexists(self.path):
+            if self.path.is_dir() and not self.path.is_symlink():
+                shutil.rmtree(self.path)
+            else:
+                os.remove(self.path)
+
+
+class CopyFileAction(_TransferAction):
+    def execute(self, token=None):
+        if not self.src.is_file():
+            raise FileNotFoundError(f"Source file not found: {self.src}")
+        self._resolve_target()
+        self._copy(token)
+        self.done = True
+        print(f"✅ Copied: {self.src} -> {self.path}")
+
+    def rollback(self):
+        if self.done:
+            self._undo_copy()
+            print(f"⏪ Rollback: Removed copy {self.path}")
+
+
+class CopyTreeAction(_TransferAction):
+    def execute(self, token=None):
+        if not self.src.is_dir():
+            raise NotADirectoryError(f"Source folder not found: {self.src}")
+        self._resolve_target()
+        self._copy(token)
+        self.done = True
+        print(f"✅ Copied folder: {self.src} -> {self.path}")
+
+    def rollback(self):
+        if self.done:
+            self._undo_copy()
+            print(f"⏪ Rollback: Removed copied folder {self.path}")
+
+
+class MoveAction(_TransferAction):
+    verb = "🚚 Moving"
+    operation = "move"
+
+    def __init__(self, context, src, dest):
+        super().__init__(context, src, dest)
+        self.renamed = False
+        self.source_backup = None
+
+    def execute(self, token=None):
+        if not os.path.lexists(self.src):
+            raise FileNotFoundError(f"Source not found: {self.src}")
+        self._resolve_target()
+        if os.path.lexists(self.path):
+            if self.src.is_dir() or self.path.is_dir():
+                raise FileExistsError(f"Destination exists: {self.path}")
+            self.backups = self.journal.backup_many([self.path])  # الملف القديم جانباً
+
+        try:
+            # نفس نظام الملفات: rename بدون نسخ أي بايت
+            self.journal.moved(self.src, self.path)
+            os.rename(self.src, self.path)
+            self.renamed = True
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # قرص آخر: نسخ ثم "حذف" المصدر بنقله جانباً في الـ Journal (يُستعاد عند التراجع)
+            for backup in self.backups:
+                self.journal.restore(backup)
+            self.backups = []
+            self._copy(token)
+            self.source_backup = self.journal.backup(self.src)
+        self.done = True
+        print(f"✅ Moved: {self.src} -> {self.path}")
+
+    def rollback(self):
+        if not self.done:
+            return
+        if self.renamed:
+            os.rename(self.path, self.src)
+            for backup in self.backups:
+                self.journal.restore(backup)
+        else:
+            self.journal.restore(self.source_backup)
+            self._undo_copy()
+        print(f"⏪ Rollback: Moved back {self.path} -> {self.src}")
+
+
+ACTION_CLASSES = {
+    "copy_file": CopyFileAction,
+    "copy_tree": CopyTreeAction,
+    "move": MoveAction,
+}
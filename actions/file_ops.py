@@ -1,18 +1,123 @@
 # actions/file_ops.py
 import os
+import re
+import shutil
 from pathlib import Path
 from core.base_action import BaseAction
+from core.cancellation import check
+
+WRITE_CHUNK_SIZE = 1024 * 1024
+CHECK_EVERY = 256        # فحص الإلغاء كل N اسم في العمليات الجماعية
+MAX_BULK_NAMES = 10_000  # حد أعلى لتوسيع الأنماط (خطأ في نمط من الـ LLM لا يُنشئ ملايين الملفات)
+
+_BRACE = re.compile(r"\{([^{}]*)\}")
+
+
+def iter_chunks(source, chunk_size: int = WRITE_CHUNK_SIZE):
+    """
+    مصدر المحتوى كـ bytes على دفعات: نص، bytes، كائن ملف (read)، أو Iterable/Generator
+    من نصوص أو bytes. النص الكبير يُرمَّز على شرائح فلا تُنشأ نسخة كاملة منه.
+    """
+    if isinstance(source, str):
+        for i in range(0, len(source), chunk_size):
+            yield source[i:i + chunk_size].encode("utf-8")
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for i in range(0, len(view), chunk_size):
+            yield view[i:i + chunk_size]
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    else:
+        for chunk in source:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def _fsync_dir(folder):
+    """تثبيت إدخال المجلد بعد os.replace (غير متاح على Windows)"""
+    if os.name == "nt":
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, source, journal=None, chunk_size: int = WRITE_CHUNK_SIZE, tmp=None, token=None):
+    """
+    كتابة ذرية: دفعات لملف مؤقت في نفس المجلد ← fsync ← os.replace.
+    تعطل البرنامج في المنتصف يترك الملف الأصلي سليماً (والمؤقت يحذفه الـ Journal).
+    مع journal: الأصل يُحفظ بـ hardlink (يبقى مكانه حتى لحظة الاستبدال).
+    tmp: اسم مؤقت سجله المستدعي مسبقاً في الـ Journal (الكتابة الجماعية).
+    token: فحص الإلغاء قبل كل دفعة (الإلغاء يحذف المؤقت والأصل لم يُلمس).
+    يرجع (سجل النسخة الاحتياطية أو None، عدد البايتات)
+    """
+    path = Path(path)
+    existed = path.exists()
+    backup = None
+    if journal is not None:
+        backup = journal.backup(path, keep=True) if existed else None
+        if backup is None:
+            journal.created(path)
+
+    # 0o666 ثم يطبق الـ umask كما في open العادية (mkstemp كان ينشئ بـ 0600)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    if tmp is None:
+        while True:
+            tmp = str(path.parent / f".{path.name[:80]}.{os.urandom(6).hex()}.tmp")
+            try:
+                fd = os.open(tmp, flags, 0o666)
+                break
+            except FileExistsError:
+                continue
+        if journal is not None:
+            journal.created(tmp)
+    else:
+        fd = os.open(tmp, flags, 0o666)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter_chunks(source, chunk_size):
+                check(token)
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        check(token)  # آخر فرصة قبل الاستبدال
+        if existed:
+            shutil.copymode(path, tmp)  # الملف الموجود يحتفظ بصلاحياته
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+    return backup, written
 
 
 class CreateFolderAction(BaseAction):
+    changes_cwd = True
+
     def __init__(self, context, name):
         super().__init__(context)
         self.name = name
         self.path = Path(name) if os.path.isabs(name) else context.cwd / name
         self.created = False
+        self.created_dirs = []  # المجلد وآباؤه التي أنشأها mkdir(parents=True)، من الأعلى للأسفل
 
-    def execute(self):
+    def execute(self, token=None):
         if not self.path.exists():
+            missing = [self.path]
+            while not missing[-1].parent.exists() and missing[-1].parent != missing[-1]:
+                missing.append(missing[-1].parent)
+            self.created_dirs = missing[::-1]
+            self.journal.created_many(self.created_dirs, is_dir=True)
             self.path.mkdir(parents=True, exist_ok=True)
             self.created = True
             print(f"✅ Created Folder: {self.path}")
@@ -22,12 +127,17 @@ class CreateFolderAction(BaseAction):
         self.context.set_cwd(self.path)
 
     def rollback(self):
-        if self.created and self.path.exists():
+        if not self.created:
+            return
+        for path in reversed(self.created_dirs):
+            if not path.exists():
+                continue
             try:
-                os.rmdir(self.path)
-                print(f"⏪ Rollback: Deleted folder {self.path}")
+                os.rmdir(path)
+                print(f"⏪ Rollback: Deleted folder {path}")
             except OSError:
-                print(f"⚠️ Could not rollback folder {self.path} (not empty)")
+                print(f"⚠️ Could not rollback folder {path} (not empty)")
+                break
 
 
 class CreateFileAction(BaseAction):
@@ -37,21 +147,18 @@ class CreateFileAction(BaseAction):
         self.path = Path(name) if os.path.isabs(name) else context.cwd / name
         self.existed_before = False
 
-    def execute(self):
+    def execute(self, token=None):
+        # touch لا يغير محتوى ملف موجود: لا حاجة لنسخة احتياطية
         if self.path.exists():
             self.existed_before = True
-            with open(self.path, 'r', encoding='utf-8') as f:
-                self.backup_data = f.read()
-        
+        else:
+            self.journal.created(self.path)
+
         self.path.touch(exist_ok=True)
         print(f"✅ Created File: {self.path}")
 
     def rollback(self):
-        if self.existed_before and self.backup_data is not None:
-            with open(self.path, 'w', encoding='utf-8') as f:
-                f.write(self.backup_data)
-            print(f"⏪ Rollback: Restored file {self.path}")
-        elif not self.existed_before and self.path.exists():
+        if not self.existed_before and self.path.exists():
             os.remove(self.path)
             print(f"⏪ Rollback: Deleted file {self.path}")
 
@@ -60,29 +167,21 @@ class WriteTextAction(BaseAction):
     def __init__(self, context, filename, text):
         super().__init__(context)
         self.filename = filename
-        self.text = text
+        self.text = text  # نص، bytes، كائن ملف، أو Generator من الدفعات
         self.path = Path(filename) if os.path.isabs(filename) else context.cwd / filename
 
-    def execute(self):
-        # حفظ المحتوى القديم
-        if self.path.exists():
-            with open(self.path, 'r', encoding='utf-8') as f:
-                self.backup_data = f.read()
-        
-        with open(self.path, 'w', encoding='utf-8') as f:
-            f.write(self.text)
-        print(f"✅ Wrote to: {self.path}")
+    def execute(self, token=None):
+        # ملف مؤقت + os.replace: لا ملف مقطوع عند التعطل، والمحتوى لا يُحمل كاملاً في الذاكرة
+        self.backup_data, written = write_atomic(self.path, self.text, self.journal, token=token)
+        print(f"✅ Wrote to: {self.path} ({written:,} bytes)")
 
     def rollback(self):
-        if self.backup_data is not None:
-            with open(self.path, 'w', encoding='utf-8') as f:
-                f.write(self.backup_data)
+        if self.journal.restore(self.backup_data):
             print(f"⏪ Rollback: Restored content of {self.path}")
-        else:
-            # الملف كان فارغ
-            with open(self.path, 'w', encoding='utf-8') as f:
-                f.write("")
-            print(f"⏪ Rollback: Cleared {self.path}")
+        elif self.path.exists():
+            # الملف لم يكن موجوداً
+            os.remove(self.path)
+            print(f"⏪ Rollback: Deleted file {self.path}")
 
 
 class DeleteFolderAction(BaseAction):
@@ -92,13 +191,15 @@ class DeleteFolderAction(BaseAction):
         self.path = Path(name) if os.path.isabs(name) else context.cwd / name
         self.deleted = False
 
-    def execute(self):
+    def execute(self, token=None):
         if self.path.exists() and self.path.is_dir():
+            # حذف المجلدات الفارغة فقط (الحذف الشجري خطر)
+            # النقل للـ Journal هو الحذف نفسه، ويُستعاد بعد تعطل البرنامج
+            if any(self.path.iterdir()):
+                print(f"❌ Failed to delete folder {self.path}: not empty")
+                return
             try:
-                # محاولة الحذف (يجب أن يكون فارغاً لأمان os.rmdir)
-                # لو أردنا حذف شجري نحتاج shutil.rmtree لكنه خطر
-                # سنستخدم rmdir للأمان حالياً
-                os.rmdir(self.path)
+                self.backup_data = self.journal.backup(self.path)
                 self.deleted = True
                 print(f"✅ Deleted Folder: {self.path}")
             except OSError as e:
@@ -107,8 +208,7 @@ class DeleteFolderAction(BaseAction):
             print(f"ℹ️ Folder not found: {self.path}")
 
     def rollback(self):
-        if self.deleted:
-            self.path.mkdir(parents=True, exist_ok=True)
+        if self.deleted and self.journal.restore(self.backup_data):
             print(f"⏪ Rollback: Restored folder {self.path}")
 
 
@@ -117,17 +217,13 @@ class DeleteFileAction(BaseAction):
         super().__init__(context)
         self.name = name
         self.path = Path(name) if os.path.isabs(name) else context.cwd / name
-        self.backup_data = None
         self.deleted = False
 
-    def execute(self):
+    def execute(self, token=None):
         if self.path.exists() and self.path.is_file():
             try:
-                # قراءة المحتوى للنسخ الاحتياطي
-                with open(self.path, 'rb') as f:
-                    self.backup_data = f.read()
-                
-                os.remove(self.path)
+                # نقل (rename) بدل القراءة: O(1) مهما كان حجم الملف
+                self.backup_data = self.journal.backup(self.path)
                 self.deleted = True
                 print(f"✅ Deleted File: {self.path}")
             except OSError as e:
@@ -136,16 +232,258 @@ class DeleteFileAction(BaseAction):
             print(f"ℹ️ File not found: {self.path}")
 
     def rollback(self):
-        if self.deleted and self.backup_data:
-            with open(self.path, 'wb') as f:
-                f.write(self.backup_data)
+        if self.deleted and self.journal.restore(self.backup_data):
             print(f"⏪ Rollback: Restored file {self.path}")
 
 
+# ===== عمليات جماعية: خطوة واحدة بدل N خطوة =====
+
+def expand_pattern(pattern: str) -> list[str]:
+    """
+    توسيع الأقواس بأسلوب bash: "day{1..50}" و "{01..12}" (مع الأصفار) و "{a,b,c}"
+    مع دعم أكثر من قوس ("{2024,2025}/{01..12}").
+    """
+    match = _BRACE.search(pattern)
+    if match is None:
+        return [pattern]
+    head, body, tail = pattern[:match.start()], match.group(1), pattern[match.end():]
+
+    numeric = re.fullmatch(r"(-?\d+)\.\.(-?\d+)(?:\.\.(\d+))?", body)
+    if numeric:
+        first, last = int(numeric.group(1)), int(numeric.group(2))
+        step = int(numeric.group(3) or 1) or 1
+        padded = any(len(g) > 1 and g.lstrip("-").startswith("0") for g in numeric.group(1, 2))
+        width = max(len(numeric.group(1)), len(numeric.group(2))) if padded else 0
+        if abs(last - first) // step >= MAX_BULK_NAMES:
+            raise ValueError(f"Pattern expands to too many names: {pattern}")
+        values = range(first, last + (1 if last >= first else -1), step if last >= first else -step)
+        options = [str(v).zfill(width) for v in values]
+    elif "," in body:
+        options = body.split(",")
+    else:
+        options = ["{" + body + "}"]  # ليس نمطاً: يبقى كما هو
+
+    names = []
+    for option in options:
+        for rest in expand_pattern(tail):
+            names.append(head + option + rest)
+            if len(names) > MAX_BULK_NAMES:
+                raise ValueError(f"Pattern expands to too many names: {pattern}")
+    return names
+
+
+def _bulk_names(names) -> list[str]:
+    """قائمة أسماء أو نمط (أو قائمة أنماط) ← أسماء نسبية بدون تكرار"""
+    if names is None:
+        raise ValueError("Bulk action needs 'names' or 'pattern'")
+    if isinstance(names, str):
+        names = [names]
+    result = []
+    for item in names:
+        result.extend(expand_pattern(str(item)))
+    seen = set()
+    unique = []
+    for name in result:
+        name = name.replace("\\", "/").strip("/")
+        if not name or os.path.isabs(name) or ".." in name.split("/"):
+            raise ValueError(f"Invalid name in bulk action: {name!r}")
+        if name not in seen:
+            seen.add(name)
+            unique.append(name)
+    if len(unique) > MAX_BULK_NAMES:
+        raise ValueError(f"Too many names in bulk action: {len(unique)}")
+    return unique
+
+
+class _BulkAction(BaseAction):
+    """
+    أساس العمليات الجماعية: كل الأسماء داخل مجلد واحد، عمليات نسبية لـ fd المجلد
+    (os.mkdir/os.open مع dir_fd بدل تحليل المسار الكامل لكل ملف)، سجل Journal واحد،
+    وسجل واحد في history يتراجع عن الكل.
+    """
+    use_dir_fd = os.mkdir in os.supports_dir_fd and os.open in os.supports_dir_fd
+
+    def __init__(self, context, names, folder=None):
+        super().__init__(context)
+        self.folder = Path(folder) if folder and os.path.isabs(folder) else context.cwd / (folder or "")
+        self.names = _bulk_names(names)
+        self.created = []  # مسارات كاملة بترتيب الإنشاء
+
+    def resources(self):
+        # المجلد وحده يكفي (التعارض هرمي)، ومسار لكل اسم يجعل الجدولة والأقفال O(n²)
+        return [self.folder]
+
+    def _existing(self) -> set:
+        """الأسماء الموجودة مسبقاً (قراءة واحدة للمجلد + stat للأسماء المتداخلة فقط)"""
+        try:
+            top = set(os.listdir(self.folder))
+        except FileNotFoundError:
+            return set()
+        existing = set()
+        for name in self.names:
+            if "/" not in name:
+                if name in top:
+                    existing.add(name)
+            elif os.path.lexists(self.folder / name):
+                existing.add(name)
+        return existing
+
+    def _make_dirs(self):
+        """إنشاء المجلد وآبائه والمجلدات الوسيطة للأسماء المتداخلة ("sub/x.txt") إن لم توجد"""
+        missing = []
+        path = self.folder
+        while not path.exists():
+            missing.append(path)
+            path = path.parent
+        missing.reverse()
+        folder_missing = bool(missing)
+        # البادئة تسبق امتداداتها في الترتيب: الأب قبل الابن
+        subdirs = sorted({"/".join(parts[:i]) for parts in (name.split("/") for name in self.names if "/" in name)
+                          for i in range(1, len(parts))})
+        missing += [self.folder / sub for sub in subdirs
+                    if folder_missing or not os.path.isdir(self.folder / sub)]
+        self.journal.created_many(missing, is_dir=True)
+        for path in missing:
+            os.mkdir(path)
+            self.created.append(path)
+
+    def _open_dir(self):
+        return os.open(self.folder, os.O_RDONLY) if self.use_dir_fd else None
+
+    def _target(self, name, dir_fd):
+        return name if dir_fd is not None else os.path.join(self.folder, name)
+
+    def rollback(self):
+        removed = 0
+        for path in reversed(self.created):
+            try:
+                if os.path.isdir(path):
+                    os.rmdir(path)
+                else:
+                    os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        print(f"⏪ Rollback: Removed {removed}/{len(self.created)} items in {self.folder}")
+
+
+class CreateFoldersAction(_BulkAction):
+    def execute(self, token=None):
+        # الأسماء المتداخلة ("2024/01") تحتاج آباءها أولاً
+        ordered = []
+        for name in self.names:
+            parts = name.split("/")
+            ordered.extend("/".join(parts[:i]) for i in range(1, len(parts) + 1))
+        existing = self._existing() if ordered == self.names else None
+        todo = []
+        seen = set()
+        for name in ordered:
+            if name in seen:
+                continue
+            seen.add(name)
+            if existing is not None:
+                if name not in existing:
+                    todo.append(name)
+            elif not os.path.lexists(self.folder / name):
+                todo.append(name)
+
+        if not self.folder.exists():
+            self.journal.created(self.folder, is_dir=True)
+            self.folder.mkdir(parents=True)
+            self.created.append(self.folder)
+        self.journal.created_many([self.folder / name for name in todo], is_dir=True)
+        dir_fd = self._open_dir()
+        try:
+            for n, name in enumerate(todo):
+                if n % CHECK_EVERY == 0:
+                    check(token)
+                os.mkdir(self._target(name, dir_fd), dir_fd=dir_fd)
+                self.created.append(self.folder / name)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+        print(f"✅ Created {len(todo)} folders in {self.folder} ({len(self.names) - len(todo)} existed)")
+
+
+class CreateFilesAction(_BulkAction):
+    def __init__(self, context, names, folder=None, content=""):
+        super().__init__(context, names, folder)
+        self.content = (content or "").encode("utf-8")
+
+    def execute(self, token=None):
+        self._make_dirs()
+        existing = self._existing()
+        todo = [name for name in self.names if name not in existing]
+        self.journal.created_many([self.folder / name for name in todo])
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+        dir_fd = self._open_dir()
+        try:
+            for n, name in enumerate(todo):
+                if n % CHECK_EVERY == 0:
+                    check(token)
+                fd = os.open(self._target(name, dir_fd), flags, 0o666, dir_fd=dir_fd)
+                try:
+                    if self.content:
+                        os.write(fd, self.content)
+                finally:
+                    os.close(fd)
+                self.created.append(self.folder / name)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+        print(f"✅ Created {len(todo)} files in {self.folder} ({len(existing)} existed)")
+
+
+class WriteFilesAction(_BulkAction):
+    """
+    كتابة عدة ملفات: {"name": "text"} أو [{"name": ..., "text": ...}].
+    كل ملف يُكتب ذرياً (write_atomic)، والنسخ الاحتياطية والملفات المؤقتة تُسجل في سجل واحد
+    """
+
+    def __init__(self, context, files, folder=None):
+        if isinstance(files, dict):
+            files = [{"name": name, "text": text} for name, text in files.items()]
+        texts = {}
+        for item in files or []:
+            name = item.get("name") or item.get("file")
+            if not name:
+                # بدون هذا الفحص يُكتب الملف باسم "None"
+                raise ValueError(f"write_files entry without a name: {item!r}")
+            texts[str(name).replace("\\", "/").strip("/")] = item.get("text", item.get("content", ""))
+        super().__init__(context, list(texts), folder)
+        self.texts = texts
+        self.backups = []
+
+    def execute(self, token=None):
+        self._make_dirs()
+        paths = [self.folder / name for name in self.names]
+        self.backups = [b for b in self.journal.backup_many(paths, keep=True) if b]
+        backed_up = {b["path"] for b in self.backups}
+        tmps = [self.journal.temp_name(path) for path in paths]
+        new = [path for path in paths if os.path.abspath(path) not in backed_up]
+        self.journal.created_many(new + [Path(t) for t in tmps])
+
+        total = 0
+        for name, path, tmp in zip(self.names, paths, tmps):
+            _, written = write_atomic(path, self.texts[name], tmp=tmp, token=token)
+            total += written
+        self.created.extend(new)
+        print(f"✅ Wrote {len(paths)} files in {self.folder} ({total:,} bytes)")
+
+    def rollback(self):
+        for backup in reversed(self.backups):
+            self.journal.restore(backup)
+        super().rollback()
+
+
 ACTION_CLASSES = {
     "create_folder": CreateFolderAction,
     "create_file": CreateFileAction,
     "write_text": WriteTextAction,
     "delete_folder": DeleteFolderAction,
-    "delete_file": DeleteFileAction
+    "delete_file": DeleteFileAction,
+    "create_folders": CreateFoldersAction,
+    "create_files": CreateFilesAction,
+    "write_files": WriteFilesAction,
 }
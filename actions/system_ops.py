@@ -40,7 +40,7 @@ class OpenAppAction(BaseAction):
         self.app_name = app_name.lower().strip()
         self.process = None
 
-    def execute(self):
+    def execute(self, token=None):
         # البحث عن اسم البرنامج
         executable = self.APP_ALIASES.get(self.app_name, self.app_name)
         
@@ -72,6 +72,9 @@ class OpenAppAction(BaseAction):
         # لا يمكن التراجع عن فتح برنامج
         print(f"⚠️ Cannot rollback: open_app ({self.app_name})")
 
+    def resources(self):
+        return []  # لا يلمس ملفات: يعمل بالتوازي مع أي خطوة
+
 
 # تصدير
 ACTION_CLASSES = {
@@ -0,0 +1,112 @@
+# bench_content_index.py
+"""
+⏱️ ContentIndex Benchmark
+- سرعة الإدخال: مسح أولي لمجلد ملفات نصية مولدة (ملفات/ث و MB/ث)
+- التحديث التزايدي: تعديل نسبة من الملفات وإرسال أحداث modified
+- زمن الاستعلام: p50 / p95 لاستعلامات متنوعة (مع الكتابة في الخلفية وبدونها)
+
+python bench_content_index.py --files 5000 --words 400
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from tools.content_index import ContentIndex
+
+VOCAB = (
+    "budget invoice meeting report project deadline contract client server backup "
+    "python network database design review schedule travel hotel flight receipt "
+    "ميزانية فاتورة اجتماع تقرير مشروع موعد عقد عميل خادم نسخة تصميم مراجعة رحلة فندق"
+).split()
+
+
+def _generate(root: str, files: int, words: int, rng: random.Random) -> int:
+    total = 0
+    for i in range(files):
+        folder = os.path.join(root, f"folder_{i % 50}")
+        os.makedirs(folder, exist_ok=True)
+        text = " ".join(rng.choice(VOCAB) for _ in range(words)) + f" unique_token_{i}"
+        path = os.path.join(folder, f"doc_{i}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        total += os.path.getsize(path)
+    return total
+
+
+def _query_latencies(index: ContentIndex, queries: list[str], rounds: int) -> list[float]:
+    latencies = []
+    for _ in range(rounds):
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q, limit=10)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _report(label: str, latencies: list[float]):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"🔎 {label}: p50={statistics.median(latencies):.2f} ms  p95={p95:.2f} ms  "
+          f"({len(latencies)} queries)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modify", type=float, default=0.05, help="نسبة الملفات المعدلة")
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "Documents")
+        print(f"📝 Generating {args.files:,} files × {args.words} words...")
+        total_bytes = _generate(root, args.files, args.words, rng)
+
+        index = ContentIndex(db_path=os.path.join(tmp, "content.db"), workers=args.workers)
+
+        start = time.perf_counter()
+        index.index_tree([root])
+        index.wait_idle()
+        elapsed = time.perf_counter() - start
+        print(f"📥 Initial ingest: {args.files / elapsed:,.0f} files/s, "
+              f"{total_bytes / elapsed / 1e6:.1f} MB/s ({elapsed:.2f}s)")
+
+        queries = ["budget", "meeting report", "ميزانية", "اجتماع تقرير", "serv", "unique_token_42",
+                   "contract client deadline"]
+        _report("idle", _query_latencies(index, queries, rounds=30))
+
+        # تعديل تزايدي: فقط الملفات المتغيرة تُعاد فهرستها
+        changed = rng.sample(range(args.files), max(1, int(args.files * args.modify)))
+        paths = []
+        for i in changed:
+            path = os.path.join(root, f"folder_{i % 50}", f"doc_{i}.txt")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(" appended_marker")
+            paths.append(path)
+
+        before = index.get_stats()["indexed"]
+        start = time.perf_counter()
+        for path in paths:
+            index.on_fs_event("modified", path)
+        during = _query_latencies(index, queries, rounds=5)  # استعلامات أثناء الكتابة
+        index.wait_idle()
+        elapsed = time.perf_counter() - start
+        reindexed = index.get_stats()["indexed"] - before
+        print(f"♻️ Incremental: {reindexed:,} files re-indexed in {elapsed:.2f}s "
+              f"({reindexed / elapsed:,.0f} files/s)")
+        _report("during ingest", during)
+
+        start = time.perf_counter()
+        index.index_tree([root])  # لا شيء تغير: stat فقط
+        index.wait_idle()
+        print(f"⏭️ Unchanged rescan: {time.perf_counter() - start:.2f}s")
+        print(f"📊 {index.get_stats()}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
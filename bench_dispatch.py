@@ -0,0 +1,74 @@
+# bench_dispatch.py
+"""
+⏱️ Dispatch Benchmark - تكلفة بدء التشغيل وتوزيع الخطوات عبر ActionRegistry
+- cold import: زمن import core.orchestrator في عملية جديدة (python -X importtime، الوسيط)
+- construct: إنشاء Orchestrator
+- dispatch: توزيع خطوات graph (تطبيع + تحويل مسارات) بالـ µs لكل خطوة
+- create: إنشاء الـ Action في ExecutionGraph بالـ µs لكل خطوة
+
+python bench_dispatch.py --runs 7 --steps 1000
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from core.execution_context import ExecutionContext
+from core.execution_graph import ExecutionGraph
+
+RAW_STEPS = [
+    {"action": "create_folder", "params": {"path": "Desktop/reports"}},
+    {"action": "create_file", "params": {"file": "Desktop/reports/a.txt"}},
+    {"action": "write_text", "params": {"filename": "Desktop/reports/a.txt", "content": "hi"}},
+    {"action": "move", "params": {"source": "Desktop/reports/a.txt", "to": "Desktop/b.txt"}},
+]
+
+
+def cold_import_ms(runs: int) -> float:
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        r = subprocess.run([sys.executable, "-X", "importtime", "-c", "import core.orchestrator"],
+                           capture_output=True, text=True, cwd=here)
+        line = [l for l in r.stderr.splitlines() if l.rstrip().endswith("| core.orchestrator")][-1]
+        samples.append(int(line.split("|")[1]))
+    return statistics.median(samples) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--steps", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"🚀 cold import        {cold_import_ms(args.runs):8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        from core.orchestrator import Orchestrator
+        orchestrator = Orchestrator(ExecutionContext(tmp))
+        construct = time.perf_counter() - start
+
+        raw = RAW_STEPS * (args.steps // len(RAW_STEPS))
+        orchestrator._dispatch(RAW_STEPS)  # تحميل الكلاسات وSystemPaths مرة واحدة
+        start = time.perf_counter()
+        steps, _ = orchestrator._dispatch(raw)
+        dispatch = (time.perf_counter() - start) / len(raw)
+
+        graph = ExecutionGraph(None, ExecutionContext(tmp))
+        start = time.perf_counter()
+        for step in steps:
+            graph._create_action(step)
+        create = (time.perf_counter() - start) / len(steps)
+
+    print(f"🏗️ construct          {construct * 1000:8.1f} ms")
+    print(f"🗂️ dispatch           {dispatch * 1e6:8.2f} µs/step")
+    print(f"🧩 create action      {create * 1e6:8.2f} µs/step")
+
+
+if __name__ == "__main__":
+    main()
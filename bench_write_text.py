@@ -0,0 +1,64 @@
+# bench_write_text.py
+"""
+⏱️ WriteTextAction Benchmark - سرعة الكتابة وذروة الذاكرة (tracemalloc) لأحجام 1MB حتى 1GB
+- legacy: نص كامل في الذاكرة + open('w') في مكانه (السلوك القديم)
+- atomic(str): نفس النص عبر write_atomic (ترميز على شرائح + fsync + replace)
+- atomic(stream): Generator دفعات - الذاكرة ثابتة مهما كان الحجم
+
+python bench_write_text.py --sizes 1 10 100 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from actions.file_ops import WRITE_CHUNK_SIZE, write_atomic
+
+LINE = "سطر تجريبي للكتابة - benchmark line 0123456789\n"
+
+
+def _stream(size: int):
+    chunk = LINE * max(1, WRITE_CHUNK_SIZE // len(LINE.encode("utf-8")))
+    chunk_bytes = len(chunk.encode("utf-8"))
+    for _ in range(0, size, chunk_bytes):
+        yield chunk
+
+
+def _legacy(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _measure(label: str, size_mb: int, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<16} {size_mb / elapsed:8.1f} MB/s   peak {peak / 1e6:8.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000], help="بالـ MB")
+    parser.add_argument("--skip-string-above", type=int, default=1000,
+                        help="لا نبني نصاً كاملاً أكبر من هذا الحجم (MB)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "payload.txt")
+        for size_mb in args.sizes:
+            size = size_mb * 1024 * 1024
+            print(f"📝 {size_mb} MB")
+            if size_mb <= args.skip_string_above:
+                text = "".join(_stream(size))  # خارج القياس: النص موجود مسبقاً عند المستدعي
+                _measure("legacy", size_mb, lambda: _legacy(path, text))
+                _measure("atomic(str)", size_mb, lambda: write_atomic(path, text))
+                del text
+            _measure("atomic(stream)", size_mb, lambda: write_atomic(path, _stream(size)))
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# core/action_registry.py
+"""
+🗂️ Action Registry - سجل واحد لكل الـ Actions: الاسم ← (النوع، الباراميترات، المصنع)
+- graph: Action بـ Rollback يُنفذ في ExecutionGraph (كلاس من actions/)
+- tool: أداة بطيئة تُنفذ عبر ToolRunner (دالة في core/tool_handlers.py)
+- inline: عملية سريعة في نفس الخيط (الذاكرة)
+الهدف يُكتب "module:attr" ويُستورد عند أول استخدام فقط، والأدوات طويلة العمر
+(WebSearch، SmartBrowser، AppLauncher...) تُنشأ مرة واحدة عبر shared().
+"""
+import importlib
+import inspect
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+GRAPH = "graph"
+TOOL = "tool"
+INLINE = "inline"
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class Param:
+    key: str                        # الاسم الموحد في params
+    aliases: tuple = ()             # أسماء بديلة يكتبها الـ LLM
+    required: bool = True
+    default: Any = None
+    path: bool = False              # يُحوَّل عبر SystemPaths ("Desktop/x" -> المسار الحقيقي)
+    arg: Optional[str] = None       # اسم باراميتر الـ constructor إن اختلف عن key
+
+
+@dataclass
+class ActionSpec:
+    name: str
+    kind: str
+    target: str                     # "module:attr"
+    params: tuple = ()
+    _loaded: Any = field(default=None, repr=False)
+    _accepts: frozenset = field(default=frozenset(), repr=False)
+
+    def load(self):
+        """استيراد الهدف عند أول استخدام"""
+        if self._loaded is None:
+            module, _, attr = self.target.partition(":")
+            loaded = getattr(importlib.import_module(module), attr)
+            if self.kind == GRAPH:
+                self._accepts = frozenset(inspect.signature(loaded).parameters)
+            self._loaded = loaded
+        return self._loaded
+
+    def normalize(self, params: dict, resolve: Optional[Callable[[str], str]] = None) -> dict:
+        """
+        أسماء موحدة + قيم افتراضية + تحويل المسارات. الباراميترات غير المعرّفة تبقى كما هي.
+        باراميتر مطلوب ناقص -> ValueError
+        """
+        result = dict(params)
+        for p in self.params:
+            value = _MISSING
+            for key in (p.key,) + p.aliases:
+                if key in result:
+                    candidate = result.pop(key) if key != p.key else result[key]
+                    if value is _MISSING and candidate not in (None, ""):
+                        value = candidate
+            if value is _MISSING:
+                if p.required:
+                    raise ValueError(f"{self.name}: missing '{p.key}'")
+                value = p.default
+            elif p.path and resolve is not None and isinstance(value, str):
+                value = resolve(value)
+            if value is None:
+                result.pop(p.key, None)
+            else:
+                result[p.key] = value
+        return result
+
+    def create(self, ctx, params: dict):
+        """graph: إنشاء الـ Action من params (موحدة أو خام)"""
+        cls = self.load()
+        params = self.normalize(params)
+        kwargs = {}
+        for p in self.params:
+            arg = p.arg or p.key
+            if arg in self._accepts and p.key in params:
+                kwargs[arg] = params[p.key]
+        return cls(ctx, **kwargs)
+
+    def run(self, orchestrator, params: dict):
+        """tool / inline: تنفيذ الدالة - يرجع رسالة النتيجة"""
+        return self.load()(orchestrator, params)
+
+
+class ActionRegistry:
+    def __init__(self, specs=()):
+        self._specs: dict[str, ActionSpec] = {}
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: ActionSpec):
+        self._specs[spec.name] = spec
+
+    def get(self, name: str) -> Optional[ActionSpec]:
+        return self._specs.get(name)
+
+    def names(self, kind: Optional[str] = None) -> set:
+        return {n for n, s in self._specs.items() if kind is None or s.kind == kind}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+
+# ===== الأدوات طويلة العمر =====
+
+_shared: dict[str, Any] = {}
+_shared_lock = threading.Lock()
+
+def shared(target: str):
+    """نسخة واحدة من الكلاس "module:Class" تُنشأ عند أول طلب (آمنة بين الـ Threads)"""
+    instance = _shared.get(target)
+    if instance is None:
+        with _shared_lock:
+            instance = _shared.get(target)
+            if instance is None:
+                module, _, attr = target.partition(":")
+                instance = _shared[target] = getattr(importlib.import_module(module), attr)()
+    return instance
+
+
+# ===== التعريفات =====
+
+_PATH = ("path",)
+_FOLDER = Param("folder", _PATH, required=False, path=True)
+_TRANSFER = (Param("src", ("source", "from"), path=True), Param("dest", ("destination", "to"), path=True))
+
+DEFAULT_SPECS = (
+    # file_ops
+    ActionSpec("create_folder", GRAPH, "actions.file_ops:CreateFolderAction",
+               (Param("name", ("path", "folder"), path=True),)),
+    ActionSpec("create_file", GRAPH, "actions.file_ops:CreateFileAction",
+               (Param("name", ("file", "path"), path=True), Param("content", required=False))),
+    ActionSpec("write_text", GRAPH, "actions.file_ops:WriteTextAction",
+               (Param("file", ("name", "path", "filename"), path=True, arg="filename"),
+                Param("text", ("content",), required=False, default=""))),
+    ActionSpec("delete_folder", GRAPH, "actions.file_ops:DeleteFolderAction",
+               (Param("name", ("path", "folder"), path=True),)),
+    ActionSpec("delete_file", GRAPH, "actions.file_ops:DeleteFileAction",
+               (Param("name", ("file", "path"), path=True),)),
+    ActionSpec("create_folders", GRAPH, "actions.file_ops:CreateFoldersAction",
+               (Param("names", ("pattern",)), _FOLDER)),
+    ActionSpec("create_files", GRAPH, "actions.file_ops:CreateFilesAction",
+               (Param("names", ("pattern",)), _FOLDER, Param("content", required=False, default=""))),
+    ActionSpec("write_files", GRAPH, "actions.file_ops:WriteFilesAction",
+               (Param("files"), _FOLDER)),
+    # copy_ops
+    ActionSpec("copy_file", GRAPH, "actions.copy_ops:CopyFileAction", _TRANSFER),
+    ActionSpec("copy_tree", GRAPH, "actions.copy_ops:CopyTreeAction", _TRANSFER),
+    ActionSpec("move", GRAPH, "actions.copy_ops:MoveAction", _TRANSFER),
+    # أدوات (ToolRunner)
+    ActionSpec("search_web", TOOL, "core.tool_handlers:search_web", (Param("query"),)),
+    ActionSpec("open_url", TOOL, "core.tool_handlers:open_url", (Param("url", ("link",)),)),
+    ActionSpec("see_screen", TOOL, "core.tool_handlers:see_screen"),
+    ActionSpec("open_app", TOOL, "core.tool_handlers:open_program",
+               (Param("name", ("app", "app_name", "path")),)),
+    ActionSpec("open_program", TOOL, "core.tool_handlers:open_program",
+               (Param("name", ("app", "app_name", "path")),)),
+    ActionSpec("run_python_code", TOOL, "core.tool_handlers:run_python_code", (Param("code"),)),
+    ActionSpec("find_file", TOOL, "core.tool_handlers:find_file",
+               (Param("query", ("name",), required=False, default=""), _FOLDER,
+                Param("limit", required=False, default=20))),
+    ActionSpec("search_files", TOOL, "core.tool_handlers:search_files",
+               (Param("query"), _FOLDER, Param("limit", required=False, default=10))),
+    # سريعة
+    ActionSpec("save_memory", INLINE, "core.tool_handlers:save_memory", (Param("fact"),)),
+    ActionSpec("search_memory", INLINE, "core.tool_handlers:search_memory", (Param("query"),)),
+)
+
+
+_registry: Optional[ActionRegistry] = None
+
+def get_registry() -> ActionRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ActionRegistry(DEFAULT_SPECS)
+    return _registry
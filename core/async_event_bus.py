@@ -0,0 +1,264 @@
+# core/async_event_bus.py
+"""
+⚡ Async Event Bus - نسخة asyncio من الحلقة التفاعلية
+نفس الواجهة (push / set_callback / start / stop) مع callbacks غير متزامنة.
+الـ Debouncing عبر loop.call_later: كل مسار معلق = TimerHandle واحد فقط (بدون Threads)
+نفس مسارات الأولوية (Lane): الأوامر (debounce=0) تُسلَّم فوراً للـ callback الفردي،
+والمسار reserved لا ينتظر حد التزامن الذي تستهلكه دفعات الـ watcher
+"""
+import asyncio
+import contextlib
+import inspect
+import threading
+import time
+from typing import Awaitable, Callable, Optional, Union
+from core.event_bus import DEFAULT_LANES, Event, EventBatch, EventBusMetrics, ExpiringSet, Lane
+
+Callback = Callable[..., Union[None, Awaitable[None]]]
+
+
+class AsyncEventBus:
+    def __init__(self, debounce_seconds: float = 1.0, suppress_seconds: float = 5.0,
+                 max_concurrency: int = 8, callback_timeout: Optional[float] = 120.0,
+                 lanes: tuple[Lane, ...] = DEFAULT_LANES):
+        self.debounce_seconds = debounce_seconds
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.max_concurrency = max_concurrency
+        self.callback_timeout = callback_timeout
+        self.running = False
+        self.callback: Optional[Callback] = None
+
+        self.batch_callback: Optional[Callback] = None
+        self.batch_window = 2.0
+        self.batch_max_size = 500
+        self._batch: Optional[EventBatch] = None
+        self._batch_handle: Optional[asyncio.TimerHandle] = None
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._own_thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # path -> (TimerHandle, آخر حدث، وقت آخر حدث)
+        self._pending: dict[str, tuple[asyncio.TimerHandle, Event, float]] = {}
+        self._processed = ExpiringSet(suppress_seconds)
+        self._tails: dict[str, asyncio.Task] = {}  # آخر مهمة لكل مفتاح (للحفاظ على الترتيب)
+        self.metrics = EventBusMetrics()
+
+    def set_callback(self, callback: Callback):
+        """تعيين الدالة (عادية أو async) التي تُستدعى عند حدث مستقر"""
+        self.callback = callback
+
+    def set_batch_callback(self, callback: Callback, window: float = 2.0, max_size: int = 500):
+        """مثل EventBus.set_batch_callback لكن الدالة قد تكون async"""
+        self.batch_callback = callback
+        self.batch_window = window
+        self.batch_max_size = max_size
+
+    # ===== التشغيل =====
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        التشغيل على loop موجود (إذا مُرِّر أو كنا داخل loop يعمل)،
+        وإلا إنشاء loop خاص في Thread منفصل.
+        """
+        if self.running:
+            return
+
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._own_thread = threading.Thread(target=run, daemon=True)
+            self._own_thread.start()
+            ready.wait()
+
+        self.loop = loop
+        self._semaphore = None  # يُنشأ داخل الـ loop عند أول استخدام
+        self.running = True
+        print("⚡ AsyncEventBus started")
+
+    def stop(self, timeout: float = 5.0):
+        """
+        إيقاف الـ Bus: الأحداث المعلقة في الـ Debounce والدفعة تُسلَّم فوراً (لا تضيع)،
+        ثم ننتظر الـ callbacks الجارية حتى timeout ثانية
+        """
+        if not self.running:
+            return
+        loop = self.loop
+
+        if self._on_loop_thread():
+            # لا يمكن الانتظار داخل الـ loop نفسه: التسليم فقط والمهام تكمل عليه
+            self._flush_pending()
+        else:
+            async def drain():
+                self._flush_pending()
+                tasks = list(self._tails.values())  # آخر مهمة لكل مفتاح تنتظر ما قبلها
+                if tasks:
+                    await asyncio.wait(tasks, timeout=timeout)
+
+            try:
+                asyncio.run_coroutine_threadsafe(drain(), loop).result(timeout + 1)
+            except Exception as e:
+                print(f"⚠️ AsyncEventBus drain failed: {e}")
+        self.running = False
+
+        if self._own_thread:
+            loop.call_soon_threadsafe(loop.stop)
+            self._own_thread.join(timeout=2)
+            self._own_thread = None
+        print("⚡ AsyncEventBus stopped")
+
+    def _flush_pending(self):
+        """تسليم كل حدث ينتظر هدوء مساره، ثم الدفعة الحالية، دون انتظار مؤقتاتها"""
+        pending, self._pending = self._pending, {}
+        for handle, event, _ in pending.values():
+            handle.cancel()
+            self._deliver(event)
+        if self._batch is not None:
+            self._flush_batch()
+
+    def _on_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    # ===== الأحداث =====
+
+    def push(self, event_type: str, path: str, lane: str = "watcher",
+             source: Optional[str] = None, data=None) -> str:
+        """إضافة حدث - آمنة من أي Thread (مثل Thread الـ watchdog)"""
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown lane: {lane}")
+        if not self.running:
+            return "dropped"
+        event = Event(event_type=event_type, path=path, timestamp=time.time(),
+                      source=source or lane, lane=lane, data=data)
+        if self._on_loop_thread():
+            self._on_event(event)
+        else:
+            self.loop.call_soon_threadsafe(self._on_event, event)
+        return "enqueued"
+
+    def _on_event(self, event: Event):
+        """
+        تسجيل آخر حدث للمسار. المؤقت لا يُلغى مع كل حدث (حتى لا تتراكم
+        مؤقتات ملغاة في الـ loop أثناء العاصفة): عند انطلاقه يتحقق إن كان
+        المسار هدأ فعلاً، وإلا يعيد الجدولة للوقت المتبقي.
+        """
+        if not self.running:
+            return
+        delay = self._debounce(event.lane)
+        if delay <= 0:
+            self._deliver(event)
+            return
+        now = self.loop.time()
+        current = self._pending.get(event.path)
+        if current:
+            self._pending[event.path] = (current[0], event, now)
+        else:
+            handle = self.loop.call_later(delay, self._fire, event.path)
+            self._pending[event.path] = (handle, event, now)
+
+    def _debounce(self, lane: str) -> float:
+        debounce = self.lanes[lane].debounce
+        return self.debounce_seconds if debounce is None else debounce
+
+    def _fire(self, path: str):
+        """انتهى المؤقت: تسليم آخر حدث إذا هدأ المسار"""
+        _, event, last_seen = self._pending[path]
+        remaining = last_seen + self._debounce(event.lane) - self.loop.time()
+        if remaining > 0:
+            handle = self.loop.call_later(remaining, self._fire, path)
+            self._pending[path] = (handle, event, last_seen)
+            return
+        del self._pending[path]
+
+        now = time.monotonic()
+        self._processed.sweep(now)
+        if self._processed.contains(path, now):
+            return
+        self._processed.add(path, now)
+        self._deliver(event)
+
+    def _deliver(self, event: Event):
+        """مسارات batch للدفعة (إن وُجدت)، والباقي للـ callback الفردي"""
+        path = event.path
+        if self.batch_callback and (self.lanes[event.lane].batch or not self.callback):
+            if self._batch is None:
+                self._batch = EventBatch()
+                self._batch_handle = self.loop.call_later(self.batch_window, self._flush_batch)
+            self._batch.events.append(event)
+            if len(self._batch) >= self.batch_max_size:
+                self._flush_batch()
+        elif self.callback:
+            self._schedule(path, self.callback, event, 1, reserved=self.lanes[event.lane].reserved)
+
+    def _flush_batch(self):
+        if self._batch_handle:
+            self._batch_handle.cancel()
+            self._batch_handle = None
+        batch, self._batch = self._batch, None
+        if batch:
+            self._schedule("__batch__", self.batch_callback, batch, len(batch))
+
+    # ===== تنفيذ الـ Callbacks =====
+
+    def _schedule(self, key: str, callback: Callback, payload, count: int, reserved: bool = False):
+        """مهمة لكل callback، مسلسلة خلف المهمة السابقة لنفس المفتاح"""
+        previous = self._tails.get(key)
+        task = self.loop.create_task(self._run(key, previous, callback, payload, count, reserved))
+        self._tails[key] = task
+
+    async def _run(self, key: str, previous: Optional[asyncio.Task],
+                   callback: Callback, payload, count: int, reserved: bool = False):
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with (contextlib.nullcontext() if reserved else self._semaphore):
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(callback):
+                    awaitable = callback(payload)
+                else:
+                    # دالة عادية (مثل Orchestrator.process): في Thread حتى لا توقف الـ loop
+                    awaitable = asyncio.to_thread(callback, payload)
+                await asyncio.wait_for(awaitable, timeout=self.callback_timeout)
+            except asyncio.TimeoutError:
+                self.metrics.callback_timeouts += 1
+                print(f"⚠️ AsyncEventBus callback timeout ({self.callback_timeout}s): {key}")
+            except Exception as e:
+                self.metrics.callback_errors += 1
+                print(f"⚠️ AsyncEventBus callback error: {e}")
+            self.metrics.record_callback(time.perf_counter() - started, count)
+
+        if self._tails.get(key) is asyncio.current_task():
+            del self._tails[key]
+
+    def get_metrics(self) -> dict:
+        """لقطة من عدادات الـ Bus"""
+        m = self.metrics
+        calls = m.callback_calls
+        return {
+            "debouncing": len(self._pending),
+            "callbacks_pending": len(self._tails),
+            "delivered": m.delivered,
+            "callback_errors": m.callback_errors,
+            "callback_timeouts": m.callback_timeouts,
+            "callback_latency_avg": m.callback_seconds_total / calls if calls else 0.0,
+            "callback_latency_max": m.callback_seconds_max,
+        }
@@ -2,14 +2,44 @@
 from abc import ABC, abstractmethod
 
 class BaseAction(ABC):
+    # هل يغير المجلد الحالي (context.cwd)؟ يُستخدم لحساب المسارات النسبية قبل التنفيذ
+    changes_cwd = False
+    # مهلة الخطوة بالثواني (None = مهلة ExecutionGraph الافتراضية)
+    timeout = None
+
     def __init__(self, context):
         self.context = context
-        self.backup_data = None  # لحفظ الحالة قبل التغيير
+        self.backup_data = None  # لحفظ الحالة قبل التغيير (سجل Journal للملفات)
+        self.journal = None      # Transaction يضبطها ExecutionGraph قبل التنفيذ
+
+    @property
+    def journal(self):
+        # بدون Transaction لا نسخ احتياطي ولا تراجع: خطأ واضح بدل AttributeError على None
+        if self._journal is None:
+            raise RuntimeError(f"{type(self).__name__} needs a journal transaction: "
+                               f"run it through ExecutionGraph or set action.journal")
+        return self._journal
+
+    @journal.setter
+    def journal(self, transaction):
+        self._journal = transaction
 
     @abstractmethod
-    def execute(self):
+    def execute(self, token=None):
+        """
+        token: CancellationToken (أو None) - الـ Actions الطويلة تستدعي check(token)
+        بين الدفعات فيتوقف التنفيذ عند الإلغاء أو انتهاء المهلة
+        """
         pass
 
     @abstractmethod
     def rollback(self):
         pass
+
+    def resources(self):
+        """
+        المسارات التي يلمسها الـ Action (لاستنتاج الاعتماديات في ExecutionGraph).
+        None = غير معروف: الخطوة تُعامل كحاجز (تنتظر كل ما قبلها وينتظرها كل ما بعدها)
+        """
+        path = getattr(self, "path", None)
+        return [path] if path is not None else None
@@ -0,0 +1,90 @@
+# core/cancellation.py
+"""
+🛑 Cancellation - إلغاء تعاوني ومهلة لكل خطوة
+- CancellationToken: يُلغى من أي Thread (زر الإلغاء في الـ GUI) أو تنتهي مهلته
+- الـ Action يستدعي token.raise_if_cancelled() بين الدفعات (كتابة، نسخ، عمليات جماعية)
+  فيتوقف بـ استثناء عادي ويبدأ التراجع العكسي في ExecutionGraph
+- child(timeout): توكن لخطوة واحدة يُلغى مع الأب أو عند انتهاء مهلته
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+
+class OperationCancelled(Exception):
+    """الخطة أُلغيت (المستخدم أو المستدعي)"""
+
+
+class StepTimeout(OperationCancelled):
+    """تجاوزت الخطوة مهلتها"""
+
+
+class CancellationToken:
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.reason: Optional[str] = None
+        self._error = OperationCancelled
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable] = []
+        if parent is not None:
+            parent.on_cancel(lambda p: self.cancel(p.reason, p._error))
+
+    def cancel(self, reason: str = "cancelled", error: type = OperationCancelled) -> bool:
+        """إلغاء (آمن للتكرار ومن أي Thread). يرجع False إذا كان ملغى مسبقاً"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason, self._error = reason, error
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+        return True
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(f"timed out after {self.timeout:g}s", StepTimeout)
+            return True
+        return False
+
+    def exception(self) -> Optional[OperationCancelled]:
+        """الاستثناء المناسب (إلغاء أو مهلة) أو None"""
+        return self._error(self.reason) if self.cancelled else None
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise self._error(self.reason)
+
+    def remaining(self) -> Optional[float]:
+        """الوقت المتبقي للمهلة (None = بلا مهلة)"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """انتظار الإلغاء حتى timeout أو المهلة - بديل time.sleep داخل الـ Actions"""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        self._event.wait(timeout)
+        return self.cancelled
+
+    def on_cancel(self, callback: Callable[["CancellationToken"], None]):
+        """callback(token) عند الإلغاء (فوراً إن كان ملغى). المهلة وحدها تُكتشف عند فحص cancelled"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def child(self, timeout: Optional[float] = None) -> "CancellationToken":
+        return CancellationToken(timeout, parent=self)
+
+
+def check(token: Optional[CancellationToken]):
+    """نقطة إلغاء: لا شيء بدون توكن"""
+    if token is not None:
+        token.raise_if_cancelled()
@@ -1,4 +1,33 @@
 # core/decision_engine.py
+"""
+🧠 Decision Engine - التحقق من الخطة وتحسينها قبل التنفيذ
+optimize: توحيد المسارات (مطلقة من cwd التسلسلي) ثم دمج/حذف الخطوات الزائدة:
+- create_folder لمجلد تليه مباشرة create_folder لمجلد بداخله (mkdir parents=True يغطيه)
+- create_folder مكرر لمجلد موجود مسبقاً في الخطة (بدون تغيير cwd النهائي)
+- create_file تليه write_text لنفس الملف (الكتابة تنشئه) أو create_file مكرر
+- write_text تليه write_text لنفس الملف (الأولى لا أثر لها)
+- نسخ/نقل ملف لنفسه
+"""
+import os
+from core.execution_plan import ExecutionPlan, ExecutionStep
+
+# المفتاح الموحد لمسار كل Action
+PATH_KEY = {
+    "create_folder": "name",
+    "create_file": "name",
+    "write_text": "file",
+    "delete_folder": "name",
+    "delete_file": "name",
+}
+PATH_ALIASES = ("name", "file", "path")
+TRANSFER_ACTIONS = {"copy_file", "copy_tree", "move"}
+TRANSFER_ALIASES = {"src": ("src", "source", "from"), "dest": ("dest", "destination", "to")}
+BULK_ACTIONS = {"create_folders", "create_files", "write_files"}
+# Actions لا تلمس الملفات (لا تمنع الدمج حولها)
+NO_PATH_ACTIONS = {"open_app"}
+# Actions قد تُزيل مجلدات: ما أُنشئ قبلها لم يعد مضموناً
+REMOVING_ACTIONS = {"delete_folder", "delete_file", "move"}
+
 
 def validate(plan):
     """يتحقق أن الخطوات منطقية ومرتبة"""
@@ -29,3 +58,146 @@ def validate(plan):
 # للتوافق مع الكود القديم
 def approve(plan):
     return validate(plan)
+
+
+# ===== التحسين =====
+
+def _absolute(cwd: str, path: str) -> str:
+    return os.path.normpath(path if os.path.isabs(path) else os.path.join(cwd, path))
+
+
+def _under(path: str, parent: str) -> bool:
+    """path يساوي parent أو بداخله"""
+    return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+
+def normalize(plan, cwd) -> list[ExecutionStep]:
+    """
+    مسارات مطلقة ومفاتيح موحدة. cwd يُتتبع كما في التنفيذ التسلسلي (create_folder تغيره)،
+    فتصبح الخطوات مستقلة عن cwd ويمكن حذف أي منها دون تغيير معنى ما بعدها.
+    """
+    cwd = str(cwd)
+    steps = []
+    for step in plan.steps:
+        action, params = step.action, dict(step.params)
+        if action in PATH_KEY:
+            raw = next((params[k] for k in (PATH_KEY[action],) + PATH_ALIASES if params.get(k)), None)
+            if raw:
+                path = _absolute(cwd, raw)
+                for key in PATH_ALIASES:
+                    params.pop(key, None)
+                params[PATH_KEY[action]] = path
+                if action == "create_folder":
+                    cwd = path
+                elif action == "create_file" and params.get("content"):
+                    # create_file بمحتوى = write_text (الـ Action لا يكتب content)
+                    action, params = "write_text", {"file": path, "text": params["content"]}
+        elif action in TRANSFER_ACTIONS:
+            for key, aliases in TRANSFER_ALIASES.items():
+                raw = next((params.pop(a) for a in aliases if params.get(a)), None)
+                if raw:
+                    params[key] = _absolute(cwd, raw)
+        elif action in BULK_ACTIONS:
+            params["folder"] = _absolute(cwd, params.get("folder") or ".")
+        steps.append(ExecutionStep(action, params))
+    return steps
+
+
+def _touches(step: ExecutionStep):
+    """المسارات التي تلمسها الخطوة بعد normalize (None = غير معروف: حاجز)"""
+    if step.action in PATH_KEY:
+        path = step.params.get(PATH_KEY[step.action])
+        return [path] if path else None
+    if step.action in TRANSFER_ACTIONS:
+        return [p for p in (step.params.get("src"), step.params.get("dest")) if p] or None
+    if step.action in BULK_ACTIONS:
+        return [step.params["folder"]]
+    if step.action in NO_PATH_ACTIONS:
+        return []
+    return None
+
+
+def _next_touching(steps: list, start: int, path: str):
+    """أول خطوة بعد start تلمس path (أو أباً/ابناً له)، أو None عند حاجز/عدم وجود"""
+    for j in range(start + 1, len(steps)):
+        if steps[j] is None:
+            continue
+        paths = _touches(steps[j])
+        if paths is None:
+            return None
+        if any(_under(p, path) or _under(path, p) for p in paths):
+            return j
+    return None
+
+
+def optimize(plan, cwd) -> tuple[ExecutionPlan, dict]:
+    """
+    خطة مكافئة بخطوات أقل. يرجع (الخطة، تقرير: before/after/eliminated/fused/deduped/noops).
+    cwd النهائي يبقى كما هو: آخر create_folder لا يُحذف إلا لو تلاه مجلد بداخله.
+    """
+    steps = normalize(plan, cwd)
+    report = {"before": len(steps), "fused": 0, "deduped": 0, "noops": 0}
+    last_folder = max((i for i, s in enumerate(steps) if s.action == "create_folder"), default=-1)
+
+    # 1) نسخ/نقل الشيء لنفسه
+    for i, step in enumerate(steps):
+        if step.action in TRANSFER_ACTIONS and step.params.get("src") and \
+                step.params.get("src") == step.params.get("dest"):
+            steps[i] = None
+            report["noops"] += 1
+
+    # 2) المجلدات: تكرار وسلاسل مستوى بمستوى
+    ensured = set()  # مجلدات مضمون وجودها عند هذه النقطة من الخطة
+    current = str(cwd)
+    for i, step in enumerate(steps):
+        if step is None:
+            continue
+        paths = _touches(step)
+        if step.action == "create_folder" and paths:
+            path = paths[0]
+            if path in ensured and (i != last_folder or current == path):
+                steps[i] = None
+                report["deduped"] += 1
+                continue
+            nxt = _next_step(steps, i)
+            if nxt is not None and nxt.action == "create_folder" and \
+                    nxt.params.get("name") and nxt.params["name"] != path and _under(nxt.params["name"], path):
+                steps[i] = None
+                report["fused"] += 1
+                continue
+            current = path
+            while path not in ensured and path != os.path.dirname(path):
+                ensured.add(path)
+                path = os.path.dirname(path)
+        elif paths is None or step.action in REMOVING_ACTIONS:
+            ensured.clear()
+
+    # 3) الملفات: create_file ثم write_text، تكرار create_file، كتابة تُستبدل مباشرة
+    for i, step in enumerate(steps):
+        if step is None or step.action not in ("create_file", "write_text"):
+            continue
+        path = step.params.get(PATH_KEY[step.action])
+        if not path:
+            continue
+        j = _next_touching(steps, i, path)
+        if j is None or steps[j].params.get(PATH_KEY.get(steps[j].action, "")) != path:
+            continue
+        following = steps[j].action
+        if step.action == "create_file" and following == "write_text":
+            steps[i] = None
+            report["fused"] += 1
+        elif step.action == "create_file" and following == "create_file":
+            steps[j] = None
+            report["deduped"] += 1
+        elif step.action == "write_text" and following == "write_text":
+            steps[i] = None
+            report["deduped"] += 1
+
+    kept = [s for s in steps if s is not None]
+    report["after"] = len(kept)
+    report["eliminated"] = report["before"] - report["after"]
+    return ExecutionPlan(kept), report
+
+
+def _next_step(steps: list, i: int):
+    return next((s for s in steps[i + 1:] if s is not None), None)
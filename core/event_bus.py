@@ -2,12 +2,16 @@
 """
 🔔 Event Bus - الحلقة التفاعلية
 يفصل بين سرعة النظام وبطء الـ LLM مع Debouncing
+الـ Debouncing يعتمد على Min-Heap من المواعيد النهائية لكل مسار (بدون sleep لكل حدث)
 """
-import queue
+import heapq
+import os
 import threading
 import time
-from typing import Callable, Optional
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from dataclasses import dataclass, field
 from datetime import datetime
 
 
@@ -18,44 +22,382 @@ class Event:
     path: str            # مسار الملف
     timestamp: float     # وقت الحدث
     source: str = "watcher"  # مصدر الحدث
+    lane: str = "watcher"    # مسار الأولوية (interactive / scheduled / watcher)
+    data: Any = None         # بيانات إضافية (مثل نص أمر المستخدم)
+
+
+@dataclass
+class EventBatch:
+    """مجموعة أحداث مستقرة من نافذة زمنية واحدة"""
+    events: list[Event] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.events)
+
+    def groups(self) -> dict[tuple[str, str], list[Event]]:
+        """تجميع حسب (المجلد، نوع الحدث) مع الحفاظ على ترتيب الوصول"""
+        grouped: dict[tuple[str, str], list[Event]] = {}
+        for event in self.events:
+            key = (os.path.dirname(event.path), event.event_type)
+            grouped.setdefault(key, []).append(event)
+        return grouped
+
+
+class DeadlineDebouncer:
+    """
+    Debouncer مبني على Min-Heap: كل مسار له موعد نهائي (آخر حدث + النافذة).
+    الحدث الأخير للمسار يُسلَّم مرة واحدة فقط بعد أن يهدأ المسار طوال النافذة.
+    المداخل القديمة في الـ Heap تُتجاهل عند إخراجها (Lazy Deletion).
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._heap: list[tuple[float, int, str]] = []
+        self._pending: dict[str, tuple[float, Event]] = {}  # path -> (deadline, آخر حدث)
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, event: Event, now: float):
+        """تسجيل حدث - يؤجل موعد المسار إلى now + window"""
+        deadline = now + self.window
+        self._pending[event.path] = (deadline, event)
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, event.path))
+
+        # عاصفة أحداث على نفس المسارات تترك مداخل قديمة كثيرة: نعيد بناء الـ Heap
+        if len(self._heap) > 2 * len(self._pending) + 1024:
+            self._heap = [(d, i, p) for i, (p, (d, _)) in enumerate(self._pending.items())]
+            heapq.heapify(self._heap)
+
+    def next_deadline(self) -> Optional[float]:
+        """أقرب موعد نهائي (أو None إذا لا يوجد شيء معلق)"""
+        heap = self._heap
+        while heap:
+            deadline, _, path = heap[0]
+            current = self._pending.get(path)
+            if current and current[0] == deadline:
+                return deadline
+            heapq.heappop(heap)  # مدخل قديم: المسار تأجل أو سُلِّم
+        return None
+
+    def pop_due(self, now: float) -> list[Event]:
+        """إخراج كل الأحداث التي انتهت نافذتها"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, _, path = heapq.heappop(heap)
+            current = self._pending.get(path)
+            if current and current[0] == deadline:
+                del self._pending[path]
+                due.append(current[1])
+        return due
+
+
+class ExpiringSet:
+    """
+    مجموعة مفاتيح تنتهي صلاحيتها بعد ttl ثانية (بديل عن Timer لكل مفتاح).
+    المدة ثابتة، لذلك ترتيب الإضافة هو ترتيب الانتهاء: deque يكفي والمسح O(1) لكل مفتاح.
+    الحجم محدود بـ max_size مهما كان عدد الأحداث (الأقدم يُطرد أولاً).
+    """
+
+    def __init__(self, ttl: float, max_size: int = 100_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._expiry: dict[str, float] = {}
+        self._order: deque[tuple[float, str]] = deque()
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def add(self, key: str, now: float):
+        expiry = now + self.ttl
+        self._expiry[key] = expiry
+        self._order.append((expiry, key))
+        while len(self._expiry) > self.max_size:
+            self._evict_oldest()
+
+    def contains(self, key: str, now: float) -> bool:
+        expiry = self._expiry.get(key)
+        return expiry is not None and expiry > now
+
+    def sweep(self, now: float):
+        """حذف المفاتيح المنتهية - يستدعيه Thread الـ EventBus في كل دورة"""
+        order = self._order
+        while order and order[0][0] <= now:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        expiry, key = self._order.popleft()
+        # المفتاح قد يكون أُضيف مجدداً بموعد أحدث
+        if self._expiry.get(key) == expiry:
+            del self._expiry[key]
+
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "coalesce")
+
+
+class BoundedEventQueue:
+    """
+    طابور محدود الحجم مع سياسة عند الامتلاء:
+    - block: المنتج ينتظر (Backpressure) حتى put_timeout ثم يُسقط الحدث
+    - drop_oldest: إسقاط أقدم حدث لإفساح المجال
+    - coalesce: حدث جديد لمسار موجود في الطابور يستبدل القديم في مكانه،
+      وعند الامتلاء بمسار جديد يُسقط الأقدم
+    """
+
+    def __init__(self, maxsize: int = 10_000, policy: str = "coalesce",
+                 put_timeout: Optional[float] = None,
+                 notify: Optional[threading.Event] = None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.put_timeout = put_timeout
+        self._items: deque[Event] = deque()
+        self._by_path: OrderedDict[str, Event] = OrderedDict()  # لسياسة coalesce
+        self._cond = threading.Condition()
+        self._wake = False
+        self._notify = notify  # يُضبط عند كل إضافة (لمستهلك ينتظر عدة طوابير)
+
+        # عدادات (تُعدل تحت القفل)
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def qsize(self) -> int:
+        return len(self._by_path) if self.policy == "coalesce" else len(self._items)
+
+    def put(self, event: Event) -> str:
+        """إضافة حدث - يعيد enqueued أو coalesced أو dropped"""
+        with self._cond:
+            if self.policy == "coalesce":
+                if event.path in self._by_path:
+                    self._by_path[event.path] = event
+                    self.coalesced += 1
+                    return "coalesced"
+                if len(self._by_path) >= self.maxsize:
+                    self._by_path.popitem(last=False)
+                    self.dropped += 1
+                self._by_path[event.path] = event
+
+            elif self.policy == "drop_oldest":
+                if len(self._items) >= self.maxsize:
+                    self._items.popleft()
+                    self.dropped += 1
+                self._items.append(event)
+
+            else:  # block
+                if not self._cond.wait_for(lambda: len(self._items) < self.maxsize,
+                                           timeout=self.put_timeout):
+                    self.dropped += 1
+                    return "dropped"
+                self._items.append(event)
+
+            self.enqueued += 1
+            self._cond.notify_all()
+        if self._notify is not None:
+            self._notify.set()
+        return "enqueued"
+
+    def get_many(self, max_items: int, timeout: float) -> list[Event]:
+        """سحب حتى max_items حدث دفعة واحدة، مع انتظار timeout إذا كان فارغاً"""
+        with self._cond:
+            if not self.qsize() and not self._wake and timeout > 0:
+                self._cond.wait(timeout)
+            self._wake = False
+
+            if self.policy == "coalesce":
+                count = min(max_items, len(self._by_path))
+                events = [self._by_path.popitem(last=False)[1] for _ in range(count)]
+            else:
+                count = min(max_items, len(self._items))
+                events = [self._items.popleft() for _ in range(count)]
+
+            if events:
+                self._cond.notify_all()  # إيقاظ المنتجين المنتظرين (block)
+            return events
+
+    def wake(self):
+        """إيقاظ المستهلك بدون حدث جديد"""
+        with self._cond:
+            self._wake = True
+            self._cond.notify_all()
+
+
+@dataclass
+class EventBusMetrics:
+    """مقاييس تسليم الأحداث (يعدلها Thread المعالجة فقط)"""
+    delivered: int = 0
+    callback_calls: int = 0
+    callback_errors: int = 0
+    callback_timeouts: int = 0
+    callbacks_dropped: int = 0
+    callback_seconds_total: float = 0.0
+    callback_seconds_max: float = 0.0
+    wait_seconds_total: float = 0.0   # من وصول الحدث حتى بدء الـ callback
+    wait_seconds_max: float = 0.0
+
+    def record_callback(self, seconds: float, count: int = 1, wait: float = 0.0):
+        self.delivered += count
+        self.callback_calls += 1
+        self.callback_seconds_total += seconds
+        self.callback_seconds_max = max(self.callback_seconds_max, seconds)
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+
+@dataclass
+class Lane:
+    """مسار أولوية داخل الـ EventBus"""
+    name: str
+    weight: int                       # حصة الجدولة العادلة الموزونة
+    debounce: Optional[float] = None  # None = debounce_seconds الخاص بالـ Bus
+    batch: bool = False               # أحداثه تُجمع في دفعات الـ batch_callback
+    reserved: bool = False            # له Worker محجوز لا تستخدمه المسارات الأخرى
+
+
+# الترتيب = الأولوية عند السحب من الطوابير
+DEFAULT_LANES = (
+    Lane("interactive", weight=8, debounce=0.0, reserved=True),
+    Lane("scheduled", weight=3, debounce=0.0),
+    Lane("watcher", weight=1, batch=True),
+)
 
 
 class EventBus:
-    def __init__(self, debounce_seconds: float = 1.0):
-        self.queue: queue.Queue[Event] = queue.Queue()
+    def __init__(self, debounce_seconds: float = 1.0, suppress_seconds: float = 5.0,
+                 max_queue: int = 10_000, overflow_policy: str = "coalesce",
+                 put_timeout: Optional[float] = None, callback_workers: int = 4,
+                 callback_timeout: Optional[float] = 120.0, max_pending_callbacks: int = 10_000,
+                 lanes: tuple[Lane, ...] = DEFAULT_LANES):
         self.debounce_seconds = debounce_seconds
         self.running = False
         self.thread: Optional[threading.Thread] = None
         self.callback: Optional[Callable[[Event], None]] = None
-        
-        # للـ Debouncing: آخر حدث لكل مسار
-        self._last_events: dict[str, Event] = {}
-        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        # مسارات الأولوية: لكل مسار طابور محدود و Debouncer ومقاييس خاصة
+        # طابور محدود: منتج جامح (مثل مراقبة مجلد build) لا يستهلك الذاكرة بلا حدود
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.queues = {
+            name: BoundedEventQueue(max_queue, overflow_policy, put_timeout, notify=self._wakeup)
+            for name in self.lanes
+        }
+        self.queue = self.queues.get("watcher") or next(iter(self.queues.values()))
+        self._debouncers = {
+            name: DeadlineDebouncer(debounce_seconds if lane.debounce is None else lane.debounce)
+            for name, lane in self.lanes.items()
+        }
+
+        # التسليم المجمّع: كل الأحداث المستقرة خلال batch_window تُسلَّم معاً
+        self.batch_callback: Optional[Callable[[EventBatch], None]] = None
+        self.batch_window = 2.0
+        self.batch_max_size = 500
+        self._batch: Optional[EventBatch] = None
+        self._batch_deadline = 0.0
+        self.max_drain = 10000  # أقصى عدد أحداث تُسحب من الطوابير في الدورة الواحدة
+
+        # المسارات التي عولجت مؤخراً لا تُعالج مجدداً خلال suppress_seconds
+        self._processed = ExpiringSet(suppress_seconds)
+        self.metrics = {name: EventBusMetrics() for name in self.lanes}
+
+        # تنفيذ الـ callbacks في Thread Pool خارج حلقة المعالجة
+        # (0 = تنفيذ مباشر داخل الحلقة). أحداث نفس المسار تُنفذ بالترتيب وليس بالتوازي.
+        self.callback_workers = callback_workers
+        self.callback_timeout = callback_timeout
+        self.max_pending_callbacks = max_pending_callbacks
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._chains: dict[tuple[str, str], deque] = {}   # (lane, key) -> callbacks تنتظر دورها
+        self._runnable = {name: deque() for name in self.lanes}  # مفاتيح جاهزة لكل مسار
+        self._inflight: dict[tuple[str, str], tuple[int, float]] = {}  # -> (رقم التشغيل، وقت البدء)
+        self._abandoned: dict[tuple[str, str], int] = {}  # تجاوزت المهلة وما زالت تعمل -> رقم التشغيل
+        self._credits = {name: 0 for name in self.lanes}  # Smooth Weighted Round Robin
+        self._pending_callbacks = 0
+        self._run_seq = 0
+        self._completions: deque = deque()       # يكتبها الـ Workers ويقرأها الـ Loop
 
     def set_callback(self, callback: Callable[[Event], None]):
         """تعيين الدالة التي تُستدعى عند حدث مستقر"""
         self.callback = callback
 
-    def push(self, event_type: str, path: str):
-        """إضافة حدث للطابور"""
+    def set_batch_callback(self, callback: Callable[[EventBatch], None],
+                           window: float = 2.0, max_size: int = 500):
+        """
+        تعيين دالة تستقبل كل الأحداث المستقرة خلال window ثانية دفعة واحدة
+        (أو عند الوصول لـ max_size). للمسارات ذات batch=True تحل محل الـ callback الفردي.
+        """
+        self.batch_callback = callback
+        self.batch_window = window
+        self.batch_max_size = max_size
+
+    def push(self, event_type: str, path: str, lane: str = "watcher",
+             source: Optional[str] = None, data=None) -> str:
+        """إضافة حدث لطابور المسار - يعيد enqueued أو coalesced أو dropped"""
+        if lane not in self.queues:
+            raise ValueError(f"Unknown lane: {lane}")
         event = Event(
             event_type=event_type,
             path=path,
-            timestamp=time.time()
+            timestamp=time.time(),
+            source=source or lane,
+            lane=lane,
+            data=data
         )
-        
-        with self._lock:
-            # تخزين آخر حدث لهذا المسار (للـ Debouncing)
-            self._last_events[path] = event
-        
-        self.queue.put(event)
+
+        return self.queues[lane].put(event)
+
+    def get_metrics(self) -> dict:
+        """لقطة من عدادات الـ EventBus (إجمالية + لكل مسار أولوية)"""
+        lanes = {}
+        for name, m in self.metrics.items():
+            q = self.queues[name]
+            calls = m.callback_calls
+            lanes[name] = {
+                "enqueued": q.enqueued,
+                "coalesced": q.coalesced,
+                "dropped": q.dropped,
+                "queue_depth": q.qsize(),
+                "debouncing": len(self._debouncers[name]),
+                "delivered": m.delivered,
+                "callbacks_running": sum(1 for lane, _ in self._inflight if lane == name),
+                "callbacks_dropped": m.callbacks_dropped,
+                "callback_errors": m.callback_errors,
+                "callback_timeouts": m.callback_timeouts,
+                "callback_latency_avg": m.callback_seconds_total / calls if calls else 0.0,
+                "callback_latency_max": m.callback_seconds_max,
+                "wait_avg": m.wait_seconds_total / calls if calls else 0.0,
+                "wait_max": m.wait_seconds_max,
+            }
+
+        totals = {}
+        for key in ("enqueued", "coalesced", "dropped", "queue_depth", "debouncing", "delivered",
+                    "callbacks_dropped", "callback_errors", "callback_timeouts"):
+            totals[key] = sum(lane[key] for lane in lanes.values())
+        calls = sum(m.callback_calls for m in self.metrics.values())
+        seconds = sum(m.callback_seconds_total for m in self.metrics.values())
+        totals.update({
+            "callbacks_pending": self._pending_callbacks,
+            "callbacks_running": len(self._inflight),
+            "callback_latency_avg": seconds / calls if calls else 0.0,
+            "callback_latency_max": max(m.callback_seconds_max for m in self.metrics.values()),
+            "lanes": lanes,
+        })
+        return totals
 
     def start(self):
         """تشغيل الـ EventBus في Thread منفصل"""
         if self.running:
             return
-        
+
         self.running = True
+        if self.callback_workers > 0:
+            # Threads إضافية حتى لا يحجز callback عالق (تجاوز المهلة) مكان غيره
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.callback_workers * 2,
+                thread_name_prefix="eventbus-callback"
+            )
         self.thread = threading.Thread(target=self._process_loop, daemon=True)
         self.thread.start()
         print("🔔 EventBus started")
@@ -63,51 +405,217 @@ class EventBus:
     def stop(self):
         """إيقاف الـ EventBus"""
         self.running = False
+        self._wakeup.set()
         if self.thread:
             self.thread.join(timeout=2)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
         print("🔔 EventBus stopped")
 
+    def _next_wakeup(self) -> Optional[float]:
+        """أقرب لحظة تحتاج فيها الحلقة للعمل: Debounce أو دفعة أو مهلة callback"""
+        candidates = [d for d in (deb.next_deadline() for deb in self._debouncers.values())
+                      if d is not None]
+        if self._batch is not None:
+            candidates.append(self._batch_deadline)
+        if self._inflight and self.callback_timeout:
+            candidates.append(min(s for _, s in self._inflight.values()) + self.callback_timeout)
+        return min(candidates) if candidates else None
+
     def _process_loop(self):
         """الحلقة الرئيسية للمعالجة"""
-        processed_paths: set[str] = set()
-        
+        processed = self._processed
+
         while self.running:
             try:
-                # انتظار حدث مع timeout
-                event = self.queue.get(timeout=0.5)
-                
-                # انتظار Debounce
-                time.sleep(self.debounce_seconds)
-                
-                with self._lock:
-                    # تحقق إذا هذا هو آخر حدث لهذا المسار
-                    last_event = self._last_events.get(event.path)
-                    
-                    if last_event and last_event.timestamp == event.timestamp:
-                        # هذا هو آخر حدث، نعالجه
-                        if self.callback and event.path not in processed_paths:
-                            try:
-                                self.callback(last_event)
-                                processed_paths.add(event.path)
-                                
-                                # نمسح بعد فترة
-                                threading.Timer(
-                                    5.0, 
-                                    lambda p=event.path: processed_paths.discard(p)
-                                ).start()
-                            except Exception as e:
-                                print(f"⚠️ EventBus callback error: {e}")
-                        
-                        # حذف من القائمة
-                        del self._last_events[event.path]
-                
-                self.queue.task_done()
-                
-            except queue.Empty:
-                continue
+                # الانتظار حتى أقرب موعد (أو 0.5 ثانية إذا لا شيء معلق)
+                wakeup = self._next_wakeup()
+                timeout = 0.5 if wakeup is None else max(0.0, wakeup - time.monotonic())
+                if timeout > 0 and not self._completions:
+                    self._wakeup.wait(timeout)
+                self._wakeup.clear()
+
+                # سحب ما تراكم في الطوابير دفعة واحدة (الأعلى أولوية أولاً)
+                now = time.monotonic()
+                budget = self.max_drain
+                for name, q in self.queues.items():
+                    events = q.get_many(budget, 0)
+                    budget -= len(events)
+                    debouncer = self._debouncers[name]
+                    for event in events:
+                        debouncer.add(event, now)
+
+                processed.sweep(now)
+
+                for name, debouncer in self._debouncers.items():
+                    lane = self.lanes[name]
+                    for event in debouncer.pop_due(now):
+                        # هذا هو آخر حدث لهذا المسار بعد هدوئه
+                        if processed.contains(event.path, now):
+                            continue
+                        if self.batch_callback and (lane.batch or not self.callback):
+                            if lane.batch:
+                                self._add_to_batch(event, now)
+                            else:
+                                self._dispatch(name, event.path, self.batch_callback,
+                                               EventBatch([event]), 1, event.timestamp)
+                        elif self.callback:
+                            self._dispatch(name, event.path, self.callback, event, 1, event.timestamp)
+                        else:
+                            continue
+                        processed.add(event.path, now)
+
+                if self._batch is not None and time.monotonic() >= self._batch_deadline:
+                    self._flush_batch()
+
+                self._pump()
+
             except Exception as e:
                 print(f"⚠️ EventBus error: {e}")
 
+    def _add_to_batch(self, event: Event, now: float):
+        if self._batch is None:
+            self._batch = EventBatch()
+            self._batch_deadline = now + self.batch_window
+        self._batch.events.append(event)
+        if len(self._batch) >= self.batch_max_size:
+            self._flush_batch()
+
+    def _flush_batch(self):
+        batch, self._batch = self._batch, None
+        if not batch:
+            return
+        # الدفعات تُسلسل على مفتاح واحد: دفعة لا تبدأ قبل انتهاء السابقة
+        lane = batch.events[0].lane
+        self._dispatch(lane, "__batch__", self.batch_callback, batch, len(batch),
+                       batch.events[0].timestamp)
+
+    # ===== تنفيذ الـ Callbacks =====
+
+    def _dispatch(self, lane: str, key: str, callback: Callable, payload, count: int,
+                  enqueued_at: float):
+        """جدولة callback - مباشرة أو في الـ Pool مع تسلسل لكل مفتاح داخل المسار"""
+        if self._executor is None:
+            self._invoke(lane, callback, payload, count, enqueued_at)
+            return
+
+        if self._pending_callbacks >= self.max_pending_callbacks:
+            self.metrics[lane].callbacks_dropped += count
+            return
+
+        chain_key = (lane, key)
+        chain = self._chains.get(chain_key)
+        if chain is None:
+            chain = self._chains[chain_key] = deque()
+            if chain_key not in self._inflight and chain_key not in self._abandoned:
+                self._runnable[lane].append(key)
+        chain.append((callback, payload, count, enqueued_at))
+        self._pending_callbacks += 1
+
+    def _lane_capacity(self, lane: str) -> int:
+        """المسارات العادية لا تستخدم الـ Workers المحجوزة للمسارات reserved"""
+        if self.lanes[lane].reserved:
+            return self.callback_workers
+        reserved = sum(1 for l in self.lanes.values() if l.reserved)
+        return max(1, self.callback_workers - reserved)
+
+    def _pick_lane(self) -> Optional[str]:
+        """Smooth Weighted Round Robin بين المسارات التي لديها عمل جاهز"""
+        running = len(self._inflight)
+        eligible = [
+            name for name, keys in self._runnable.items()
+            if keys and running < self._lane_capacity(name)
+        ]
+        if not eligible:
+            return None
+        total = 0
+        for name in eligible:
+            self._credits[name] += self.lanes[name].weight
+            total += self.lanes[name].weight
+        chosen = max(eligible, key=lambda name: self._credits[name])
+        self._credits[chosen] -= total
+        return chosen
+
+    def _pump(self):
+        """استلام الـ Callbacks المنتهية، فحص المهلات، وإرسال الجاهز للـ Pool"""
+        if self._executor is None:
+            return
+
+        while self._completions:
+            chain_key, run_id, seconds, wait, count, failed = self._completions.popleft()
+            metrics = self.metrics[chain_key[0]]
+            metrics.record_callback(seconds, count, wait)
+            if failed:
+                metrics.callback_errors += 1
+            current = self._inflight.get(chain_key)
+            if current and current[0] == run_id:
+                self._release(chain_key)
+            elif self._abandoned.get(chain_key) == run_id:
+                del self._abandoned[chain_key]
+                self._resume(chain_key)
+
+        if self.callback_timeout:
+            now = time.monotonic()
+            for chain_key, (run_id, started) in list(self._inflight.items()):
+                if now - started > self.callback_timeout:
+                    # لا يمكن إيقاف Thread بالقوة: نحرر مكان الـ Worker فقط، أما المفتاح
+                    # فيبقى مشغولاً حتى يعود الـ callback حتى لا يعمل حدثان لنفس المسار معاً
+                    self.metrics[chain_key[0]].callback_timeouts += 1
+                    print(f"⚠️ EventBus callback timeout ({self.callback_timeout}s): {chain_key[1]}")
+                    del self._inflight[chain_key]
+                    self._abandoned[chain_key] = run_id
+
+        while len(self._inflight) < self.callback_workers:
+            lane = self._pick_lane()
+            if lane is None:
+                break
+            key = self._runnable[lane].popleft()
+            chain_key = (lane, key)
+            callback, payload, count, enqueued_at = self._chains[chain_key].popleft()
+            if not self._chains[chain_key]:
+                del self._chains[chain_key]
+            self._pending_callbacks -= 1
+            self._run_seq += 1
+            self._inflight[chain_key] = (self._run_seq, time.monotonic())
+            self._executor.submit(self._run_callback, chain_key, self._run_seq,
+                                  callback, payload, count, enqueued_at)
+
+    def _release(self, chain_key: tuple[str, str]):
+        del self._inflight[chain_key]
+        self._resume(chain_key)
+
+    def _resume(self, chain_key: tuple[str, str]):
+        if chain_key in self._chains:
+            self._runnable[chain_key[0]].append(chain_key[1])
+
+    def _run_callback(self, chain_key: tuple[str, str], run_id: int, callback: Callable,
+                      payload, count: int, enqueued_at: float):
+        """يعمل داخل الـ Pool - النتيجة تُرسل للحلقة عبر _completions"""
+        wait = time.time() - enqueued_at
+        started = time.perf_counter()
+        failed = False
+        try:
+            callback(payload)
+        except Exception as e:
+            failed = True
+            print(f"⚠️ EventBus callback error: {e}")
+        self._completions.append(
+            (chain_key, run_id, time.perf_counter() - started, wait, count, failed)
+        )
+        self._wakeup.set()
+
+    def _invoke(self, lane: str, callback: Callable, payload, count: int, enqueued_at: float):
+        """استدعاء الـ callback مع قياس الزمن"""
+        wait = time.time() - enqueued_at
+        started = time.perf_counter()
+        try:
+            callback(payload)
+        except Exception as e:
+            self.metrics[lane].callback_errors += 1
+            print(f"⚠️ EventBus callback error: {e}")
+        self.metrics[lane].record_callback(time.perf_counter() - started, count, wait)
+
 
 # Singleton instance
 _event_bus: Optional[EventBus] = None
@@ -1,20 +1,55 @@
 # core/execution_context.py
-import json
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
+from core.jsonl_log import JsonlLog
 
 
 class ExecutionContext:
-    def __init__(self, base_path):
+    def __init__(self, base_path, history_capacity=1000, log_max_bytes=5 * 1024 * 1024,
+                 log_backups=5, compress_logs=True):
         self.base_path = Path(base_path).resolve()
         self.cwd = self.base_path
         self.vars = {}
-        self.history = []
-        self.event_log = []  # ذاكرة الأحداث
+        # Ring buffers: البرنامج يعمل لفترات طويلة فلا نحتفظ إلا بآخر N سجل
+        self.history = deque(maxlen=history_capacity)
+        self.event_log = deque(maxlen=history_capacity)  # ذاكرة الأحداث
+
+        # سجلات لم تُحفظ بعد (تُلحق بالملف في save_memory) - بدون حد: لا يضيع سجل قبل الحفظ
+        self._pending = []
+        self._lock = threading.Lock()
+        self._history_total = 0
+        self._events_total = 0
+        self._log_settings = {
+            "max_bytes": log_max_bytes,
+            "backup_count": log_backups,
+            "compress": compress_logs,
+        }
+        self._logs: dict[str, JsonlLog] = {}
+        # تقدم العمليات الطويلة (نسخ/نقل) - الـ GUI يربطه بـ status_update
+        self.progress_callback = None
 
     def set_cwd(self, path):
         self.cwd = Path(path).resolve()
-        self.history.append(f"cwd -> {self.cwd}")
+        entry = f"cwd -> {self.cwd}"
+        with self._lock:
+            self.history.append(entry)
+            self._history_total += 1
+            self._pending.append({
+                "time": datetime.now().isoformat(),
+                "type": "history",
+                "message": entry
+            })
+
+    def report_progress(self, message: str):
+        """رسالة تقدم للواجهة (قد تُستدعى من Threads التنفيذ)"""
+        callback = self.progress_callback
+        if callback is not None:
+            try:
+                callback(message)
+            except Exception:
+                pass
 
     def log_event(self, message):
         """تسجيل حدث في الذاكرة"""
@@ -22,18 +57,24 @@ class ExecutionContext:
             "time": datetime.now().isoformat(),
             "message": message
         }
-        self.event_log.append(event)
+        with self._lock:
+            self.event_log.append(event)
+            self._events_total += 1
+            self._pending.append({"type": "event", **event})
 
-    def save_memory(self, filename="memory_dump.json"):
-        """حفظ الذاكرة في ملف"""
-        data = {
-            "base_path": str(self.base_path),
-            "cwd": str(self.cwd),
-            "history": self.history,
-            "events": self.event_log
-        }
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    def save_memory(self, filename="memory_dump.jsonl"):
+        """حفظ الذاكرة في ملف (إلحاق السجلات الجديدة فقط - JSONL مع تدوير)"""
+        with self._lock:
+            records, self._pending = self._pending, []
+        if not records:
+            return
+
+        log = self._logs.get(filename)
+        if log is None:
+            log = self._logs[filename] = JsonlLog(filename, **self._log_settings)
+
+        records[-1]["cwd"] = str(self.cwd)
+        log.append(records)
         # print(f"💾 Memory saved to {filename}")
 
     def get_summary(self):
@@ -41,6 +82,6 @@ class ExecutionContext:
         return {
             "base": str(self.base_path),
             "cwd": str(self.cwd),
-            "actions_count": len(self.history),
-            "events_count": len(self.event_log)
+            "actions_count": self._history_total,
+            "events_count": self._events_total
         }
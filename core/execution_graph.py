@@ -2,58 +2,226 @@
 """
 ⚡ Execution Graph - منفذ الخطوات
 يدعم file_ops و system_ops مع Rollback
+الخطوات المستقلة (مسارات لا تتداخل) تعمل بالتوازي على Thread Pool محدود،
+والاعتماديات تُستنتج من المسارات: المجلد الأب قبل محتواه، نفس الملف بترتيب الخطة،
+والمسارات النسبية تُحسب مسبقاً من cwd التسلسلي. الخطوات غير المعروفة حاجز كامل.
+النسخ الاحتياطية في Transaction من الـ Journal: تُحذف عند النجاح وتُستعاد عند الفشل.
+كل خطوة لها مهلة وتوكن إلغاء (core/cancellation.py): الإلغاء أو تجاوز المهلة = فشل الخطوة
+والتراجع العكسي المعتاد، والخطوة المعلقة لا توقف الخطة.
+بين الجلسات: الخطة تحجز مساراتها في PathLocks قبل التنفيذ وحتى commit/التراجع.
 """
-from actions.file_ops import ACTION_CLASSES as FILE_ACTIONS
-from actions.system_ops import ACTION_CLASSES as SYSTEM_ACTIONS
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from core.action_registry import GRAPH, get_registry
+from core.cancellation import CancellationToken
+from core.journal import get_journal
+from core.path_locks import get_path_locks, path_key
 
-
-# دمج كل الـ Actions
-ALL_ACTIONS = {**FILE_ACTIONS, **SYSTEM_ACTIONS}
+DEFAULT_STEP_TIMEOUT = 120.0  # ثوانٍ لكل خطوة (BaseAction.timeout أو params["timeout"] تغيرها)
+CANCEL_GRACE = 2.0            # مهلة التوقف التعاوني بعد الإلغاء قبل التخلي عن الخطوة
 
 
 class ExecutionGraph:
-    def __init__(self, plan, ctx):
+    def __init__(self, plan, ctx, max_workers: int = 4, journal=None, token=None,
+                 step_timeout: float = DEFAULT_STEP_TIMEOUT, path_locks=None, owner: str = ""):
         self.plan = plan
         self.ctx = ctx
-        self.history = []
+        self.max_workers = max_workers
+        self.journal = journal or get_journal()
+        self.token = token or CancellationToken()  # token.cancel() من أي Thread يوقف الخطة
+        self.step_timeout = step_timeout
+        self.path_locks = path_locks or get_path_locks()
+        self.owner = owner  # اسم الجلسة (للتشخيص في PathLocks)
+        self.transaction = None
+        self.history = []  # بترتيب الانتهاء (ترتيب طوبولوجي صالح للتراجع العكسي)
+        self.abandoned = []  # خطوات لم تتوقف بعد إلغائها (Thread معلق)
+        self.error = None
+        self._final_cwd = None
 
     def run(self):
         print("🚀 Starting Execution...")
-        
-        try:
-            for step in self.plan.steps:
-                action = self._create_action(step)
-                action.execute()
-                self.history.append(action)
-                self.ctx.log_event(f"Executed: {step.action}")
 
-            print("✅ All steps completed successfully.")
-            return True
+        try:
+            actions = self._build_actions()
+        except Exception as e:
+            # لم يُنفذ شيء بعد: لا حاجة للتراجع
+            print(f"❌ Error occurred: {e}")
+            return False
 
+        try:
+            lease = self._lock_paths(actions)
         except Exception as e:
+            # أُلغيت أثناء انتظار جلسة أخرى: لم يُنفذ شيء
+            self.error = e
             print(f"❌ Error occurred: {e}")
-            print("🔄 Initiating Rollback...")
-            self.rollback_all()
             return False
+        with lease:
+            return self._run_locked(actions)
+
+    def _lock_paths(self, actions):
+        """حجز كل مسارات الخطة دفعة واحدة (خطوة بمسار غير معروف تحجز الجذر)"""
+        paths = []
+        for _, action in actions:
+            resources = action.resources()
+            if resources is None:
+                paths = None
+                break
+            paths.extend(resources)
+        return self.path_locks.acquire(paths, owner=self.owner, token=self.token)
+
+    def _run_locked(self, actions):
+        self.transaction = self.journal.begin()
+        for _, action in actions:
+            action.journal = self.transaction
+
+        error = self.error = self._execute(actions, self._dependencies(actions))
+        if error is None:
+            self.transaction.commit()
+            # الخطوات المتوازية قد تنتهي بأي ترتيب: cwd النهائي كما في التنفيذ التسلسلي
+            if self._final_cwd is not None and self.ctx.cwd != self._final_cwd.resolve():
+                self.ctx.set_cwd(self._final_cwd)
+            print("✅ All steps completed successfully.")
+            return True
+
+        print(f"❌ Error occurred: {error}")
+        print("🔄 Initiating Rollback...")
+        self.rollback_all()
+        # الخطوات المتخلى عنها ليست في history: سجلاتها في الـ Journal تُلغى هنا
+        self.transaction.abort()
+        return False
+
+    def _build_actions(self):
+        """
+        إنشاء كل الـ Actions بالترتيب قبل التنفيذ. المسارات النسبية تُحسب من cwd
+        كما سيكون عند الوصول للخطوة في التنفيذ التسلسلي (بعد create_folder السابقة)،
+        فلا تعتمد خطوة على cwd وقت تنفيذها.
+        """
+        original_cwd = self.ctx.cwd
+        self._final_cwd = None
+        actions = []
+        try:
+            for step in self.plan.steps:
+                action = self._create_action(step)
+                actions.append((step, action))
+                if action.changes_cwd and getattr(action, "path", None) is not None:
+                    self.ctx.cwd = self._final_cwd = action.path
+        finally:
+            self.ctx.cwd = original_cwd
+        return actions
+
+    _key = staticmethod(path_key)
+
+    def _dependencies(self, actions):
+        """لكل خطوة: الخطوات السابقة التي يجب أن تنتهي قبلها"""
+        resources = []
+        for _, action in actions:
+            paths = action.resources()
+            resources.append(None if paths is None else [self._key(p) for p in paths])
+
+        deps = []
+        for i in range(len(actions)):
+            mine = resources[i]
+            needs = set()
+            for j in range(i):
+                theirs = resources[j]
+                if mine is None or theirs is None:
+                    needs.add(j)  # حاجز
+                elif any(a[:len(b)] == b or b[:len(a)] == a for a in mine for b in theirs):
+                    needs.add(j)  # نفس المسار أو أب/ابن
+            deps.append(needs)
+        return deps
+
+    def _execute(self, actions, deps):
+        """
+        جدولة Kahn: كل خطوة تبدأ عندما تنتهي اعتمادياتها، بتوكن فرعي بمهلتها.
+        الإلغاء أو المهلة يوقف جدولة الجديد، والخطوة التي لا تتوقف خلال CANCEL_GRACE
+        يُتخلى عنها (لا ننتظر Thread معلقاً). يرجع أول خطأ أو None
+        """
+        remaining = [len(d) for d in deps]
+        dependents = [[] for _ in actions]
+        for i, needs in enumerate(deps):
+            for j in needs:
+                dependents[j].append(i)
+
+        ready = [i for i, n in enumerate(remaining) if n == 0]
+        running = {}  # future -> [i، توكن الخطوة، موعد التخلي بعد الإلغاء]
+        error = None
+        wakeup = Future()  # يكتمل عند إلغاء الخطة فيوقظ wait
+        self.token.on_cancel(lambda token: wakeup.set_result(None))
+
+        pool = ThreadPoolExecutor(max_workers=max(1, self.max_workers))
+        try:
+            while ready or running:
+                if error is None:
+                    error = self.token.exception()
+                while ready and error is None:
+                    i = ready.pop(0)
+                    step, action = actions[i]
+                    token = self.token.child(self._timeout(action))
+                    running[pool.submit(action.execute, token)] = [i, token, None]
+                if not running:
+                    break
+
+                waiters = list(running) if wakeup.done() else [*running, wakeup]
+                done, _ = wait(waiters, timeout=self._next_deadline(running.values()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future is wakeup:
+                        continue
+                    i = running.pop(future)[0]
+                    exc = future.exception()
+                    if exc is not None:
+                        error = error or exc  # ننتظر الخطوات الجارية ثم نتراجع
+                        continue
+                    step, action = actions[i]
+                    self.history.append(action)
+                    self.ctx.log_event(f"Executed: {step.action}")
+                    for k in dependents[i]:
+                        remaining[k] -= 1
+                        if remaining[k] == 0:
+                            ready.append(k)
+                ready.sort()  # ترتيب الخطة بين الجاهزين
+
+                # مهلات وإلغاء الخطوات الجارية
+                now = time.monotonic()
+                for future, entry in list(running.items()):
+                    i, token, give_up_at = entry
+                    step, action = actions[i]
+                    if give_up_at is None:
+                        if token.cancelled:
+                            entry[2] = now + CANCEL_GRACE
+                            exc = token.exception()
+                            error = error or type(exc)(f"{step.action}: {exc}")
+                    elif now >= give_up_at:
+                        del running[future]
+                        self.abandoned.append(action)
+                        print(f"⚠️ {step.action} did not stop after cancellation - abandoned")
+        finally:
+            # Thread معلق لا يمنع الرجوع (يكمل في الخلفية ونتيجته تُلغى عبر الـ Journal)
+            pool.shutdown(wait=not self.abandoned, cancel_futures=True)
+        return error
+
+    def _timeout(self, action):
+        timeout = action.timeout if action.timeout is not None else self.step_timeout
+        return timeout if timeout and timeout > 0 else None
+
+    @staticmethod
+    def _next_deadline(entries):
+        """ثوانٍ حتى أقرب مهلة خطوة أو موعد تخلٍّ (None = انتظار بلا حد)"""
+        moments = [give_up_at if give_up_at is not None else token.deadline
+                   for _, token, give_up_at in entries]
+        moments = [m for m in moments if m is not None]
+        return max(0.0, min(moments) - time.monotonic()) if moments else None
 
     def _create_action(self, step):
-        """Factory: يحول الخطوة إلى كلاس مناسب"""
-        
-        action_class = ALL_ACTIONS.get(step.action)
-        if not action_class:
+        """Factory: الخطوة -> Action عبر ActionRegistry (الكلاس يُستورد عند أول استخدام)"""
+        spec = get_registry().get(step.action)
+        if spec is None or spec.kind != GRAPH:
             raise ValueError(f"Unknown action: {step.action}")
-        
-        # تحويل الـ params حسب نوع الـ action
-        if step.action == "create_folder":
-            return action_class(self.ctx, step.params["name"])
-        elif step.action == "create_file":
-            return action_class(self.ctx, step.params["name"])
-        elif step.action == "write_text":
-            return action_class(self.ctx, step.params["file"], step.params["text"])
-        elif step.action == "open_app":
-            return action_class(self.ctx, step.params.get("app", step.params.get("app_name", "")))
-        
-        raise ValueError(f"No handler for action: {step.action}")
+        action = spec.create(self.ctx, step.params)
+        if step.params.get("timeout") is not None:
+            action.timeout = float(step.params["timeout"])  # مهلة من الخطة لهذه الخطوة فقط
+        return action
 
     def rollback_all(self):
         """التراجع عن كل العمليات بالترتيب العكسي"""
@@ -0,0 +1,267 @@
+# core/journal.py
+"""
+📒 Transaction Journal - نسخ احتياطي على القرص للـ Rollback بذاكرة ثابتة
+الأصل لا يُقرأ أبداً: يُنقل جانباً (rename) أو يُربط (hardlink / reflink) بجوار الملف
+على نفس نظام الملفات، فتكلفة النسخ الاحتياطي O(1) مهما كان حجم الملف.
+كل عملية تُسجل في manifest (سطر JSON + fsync) قبل تنفيذها، فتعطل البرنامج في المنتصف
+يُعالج عند التشغيل التالي عبر recover(): تراجع كامل للمعاملات غير المكتملة.
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+BACKUP_SUFFIX = ".jbak"
+APP_NAME = "Jarvis"
+
+
+def default_journal_dir() -> Path:
+    """
+    مجلد الـ manifests لكل مستخدم (وليس مجلد التشغيل الحالي): recover() يجد
+    المعاملات المعلقة مهما كان المكان الذي شُغل منه البرنامج
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    elif os.uname().sysname == "Darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return Path(base) / APP_NAME / "journal"
+
+
+def _clone(src: str, dest: str):
+    """نسخة مستقلة من الملف: reflink (Copy-on-Write) إن دعمه النظام، وإلا نسخ عادي"""
+    try:
+        import fcntl
+        FICLONE = 0x40049409  # Linux: btrfs / xfs / bcachefs
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, dest)
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copy2(src, dest)
+
+
+def _remove(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+class Transaction:
+    """
+    معاملة واحدة (خطة واحدة في ExecutionGraph). آمنة للاستدعاء من عدة Threads.
+    الـ manifest يُنشأ عند أول تسجيل فقط: الخطط بدون تعديل ملفات لا تلمس القرص.
+    """
+
+    def __init__(self, journal: "Journal", tx_id: str):
+        self.journal = journal
+        self.id = tx_id
+        self.manifest = journal.directory / f"{tx_id}.jsonl"
+        self.entries: list[dict] = []
+        self._file = None
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    # ===== التسجيل =====
+
+    def _record(self, *entries: dict):
+        """إلحاق سجلات مع fsync واحد قبل تنفيذ العمليات على القرص"""
+        if self._file is None:
+            self.journal.directory.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.manifest, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries.extend(e for e in entries if e["op"] != "commit")
+
+    def backup(self, path, keep: bool = False) -> Optional[dict]:
+        """
+        حفظ الأصل قبل تغييره. keep=False: الأصل يُنقل جانباً (الحذف نفسه O(1)).
+        keep=True: الأصل يبقى مكانه عبر hardlink، لذا يجب استبداله (os.replace) لا تعديله؛
+        بدون دعم hardlink نستخدم reflink أو نسخة كاملة.
+        يرجع السجل (لـ restore) أو None إذا لم يكن المسار موجوداً.
+        """
+        return self.backup_many([path], keep)[0]
+
+    def backup_many(self, paths, keep: bool = False) -> list[Optional[dict]]:
+        """مثل backup لعدة مسارات بسجل (fsync) واحد"""
+        paths = [os.path.abspath(str(p)) for p in paths]
+        entries = []
+        with self._lock:
+            for path in paths:
+                if not os.path.lexists(path):
+                    entries.append(None)
+                    continue
+                self._counter += 1
+                folder, name = os.path.split(path)
+                backup = os.path.join(folder, f".{name[:80]}.{self.id}-{self._counter}{BACKUP_SUFFIX}")
+                entries.append({"op": "backup", "path": path, "backup": backup})
+            if any(entries):
+                self._record(*filter(None, entries))
+
+        for entry in filter(None, entries):
+            if not keep:
+                os.rename(entry["path"], entry["backup"])
+            else:
+                try:
+                    os.link(entry["path"], entry["backup"])
+                except OSError:
+                    _clone(entry["path"], entry["backup"])
+        return entries
+
+    def created(self, path, is_dir: bool = False) -> dict:
+        """تسجيل مسار جديد (يُحذف عند التراجع) - قبل إنشائه"""
+        return self.created_many([path], is_dir)[0]
+
+    def created_many(self, paths, is_dir: bool = False, tree: bool = False) -> list[dict]:
+        """tree=True: مجلد بمحتواه (نسخ شجري) يُحذف كاملاً عند التراجع"""
+        entries = [{"op": "create", "path": os.path.abspath(str(p)), "dir": is_dir or tree} for p in paths]
+        if tree:
+            for entry in entries:
+                entry["tree"] = True
+        if entries:
+            with self._lock:
+                self._record(*entries)
+        return entries
+
+    def moved(self, src, dest) -> dict:
+        """تسجيل نقل (rename) قبل تنفيذه: التراجع يعيده لمكانه"""
+        entry = {"op": "move", "path": os.path.abspath(str(src)), "dest": os.path.abspath(str(dest))}
+        with self._lock:
+            self._record(entry)
+        return entry
+
+    def temp_name(self, path) -> str:
+        """اسم ملف مؤقت ثابت بجوار path (يُسجل في الـ manifest قبل إنشائه)"""
+        with self._lock:
+            self._counter += 1
+            folder, name = os.path.split(os.path.abspath(str(path)))
+            return os.path.join(folder, f".{name[:80]}.{self.id}-{self._counter}.tmp")
+
+    # ===== التراجع =====
+
+    @staticmethod
+    def restore(entry: Optional[dict]) -> bool:
+        """إرجاع نسخة احتياطية لمكانها (rename). آمن للتكرار"""
+        if entry is None or entry["op"] != "backup" or not os.path.lexists(entry["backup"]):
+            return False
+        if os.path.isdir(entry["backup"]):
+            if os.path.lexists(entry["path"]):
+                os.rmdir(entry["path"])  # لا نحذف محتوى أُنشئ بعد الحذف
+            os.rename(entry["backup"], entry["path"])
+        elif os.path.lexists(entry["path"]) and os.path.samefile(entry["backup"], entry["path"]):
+            # hardlink (keep=True) والأصل لم يُستبدل بعد (فشل/إلغاء قبل os.replace):
+            # rename بين اسمين لنفس الملف لا يفعل شيئاً، فنحذف الرابط فقط
+            os.remove(entry["backup"])
+        else:
+            os.replace(entry["backup"], entry["path"])
+        return True
+
+    @staticmethod
+    def _undo(entry: dict):
+        if entry["op"] == "backup":
+            Transaction.restore(entry)
+        elif entry["op"] == "move":
+            if os.path.lexists(entry["dest"]) and not os.path.lexists(entry["path"]):
+                os.rename(entry["dest"], entry["path"])
+        elif entry["op"] == "create" and os.path.lexists(entry["path"]):
+            if entry.get("tree"):
+                shutil.rmtree(entry["path"], ignore_errors=True)
+            elif entry["dir"]:
+                try:
+                    os.rmdir(entry["path"])  # المجلدات غير الفارغة تبقى (كما في CreateFolderAction)
+                except OSError:
+                    pass
+            else:
+                os.remove(entry["path"])
+
+    # ===== الإنهاء =====
+
+    def commit(self):
+        """نجاح: سجل commit أولاً (لو تعطلنا أثناء التنظيف لا نتراجع) ثم حذف النسخ الاحتياطية"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._record({"op": "commit"})
+            for entry in self.entries:
+                if entry["op"] == "backup":
+                    _remove(entry["backup"])
+            self._close()
+
+    def abort(self):
+        """فشل: تراجع عن أي سجل لم يُعَد بعد (بالعكس) - الـ Actions غالباً تراجعت بنفسها"""
+        with self._lock:
+            if self._file is None:
+                return
+            for entry in reversed(self.entries):
+                try:
+                    self._undo(entry)
+                except OSError as e:
+                    print(f"⚠️ Journal rollback failed for {entry['path']}: {e}")
+            self._close()
+
+    def _close(self):
+        self._file.close()
+        self._file = None
+        self.entries.clear()
+        os.remove(self.manifest)
+
+
+class Journal:
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else default_journal_dir()
+
+    def begin(self) -> Transaction:
+        return Transaction(self, uuid.uuid4().hex[:12])
+
+    def recover(self) -> int:
+        """
+        عند التشغيل: معاملات بدون commit تُلغى بالكامل (بالعكس)،
+        ومعاملات بـ commit يُكمل حذف نسخها الاحتياطية. يرجع عدد المعاملات المعالجة
+        """
+        if not self.directory.is_dir():
+            return 0
+        recovered = 0
+        for manifest in sorted(self.directory.glob("*.jsonl")):
+            entries, committed = [], False
+            with open(manifest, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # سطر أخير ناقص: العملية لم تبدأ بعد
+                    if entry["op"] == "commit":
+                        committed = True
+                    else:
+                        entries.append(entry)
+
+            for entry in (entries if committed else reversed(entries)):
+                try:
+                    if committed:
+                        if entry["op"] == "backup":
+                            _remove(entry["backup"])
+                    else:
+                        Transaction._undo(entry)
+                except OSError as e:
+                    print(f"⚠️ Journal recovery failed for {entry['path']}: {e}")
+            os.remove(manifest)
+            recovered += 1
+            print(f"📒 Recovered transaction {manifest.stem} "
+                  f"({'committed' if committed else f'rolled back {len(entries)} operations'})")
+        return recovered
+
+
+_journal: Optional[Journal] = None
+
+def get_journal() -> Journal:
+    global _journal
+    if _journal is None:
+        _journal = Journal()
+        _journal.recover()
+    return _journal
@@ -0,0 +1,74 @@
+# core/jsonl_log.py
+"""
+📜 JSONL Log - سجل إلحاقي مع تدوير
+كل سجل سطر JSON واحد، والملف يُدوَّر عند تجاوز الحجم (مع ضغط gzip اختياري)
+"""
+import gzip
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+class JsonlLog:
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024,
+                 backup_count: int = 5, compress: bool = True):
+        self.path = Path(path)
+        self.max_bytes = max_bytes        # حجم الملف قبل التدوير
+        self.backup_count = backup_count  # عدد الملفات القديمة المحفوظة
+        self.compress = compress          # ضغط الملفات المدوّرة
+        self._lock = threading.Lock()
+
+    def _segment(self, index: int) -> Path:
+        suffix = ".gz" if self.compress else ""
+        return self.path.with_name(f"{self.path.name}.{index}{suffix}")
+
+    def append(self, records: Iterable[dict]) -> int:
+        """إلحاق سجلات بنهاية الملف - التكلفة تعتمد على عدد السجلات الجديدة فقط"""
+        lines = [json.dumps(r, ensure_ascii=False) + "\n" for r in records]
+        if not lines:
+            return 0
+
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+                size = f.tell()
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+        return len(lines)
+
+    def _rotate(self):
+        """log -> log.1(.gz) -> log.2(.gz) ... وحذف الأقدم"""
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+
+        self._segment(self.backup_count).unlink(missing_ok=True)
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self._segment(i)
+            if src.exists():
+                os.replace(src, self._segment(i + 1))
+
+        if self.compress:
+            staged = self.path.with_name(self.path.name + ".rotating")
+            os.replace(self.path, staged)
+            with open(staged, "rb") as src, gzip.open(self._segment(1), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            staged.unlink()
+        else:
+            os.replace(self.path, self._segment(1))
+
+    def read(self) -> Iterator[dict]:
+        """قراءة كل السجلات من الأقدم للأحدث (الملفات المدوّرة ثم الحالي)"""
+        segments = [self._segment(i) for i in range(self.backup_count, 0, -1)]
+        for segment in segments + [self.path]:
+            if not segment.exists():
+                continue
+            opener = gzip.open if segment.suffix == ".gz" else open
+            with opener(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
@@ -2,23 +2,42 @@
 """
 🧠 Memory Manager - الذاكرة الذكية
 يحفظ التفضيلات والحقائق في knowledge_base.json
+الكتابة مؤجلة (Write-Behind): التعديلات تُجمع وتُكتب دفعة واحدة من Thread خلفي
 """
+import atexit
 import json
+import os
+import threading
 from pathlib import Path
 from typing import Any, Optional
 from datetime import datetime
 
 
 class MemoryManager:
-    def __init__(self, memory_file: str = "knowledge_base.json"):
+    def __init__(self, memory_file: str = "knowledge_base.json",
+                 flush_interval: float = 2.0, flush_every: int = 20):
         self.memory_file = Path(memory_file)
+        self.flush_interval = flush_interval  # أقصى تأخير للكتابة (ثوانٍ)
+        self.flush_every = flush_every        # أو بعد N تعديل
         self.data = {
             "preferences": {},
             "facts": [],
             "history": []
         }
+
+        # الـ AgentWorker و EventBus يعدلان الذاكرة من Threads مختلفة
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()  # كتابة واحدة للملف في كل مرة
+        self._dirty = 0                   # عدد التعديلات غير المحفوظة
+        self._wakeup = threading.Event()
+        self._closed = False
+
         self._load()
 
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
     def _load(self):
         """تحميل الذاكرة من الملف"""
         if self.memory_file.exists():
@@ -30,43 +49,94 @@ class MemoryManager:
                 print(f"⚠️ Failed to load memory: {e}")
 
     def _save(self):
-        """حفظ الذاكرة للملف"""
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        """تسجيل تعديل - الكتابة الفعلية يقوم بها الـ Flusher"""
+        with self._lock:
+            self._dirty += 1
+            if self._dirty >= self.flush_every:
+                self._wakeup.set()
+
+    # ===== الكتابة المؤجلة =====
+    
+    def flush(self):
+        """كتابة كل التعديلات المعلقة للملف الآن"""
+        with self._io_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # التسلسل داخل القفل سريع، والكتابة للقرص خارجه
+                payload = json.dumps(self.data, indent=2, ensure_ascii=False)
+                pending = self._dirty
+                self._dirty = 0
+
+            tmp_file = self.memory_file.with_name(self.memory_file.name + ".tmp")
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.memory_file)
+            except Exception as e:
+                # نعيد التعديلات للعداد حتى تُحاول الكتابة مرة أخرى
+                with self._lock:
+                    self._dirty += pending
+                print(f"⚠️ Failed to save memory: {e}")
+
+    def _flush_loop(self):
+        """Thread خلفي: يكتب كل flush_interval أو عند تجاوز flush_every"""
+        while not self._closed:
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """إيقاف الـ Flusher مع كتابة أخيرة (يُستدعى عند الإغلاق)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
 
     # ===== التفضيلات =====
     
     def set_preference(self, key: str, value: Any):
         """حفظ تفضيل"""
-        self.data["preferences"][key] = value
-        self._save()
+        with self._lock:
+            self.data["preferences"][key] = value
+            self._save()
         print(f"💾 Preference saved: {key} = {value}")
 
     def get_preference(self, key: str, default: Any = None) -> Any:
         """جلب تفضيل"""
-        return self.data["preferences"].get(key, default)
+        with self._lock:
+            return self.data["preferences"].get(key, default)
 
     # ===== الحقائق =====
     
     def store(self, fact: str):
         """حفظ حقيقة جديدة"""
-        if fact not in self.data["facts"]:
+        with self._lock:
+            if fact in self.data["facts"]:
+                return
             self.data["facts"].append(fact)
             self._save()
-            print(f"📝 Fact stored: {fact}")
+        print(f"📝 Fact stored: {fact}")
 
     def retrieve(self, query: str) -> list[str]:
         """البحث عن حقائق ذات صلة"""
         query_lower = query.lower()
+        with self._lock:
+            facts = list(self.data["facts"])
         results = [
-            fact for fact in self.data["facts"]
+            fact for fact in facts
             if any(word in fact.lower() for word in query_lower.split())
         ]
         return results
 
     def get_all_facts(self) -> list[str]:
         """جلب كل الحقائق"""
-        return self.data["facts"]
+        with self._lock:
+            return list(self.data["facts"])
 
     # ===== السجل =====
     
@@ -77,45 +147,52 @@ class MemoryManager:
             "action": action,
             "details": details or {}
         }
-        self.data["history"].append(entry)
-        
-        # الاحتفاظ بآخر 100 عملية فقط
-        if len(self.data["history"]) > 100:
-            self.data["history"] = self.data["history"][-100:]
-        
-        self._save()
+        with self._lock:
+            self.data["history"].append(entry)
+
+            # الاحتفاظ بآخر 100 عملية فقط
+            if len(self.data["history"]) > 100:
+                self.data["history"] = self.data["history"][-100:]
+
+            self._save()
 
     # ===== السياق للـ LLM =====
     
     def get_context_for_llm(self, query: str = "") -> str:
         """تجهيز سياق للـ LLM"""
         context_parts = []
-        
+
+        with self._lock:
+            preferences = dict(self.data["preferences"])
+            recent = list(self.data["history"][-3:])
+
         # التفضيلات
-        if self.data["preferences"]:
-            prefs = ", ".join(f"{k}: {v}" for k, v in self.data["preferences"].items())
+        if preferences:
+            prefs = ", ".join(f"{k}: {v}" for k, v in preferences.items())
             context_parts.append(f"User preferences: {prefs}")
-        
+
         # الحقائق ذات الصلة
         if query:
             relevant = self.retrieve(query)
             if relevant:
                 context_parts.append(f"Relevant facts: {'; '.join(relevant)}")
-        
+
         # آخر 3 عمليات
-        recent = self.data["history"][-3:] if self.data["history"] else []
         if recent:
             actions = [h["action"] for h in recent]
             context_parts.append(f"Recent actions: {', '.join(actions)}")
-        
+
         return "\n".join(context_parts) if context_parts else ""
 
 
 # Singleton instance
 _memory: Optional[MemoryManager] = None
+_memory_lock = threading.Lock()
 
 def get_memory() -> MemoryManager:
     global _memory
     if _memory is None:
-        _memory = MemoryManager()
+        with _memory_lock:
+            if _memory is None:
+                _memory = MemoryManager()
     return _memory
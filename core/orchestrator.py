@@ -2,20 +2,38 @@
 """
 🎼 Orchestrator v5.0 - المنسق الرئيسي
 يدعم: LLM، تنفيذ، ذاكرة، أحداث، كود، GUI
+جلسات متعددة: process آمنة بين الـ Threads (حالة الطلب في Request لا في الـ Orchestrator)،
+و serve() تخدم عدة جلسات معاً من Thread Pool
 """
+import asyncio
+import contextvars
+import itertools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from core.execution_context import ExecutionContext
 from core.execution_plan import ExecutionPlan, ExecutionStep
 from core.execution_graph import ExecutionGraph
-from core.decision_engine import validate
+from core.decision_engine import optimize, validate
 from core.memory_manager import get_memory
-from core.event_bus import get_event_bus, Event
+from core.event_bus import get_event_bus, Event, EventBatch
+from core.async_event_bus import AsyncEventBus
+from core.rule_engine import RuleMatch, get_rule_engine
+from core.journal import get_journal
+from core.cancellation import CancellationToken, OperationCancelled, StepTimeout
+from core.tool_runner import get_tool_runner
+from core.action_registry import GRAPH, INLINE, get_registry
+from core.system_paths import get_system_paths
+from core.session import DEFAULT_SESSION, Session, SessionManager
+from watch.filters import get_default_filter
 from guard.policy import enforce
 from sandbox.python_executor import get_executor
-from sandbox.python_executor import get_executor
-from tools.search_tool import WebSearch
-from actions.smart_browser import SmartBrowser
+from tools.content_index import pause_indexing
+
+
+SESSION_WORKERS = 4  # طلبات تُعالج معاً عبر serve() (جلسات مختلفة)
 
 
 @dataclass
@@ -24,23 +42,46 @@ class ProcessResult:
     success: bool
     message: str
     steps_count: int = 0
+    messages: list = field(default_factory=list)  # سجل هذا الطلب فقط
+
+
+@dataclass
+class Request:
+    """حالة طلب واحد: الجلسة، توكن الإلغاء، والرسائل"""
+    session: Session
+    token: CancellationToken
+    messages: list = field(default_factory=list)
+
+
+# الطلب الحالي لـ _log (يُنسخ لـ asyncio.to_thread ولاستدعاءات الأدوات)
+_current_request: contextvars.ContextVar[Optional[Request]] = contextvars.ContextVar("request", default=None)
 
 
 class Orchestrator:
-    def __init__(self, context: ExecutionContext, planner=None):
-        self.context = context
+    def __init__(self, context: ExecutionContext, planner=None, session_workers: int = SESSION_WORKERS):
+        self.context = context  # سياق الجلسة الافتراضية (GUI / CLI)
+        self.sessions = SessionManager(context)
         self.planner = planner
         self.memory = get_memory()
         self.event_bus = get_event_bus()
         self.executor = get_executor()
-        self.search_tool = WebSearch()
-        self.browser = SmartBrowser()
+        self.registry = get_registry()  # الأدوات تُستورد وتُنشأ عند أول استخدام
+        self.rules = get_rule_engine()
+        self.journal = get_journal()  # استعادة معاملات لم تكتمل بسبب تعطل سابق
+        self.tools = get_tool_runner()
         self._event_listening = False
-        self._messages = []
+        self._command_ids = itertools.count(1)
+        # planner.concurrent = True: آمن من عدة Threads (شبكة)، وإلا طلب تخطيط واحد في كل مرة
+        self._plan_lock = threading.Lock()
+        self._session_workers = session_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
 
     def _log(self, msg: str):
-        """تسجيل رسالة"""
-        self._messages.append(msg)
+        """تسجيل رسالة (في سجل الطلب الحالي إن وجد)"""
+        request = _current_request.get()
+        if request is not None:
+            request.messages.append(msg)
         print(msg)
 
     def _get_plan(self, text: str) -> dict:
@@ -48,98 +89,165 @@ class Orchestrator:
         memory_context = self.memory.get_context_for_llm(text)
         
         if self.planner:
-            return self.planner.plan(text, memory_context)
+            if getattr(self.planner, "concurrent", False):
+                return self.planner.plan(text, memory_context)
+            with self._plan_lock:
+                return self.planner.plan(text, memory_context)
         else:
             from llm.llama_runner import plan_mock
             return plan_mock(text)
 
-    def process(self, text: str, mode: str = "user") -> ProcessResult:
-        # ... (logging code omitted for brevity)
-        self._messages = []
-        self._log(f"📝 معالجة: {text}")
-
-        # ... (memory and planning omitted)
+    async def _aget_plan(self, text: str) -> dict:
+        """جلب الخطة بدون حجز Thread أثناء انتظار الشبكة (إذا كان الـ planner يدعم aplan)"""
+        aplan = getattr(self.planner, "aplan", None)
+        if aplan is None:
+            return await asyncio.to_thread(self._get_plan, text)
         memory_context = self.memory.get_context_for_llm(text)
+        return await aplan(text, memory_context)
+
+    def process(self, text: str, mode: str = "user", token: Optional[CancellationToken] = None,
+                session_id: str = DEFAULT_SESSION) -> ProcessResult:
+        """معالجة طلب في جلسة: آمنة من عدة Threads، وطلبات الجلسة الواحدة بالترتيب"""
+        session, request = self._begin(session_id, token)
+        reset = _current_request.set(request)
         try:
-            raw = self._get_plan(text)
-        except Exception as e:
-            return ProcessResult(False, f"فشل التخطيط: {e}")
+            with session.lock:
+                # ... (logging code omitted for brevity)
+                self._log(f"📝 معالجة: {text}")
+
+                # فهرسة المحتوى في الخلفية تنتظر حتى ينتهي الأمر
+                with pause_indexing():
+                    try:
+                        raw = self._get_plan(text)
+                    except Exception as e:
+                        return self._finish(request, ProcessResult(False, f"فشل التخطيط: {e}"))
+
+                    return self._finish(request, self._execute_plan(text, mode, raw, request))
+        finally:
+            _current_request.reset(reset)
+            session.tokens.discard(request.token)
+
+    async def aprocess(self, text: str, mode: str = "user", token: Optional[CancellationToken] = None,
+                       session_id: str = DEFAULT_SESSION) -> ProcessResult:
+        """
+        نسخة asyncio من process: التخطيط ينتظر الشبكة، والتنفيذ (ملفات) في Thread.
+        إلغاء الـ coroutine (مثل مهلة AsyncEventBus) يلغي توكن الطلب، وقفل الجلسة لا يُحرر
+        قبل أن ينتهي الـ Thread الذي ما زال يستخدمه
+        """
+        session, request = self._begin(session_id, token)
+        reset = _current_request.set(request)
+        pending = None  # Thread ما زال يعمل (انتظار القفل أو التنفيذ)
+        held = False
+        try:
+            pending = asyncio.ensure_future(asyncio.to_thread(self._acquire_session, session, request.token))
+            held = await asyncio.shield(pending)  # بدون حجز الـ Event Loop
+            pending = None
+            if not held:
+                return self._finish(request, ProcessResult(False, "🛑 تم الإلغاء"))
+            self._log(f"📝 معالجة: {text}")
 
+            with pause_indexing():
+                try:
+                    raw = await self._aget_plan(text)
+                except Exception as e:
+                    return self._finish(request, ProcessResult(False, f"فشل التخطيط: {e}"))
+
+                pending = asyncio.ensure_future(
+                    asyncio.to_thread(self._execute_plan, text, mode, raw, request))
+                result = await asyncio.shield(pending)
+                pending = None
+                return self._finish(request, result)
+        except asyncio.CancelledError:
+            request.token.cancel("request cancelled")
+            raise
+        finally:
+            _current_request.reset(reset)
+
+            def release(future=None):
+                acquired = held
+                if future is not None and not held:
+                    # أُلغي أثناء انتظار القفل: ربما حصل عليه الـ Thread بعدها
+                    acquired = not future.cancelled() and future.exception() is None and future.result()
+                if acquired:
+                    session.lock.release()
+                session.tokens.discard(request.token)
+
+            if pending is not None and not pending.done():
+                pending.add_done_callback(release)
+            else:
+                release(pending)
+
+    @staticmethod
+    def _acquire_session(session: Session, token: CancellationToken) -> bool:
+        """انتظار قفل الجلسة مع فحص الإلغاء: طلب أُلغي لا يبقى Thread عالقاً على القفل"""
+        while not session.lock.acquire(timeout=0.05):
+            if token.cancelled:
+                return False
+        return True
+
+    def _begin(self, session_id: str, token: Optional[CancellationToken]) -> tuple[Session, Request]:
+        session = self.sessions.get(session_id)
+        request = Request(session, token or CancellationToken())
+        session.tokens.add(request.token)  # قبل انتظار القفل: الإلغاء يصل للطلب المنتظر أيضاً
+        session.requests += 1
+        return session, request
+
+    @staticmethod
+    def _finish(request: Request, result: ProcessResult) -> ProcessResult:
+        result.messages = request.messages
+        return result
+
+    def serve(self, text: str, session_id: str = DEFAULT_SESSION, mode: str = "user",
+              token: Optional[CancellationToken] = None) -> Future:
+        """process على Thread Pool مشترك: عدة جلسات (واجهات/عملاء API) تُخدم معاً - يرجع Future"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=max(1, self._session_workers),
+                                                thread_name_prefix="session")
+        return self._pool.submit(self.process, text, mode, token, session_id)
+
+    def cancel(self, reason: str = "cancelled by user", session_id: str = DEFAULT_SESSION) -> bool:
+        """إلغاء طلبات الجلسة من أي Thread (زر الإلغاء): الخطوات تتوقف ويتم التراجع"""
+        session = self.sessions.get(session_id, create=False)
+        if session is None or not session.cancel(reason):
+            return False
+        print(f"🛑 جاري إلغاء طلبات الجلسة {session_id}...")
+        return True
+
+    def close_session(self, session_id: str) -> bool:
+        return self.sessions.close(session_id)
+
+    def shutdown(self):
+        """إيقاف Thread Pool الجلسات (الطلبات المنتظرة تُلغى)"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _execute_plan(self, text: str, mode: str, raw: dict, request: Request) -> ProcessResult:
+        """تحويل الخطة الخام إلى خطوات وتنفيذها في سياق جلسة الطلب"""
+        session, token = request.session, request.token
+        context = session.context
+        if token.cancelled:
+            return ProcessResult(False, "🛑 تم الإلغاء")
         if not raw.get("steps"):
             return ProcessResult(True, "لا يوجد إجراءات مطلوبة")
 
         # 3. تحويل JSON → ExecutionPlan (مع تصحيح المسارات)
-        from core.system_paths import SystemPaths
-        sys_paths = SystemPaths()
-        
-        steps = []
-        special_results = []
-        
-        for s in raw["steps"]:
-            # معالجة خاصة للأدوات
-            if s["action"] in ["create_folder", "create_file", "write_text", "delete_folder", "delete_file"]:
-                # تصحيح المسار (Desktop -> OneDrive/Desktop)
-                raw_path = s["params"].get("name") or s["params"].get("file") or s["params"].get("path")
-                if raw_path:
-                    fixed_path = sys_paths.resolve_path(raw_path)
-                    # تحديث الباراميترات وتوحيد المفاتيح
-                    s["params"]["name"] = fixed_path  # Ensure 'name' exists for Validator/Actions
-                    
-                    if "file" in s["params"]: s["params"]["file"] = fixed_path
-                    if "path" in s["params"]: s["params"]["path"] = fixed_path
-                    
-                    self._log(f"🔄 Path Resolved: {raw_path} -> {fixed_path}")
-
-            if s["action"] == "run_python_code":
-                result = self.run_python_code(s["params"]["code"])
-                special_results.append(f"🐍 نتيجة Python: {result}")
-                continue
-            elif s["action"] == "save_memory":
-                self.save_to_memory(s["params"]["fact"])
-                special_results.append("💾 تم الحفظ في الذاكرة")
-                continue
-            elif s["action"] == "search_memory":
-                results = self.search_memory(s["params"]["query"])
-                special_results.append(f"🔍 نتائج البحث: {results}")
-                continue
-            elif s["action"] == "open_app":
-                from actions.app_launcher import AppLauncher
-                launcher = AppLauncher()
-                app_name = s["params"].get("app") or s["params"].get("app_name") or s["params"].get("path")
-                msg = launcher.open(app_name)
-                special_results.append(msg)
-                continue
-            elif s["action"] == "search_web":
-                msg = self.search_tool.search(query=s["params"]["query"])
-                special_results.append(f"🌍 Search Results:\n{msg}")
-                continue
-            elif s["action"] == "open_url":
-                url = s["params"].get("url")
-                msg = self.browser.open_url(url)
-                special_results.append(msg)
-                continue
-            elif s["action"] == "see_screen":
-                from core.vision_engine import VisionEngine
-                vision = VisionEngine()
-                msg = vision.see_screen()
-                special_results.append(f"👁️ Screen Content:\n{msg}")
-                continue
-            elif s["action"] == "open_program":
-                from actions.app_launcher import AppLauncher
-                launcher = AppLauncher()
-                msg = launcher.open_program(s["params"]["name"])
-                special_results.append(msg)
-                continue
-            
-            steps.append(ExecutionStep(s["action"], s["params"]))
-        
-        # ... (rest of function)
+        try:
+            steps, special_results = self._dispatch(raw["steps"], token)
+        except ValueError as e:
+            return ProcessResult(False, f"خطوة غير صالحة: {e}")
         
         if not steps and special_results:
             msg = "تم تنفيذ الأوامر الخاصة:\n" + "\n".join(special_results)
             return ProcessResult(True, msg)
         
-        plan = ExecutionPlan(steps)
+        # دمج/حذف الخطوات الزائدة (مسارات مطلقة من cwd الحالي)
+        plan, report = optimize(ExecutionPlan(steps), context.cwd)
+        if report["eliminated"]:
+            self._log(f"⚡ تحسين الخطة: {report['before']} → {report['after']} خطوات "
+                      f"(دمج {report['fused']}، تكرار {report['deduped']}، بلا أثر {report['noops']})")
         
         # 4. التحقق المنطقي
         try:
@@ -156,7 +264,7 @@ class Orchestrator:
             return ProcessResult(False, f"فشل الأمان: {e}")
         
         # 6. التنفيذ
-        graph = ExecutionGraph(plan, self.context)
+        graph = ExecutionGraph(plan, context, token=token, owner=session.id)
         success = graph.run()
         
         # 7. تسجيل في الذاكرة
@@ -166,22 +274,59 @@ class Orchestrator:
         )
         
         # 8. حفظ الذاكرة
-        self.context.save_memory()
+        session.save()
         
         # 9. بناء الرسالة النهائية
         if success:
             msg_parts = ["✅ تم التنفيذ بنجاح!"]
-            msg_parts.append(f"📁 المسار: {self.context.cwd}")
+            msg_parts.append(f"📁 المسار: {context.cwd}")
             if special_results:
                 msg_parts.extend(special_results)
             message = "\n".join(msg_parts)
+        elif isinstance(graph.error, StepTimeout):
+            message = f"⏱️ تجاوزت خطوة مهلتها وتم التراجع ({graph.error})"
+        elif isinstance(graph.error, OperationCancelled):
+            message = "🛑 تم الإلغاء وتم التراجع"
         else:
             message = "❌ فشل التنفيذ وتم التراجع"
         
-        return ProcessResult(success, message, len(steps))
+        return ProcessResult(success, message, len(plan.steps))
 
     # ===== أدوات للـ LLM =====
-    
+
+    def _dispatch(self, raw_steps: list,
+                  token: Optional[CancellationToken] = None) -> tuple[list[ExecutionStep], list]:
+        """
+        توزيع الخطوات عبر ActionRegistry (بحث O(1) بالاسم): باراميترات موحدة ومسارات محولة،
+        ثم graph -> ExecutionStep، inline -> تنفيذ فوري، tool -> ToolRunner (بالتوازي).
+        النتائج الخاصة بترتيب الخطة بعد tools.gather. باراميتر مطلوب ناقص -> ValueError
+        """
+        steps, special_results = [], []
+        for s in raw_steps:
+            action, params = s["action"], s.get("params") or {}
+            spec = self.registry.get(action)
+            if spec is None:
+                steps.append(ExecutionStep(action, params))  # يرفضها الفحص الأمني
+                continue
+            params = spec.normalize(params, self._resolve_path)
+            if spec.kind == GRAPH:
+                steps.append(ExecutionStep(action, params))
+            elif spec.kind == INLINE:
+                special_results.append(spec.run(self, params))
+            else:
+                # أدوات بطيئة (شبكة، شاشة، برامج): تعمل بالتوازي وتُجمع بترتيب الخطة
+                # copy_context: _log داخل الأداة يكتب في سجل هذا الطلب
+                special_results.append(self.tools.submit(
+                    action, contextvars.copy_context().run, spec.run, self, params))
+        return steps, self.tools.gather(special_results, token)
+
+    def _resolve_path(self, path: str) -> str:
+        """تصحيح المسار (Desktop -> OneDrive/Desktop)"""
+        fixed = get_system_paths().resolve_path(path)
+        if fixed != path:
+            self._log(f"🔄 Path Resolved: {path} -> {fixed}")
+        return fixed
+
     def run_python_code(self, code: str) -> str:
         self._log("🐍 تنفيذ كود Python...")
         result = self.executor.execute(code)
@@ -200,22 +345,115 @@ class Orchestrator:
         if self._event_listening:
             return
         
-        def on_event(event: Event):
-            if self._should_respond_to_event(event):
-                message = f"ملف {event.event_type}: {event.path}"
-                self.process(message, mode="event")
-        
-        self.event_bus.set_callback(on_event)
+        # طلب تخطيط واحد لكل دفعة أحداث بدلاً من طلب لكل ملف
+        self.event_bus.set_batch_callback(self.process_event_batch)
+        # أوامر المستخدم والمهام المجدولة تصل فردياً عبر مسارات الأولوية الأعلى
+        self.event_bus.set_callback(self._on_priority_event)
         self.event_bus.start()
         self._event_listening = True
 
+    def submit(self, text: str, lane: str = "interactive") -> str:
+        """إرسال أمر عبر الـ EventBus (لا ينتظر خلف أحداث الملفات)"""
+        return self.event_bus.push("command", f"{lane}-{next(self._command_ids)}", lane=lane, data=text)
+
+    def _on_priority_event(self, event: Event) -> Optional[ProcessResult]:
+        if event.event_type == "command" and event.data:
+            mode = "user" if event.lane == "interactive" else event.lane
+            return self.process(event.data, mode=mode)
+        return self.process_event_batch(EventBatch([event]))
+
+    def start_async_event_listener(self, bus: AsyncEventBus, loop=None):
+        """ربط الـ Orchestrator بـ AsyncEventBus (الدفعات تُعالج عبر aprocess)"""
+        if self._event_listening:
+            return
+
+        bus.set_batch_callback(self.aprocess_event_batch)
+        # الأوامر (submit) تصل فردياً عبر مسارات الأولوية كما في EventBus
+        bus.set_callback(self._on_priority_event)
+        bus.start(loop)
+        self.event_bus = bus
+        self._event_listening = True
+
+    def process_event_batch(self, batch: EventBatch) -> Optional[ProcessResult]:
+        """معالجة دفعة أحداث: القواعد المحلية أولاً، ثم طلب LLM واحد للباقي بملخص مختصر"""
+        events = self._unhandled_events(batch)
+        if not events:
+            return None
+        return self.process(self._event_batch_message(events), mode="event")
+
+    async def aprocess_event_batch(self, batch: EventBatch) -> Optional[ProcessResult]:
+        events = await asyncio.to_thread(self._unhandled_events, batch)
+        if not events:
+            return None
+        return await self.aprocess(self._event_batch_message(events), mode="event")
+
+    def _unhandled_events(self, batch: EventBatch) -> list[Event]:
+        """الأحداث التي تحتاج الـ LLM: بعد الفلترة وتطبيق القواعد المحلية (rules.json)"""
+        events = [e for e in batch.events if self._should_respond_to_event(e)]
+        if not events:
+            return []
+        matches, unmatched = self.rules.evaluate(events)
+        if matches:
+            self._apply_rules(matches)
+        return unmatched
+
+    def _apply_rules(self, matches: list[RuleMatch]):
+        raw_steps = []
+        for match in matches:
+            if match.action == "log":
+                message = match.params.get("message") or f"{match.event.event_type}: {match.event.path}"
+                self.context.log_event(f"📏 {match.rule.name}: {message}")
+            elif match.action != "ignore":
+                raw_steps.append({"action": match.action, "params": match.params})
+
+        if raw_steps:
+            try:
+                steps, results = self._dispatch(raw_steps)
+            except ValueError as e:
+                self._log(f"⚠️ القواعد المحلية مرفوضة: {e}")
+                return
+            for result in results:
+                self.context.log_event(f"📏 {result}")
+            success = True
+            if steps:
+                # القواعد تعمل في الجلسة الافتراضية: لا تغير cwd أثناء طلب جارٍ فيها
+                with self.sessions.default.lock:
+                    plan, _ = optimize(ExecutionPlan(steps), self.context.cwd)
+                    try:
+                        validate(plan)
+                        enforce(plan)
+                    except Exception as e:
+                        self._log(f"⚠️ القواعد المحلية مرفوضة: {e}")
+                        return
+                    success = ExecutionGraph(plan, self.context, owner="rules").run()
+            self.memory.log_action(
+                action="rules",
+                details={"rules": sorted({m.rule.name for m in matches}), "success": success}
+            )
+        self.sessions.default.save()
+
+    def _event_batch_message(self, events: list[Event]) -> str:
+        if len(events) == 1:
+            event = events[0]
+            return f"ملف {event.event_type}: {event.path}"
+        return self._summarize_events(EventBatch(events))
+
+    def _summarize_events(self, batch: EventBatch, max_names: int = 3) -> str:
+        """ملخص مضغوط: سطر لكل (مجلد، نوع حدث) مع أول بضعة أسماء"""
+        lines = [f"أحداث ملفات ({len(batch)}):"]
+        for (folder, event_type), events in batch.groups().items():
+            names = [os.path.basename(e.path) for e in events[:max_names]]
+            extra = f" (+{len(events) - max_names})" if len(events) > max_names else ""
+            lines.append(f"- {event_type} ×{len(events)} في {folder}: {', '.join(names)}{extra}")
+        return "\n".join(lines)
+
     def stop_event_listener(self):
         self.event_bus.stop()
         self._event_listening = False
 
     def _should_respond_to_event(self, event: Event) -> bool:
-        ignore = ['.tmp', '.swp', '.pyc', '__pycache__', 'memory_dump.json', 'knowledge_base.json']
-        return not any(p in event.path.lower() for p in ignore)
+        # نفس أنماط الـ watcher (لأحداث تصل من مصادر أخرى غير SystemMonitor)
+        return not get_default_filter().is_ignored(event.path)
 
 
 # للتوافق
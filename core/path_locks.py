@@ -0,0 +1,122 @@
+# core/path_locks.py
+"""
+🔐 Path Locks - أقفال على مستوى المسار بين الجلسات المتزامنة
+- الخطة تحجز كل مساراتها دفعة واحدة (الكل أو لا شيء): لا Deadlock بين خطتين
+- التعارض هرمي: قفل مجلد يمنع أي مسار داخله والعكس (نفس قاعدة الاعتماديات في ExecutionGraph)
+- مسار غير معروف (resources() = None) يحجز الجذر: حاجز كامل مثل ExecutionGraph
+- خطط على مسارات منفصلة تعمل معاً، والمتعارضة تنتظر بترتيب الوصول
+"""
+import itertools
+import os
+import threading
+import time
+from typing import Optional
+from core.cancellation import CancellationToken, OperationCancelled
+
+ROOT = ()  # مفتاح الجذر: يتعارض مع كل شيء
+
+
+def path_key(path) -> tuple:
+    """مفتاح مقارنة: أجزاء المسار المطلق (بدون تمييز حالة الأحرف على Windows)"""
+    return tuple(os.path.normcase(os.path.abspath(str(path))).split(os.sep))
+
+
+def _overlaps(a: tuple, b: tuple) -> bool:
+    return a[:len(b)] == b or b[:len(a)] == a
+
+
+class PathLease:
+    """مسارات محجوزة - release() أو with"""
+
+    def __init__(self, locks: "PathLocks", ticket: int, keys: list, owner: str):
+        self.locks = locks
+        self.ticket = ticket
+        self.keys = keys
+        self.owner = owner
+
+    def release(self):
+        self.locks._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class PathLocks:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._held: dict[int, PathLease] = {}
+        self._waiting: dict[int, list] = {}  # تذكرة -> مفاتيح (ترتيب الوصول: لا تجويع)
+        self._tickets = itertools.count(1)
+        self.stats = {"acquired": 0, "waited": 0}
+
+    def acquire(self, paths, owner: str = "", token: Optional[CancellationToken] = None,
+                timeout: Optional[float] = None) -> PathLease:
+        """
+        حجز paths (None = الجذر). ينتظر حتى لا يتعارض أي مسار مع المحجوز أو مع من سبقه في الطابور.
+        الإلغاء أثناء الانتظار -> OperationCancelled، وانتهاء timeout -> TimeoutError
+        """
+        keys = [ROOT] if paths is None else sorted({path_key(p) for p in paths})
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if token is not None:
+            token.on_cancel(lambda t: self._wake())
+
+        with self._cond:
+            ticket = next(self._tickets)
+            self._waiting[ticket] = keys
+            waited = False
+            try:
+                while self._blocked(ticket, keys):
+                    waited = True
+                    if token is not None and token.cancelled:
+                        raise OperationCancelled(token.reason)
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"path lock timed out: {owner}")
+                    # الإلغاء يوقظنا عبر on_cancel، ومهلة التوكن تُفحص عند موعدها
+                    waits = [w for w in (remaining, token and token.remaining()) if w is not None]
+                    self._cond.wait(min(waits) if waits else None)
+            finally:
+                del self._waiting[ticket]
+                if waited:
+                    self._cond.notify_all()  # من خلفنا في الطابور قد يكون غير متعارض الآن
+            lease = self._held[ticket] = PathLease(self, ticket, keys, owner)
+            self.stats["acquired"] += 1
+            self.stats["waited"] += waited
+            return lease
+
+    def _blocked(self, ticket: int, keys: list) -> bool:
+        for lease in self._held.values():
+            if any(_overlaps(a, b) for a in keys for b in lease.keys):
+                return True
+        for other, other_keys in self._waiting.items():
+            if other < ticket and any(_overlaps(a, b) for a in keys for b in other_keys):
+                return True
+        return False
+
+    def _release(self, lease: PathLease):
+        with self._cond:
+            if self._held.pop(lease.ticket, None) is not None:
+                self._cond.notify_all()
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def holders(self) -> list[str]:
+        with self._cond:
+            return [lease.owner for lease in self._held.values()]
+
+
+_path_locks: Optional[PathLocks] = None
+_path_locks_lock = threading.Lock()
+
+def get_path_locks() -> PathLocks:
+    global _path_locks
+    if _path_locks is None:
+        with _path_locks_lock:
+            if _path_locks is None:
+                _path_locks = PathLocks()
+    return _path_locks
@@ -0,0 +1,221 @@
+# core/rule_engine.py
+"""
+📏 Rule Engine - ردود فعل محلية على أحداث الملفات بدون LLM
+قواعد تصريحية في rules.json: نمط مسار (glob) + نوع الحدث + شروط الامتداد/الحجم
+ثم Action من ActionRegistry بباراميترات قالبية ({path} {name} {stem} {ext} {dir} {event} {date}).
+القواعد تُترجم لـ Regex مرة واحدة؛ أغلب الأحداث تُرفض بمطابقة واحدة مجمعة.
+"""
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from core.event_bus import Event
+from watch.filters import glob_to_regex
+
+# Actions مدمجة لا تمر عبر ExecutionGraph
+BUILTIN_ACTIONS = {"log", "ignore"}
+
+# باراميترات تحتوي مسارات: تُحول عبر SystemPaths بعد تعبئة القالب
+PATH_PARAMS = {"name", "file", "path", "folder", "src", "dest"}
+
+
+@dataclass
+class Rule:
+    name: str
+    pattern: str
+    action: str
+    params: dict = field(default_factory=dict)
+    events: Optional[frozenset] = None      # None = كل الأحداث
+    extensions: Optional[frozenset] = None  # ".pdf" بأحرف صغيرة
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    stop: bool = True                       # أول قاعدة مطابقة تنهي التقييم
+    regex: Optional[re.Pattern] = None
+
+    def matches(self, event: Event, path: str) -> bool:
+        if self.events is not None and event.event_type not in self.events:
+            return False
+        if self.extensions is not None and os.path.splitext(path)[1].lower() not in self.extensions:
+            return False
+        if not self.regex.fullmatch(path):
+            return False
+        if self.min_size is not None or self.max_size is not None:
+            try:
+                size = os.path.getsize(event.path)
+            except OSError:
+                return False
+            if self.min_size is not None and size < self.min_size:
+                return False
+            if self.max_size is not None and size > self.max_size:
+                return False
+        return True
+
+
+@dataclass
+class RuleMatch:
+    rule: Rule
+    event: Event
+    action: str
+    params: dict
+
+
+class _Template(dict):
+    """format_map: المفاتيح غير المعروفة تبقى كما هي"""
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def _normalize(path: str) -> str:
+    return path.replace("\\", "/")
+
+
+class RuleEngine:
+    def __init__(self, rules: Optional[list[Rule]] = None, path: Optional[str] = None,
+                 resolve_path=None):
+        self.path = path
+        self._resolve_path = resolve_path
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits: dict[str, int] = {}
+        self._set_rules(rules or [])
+
+    # ===== التحميل =====
+
+    @classmethod
+    def load(cls, path: str = "rules.json", resolve_path=None) -> "RuleEngine":
+        """تحميل القواعد (ملف غير موجود = بدون قواعد، والتعديلات تُقرأ تلقائياً)"""
+        engine = cls(path=path, resolve_path=resolve_path)
+        engine.reload_if_changed()
+        return engine
+
+    def reload_if_changed(self):
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+
+        rules = []
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                rules = [self._parse(r) for r in data.get("rules", []) if r.get("enabled", True)]
+                print(f"📏 Loaded {len(rules)} rules from {self.path}")
+            except Exception as e:
+                print(f"⚠️ Failed to load rules: {e}")
+                return  # نُبقي القواعد السابقة
+        self._set_rules(rules)
+
+    def _resolve(self, path: str) -> str:
+        if self._resolve_path is None:
+            from core.system_paths import get_system_paths
+            self._resolve_path = get_system_paths().resolve_path
+        return self._resolve_path(path)
+
+    def _parse(self, raw: dict) -> Rule:
+        from core.action_registry import GRAPH, get_registry
+        name = raw.get("name") or raw["path"]
+        action = raw["action"]
+        # خطوات ExecutionGraph فقط (تمر بـ enforce والـ Journal): الباراميترات تأتي من أسماء ملفات
+        # غير موثوقة، فلا أدوات مثل run_python_code / open_url / search_web
+        if action not in BUILTIN_ACTIONS and action not in get_registry().names(GRAPH):
+            raise ValueError(f"Rule '{name}': unknown action '{action}'")
+
+        events = raw.get("events")
+        if isinstance(events, str):
+            events = [events]
+        extensions = raw.get("extensions")
+        if extensions:
+            extensions = frozenset(e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions)
+
+        return Rule(
+            name=name,
+            pattern=raw["path"],
+            action=action,
+            params=raw.get("params", {}),
+            events=frozenset(events) if events else None,
+            extensions=extensions or None,
+            min_size=raw.get("min_size"),
+            max_size=raw.get("max_size"),
+            stop=not raw.get("continue", False),
+        )
+
+    def _set_rules(self, rules: list[Rule]):
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        parts = []
+        for rule in rules:
+            # "Downloads/*.pdf" -> المسار الحقيقي لمجلد التنزيلات (مثل OneDrive)
+            pattern = _normalize(rule.pattern)
+            head, sep, tail = pattern.partition("/")
+            if head and not os.path.isabs(pattern) and not any(c in head for c in "*?["):
+                pattern = _normalize(self._resolve(head)).rstrip("/") + sep + tail
+            rule.regex = re.compile(glob_to_regex(pattern), flags)
+            parts.append(f"(?:{rule.regex.pattern})")
+        with self._lock:
+            self.rules = rules
+            # رفض سريع: مطابقة واحدة لكل القواعد
+            self._any = re.compile("|".join(parts), flags) if parts else None
+            self.hits = {rule.name: self.hits.get(rule.name, 0) for rule in rules}
+
+    # ===== التقييم =====
+
+    def evaluate(self, events: list[Event]) -> tuple[list[RuleMatch], list[Event]]:
+        """(المطابقات، الأحداث التي لم تطابق أي قاعدة وتحتاج الـ LLM)"""
+        self.reload_if_changed()
+        with self._lock:
+            rules, any_rule = self.rules, self._any
+
+        matches, unmatched = [], []
+        for event in events:
+            path = _normalize(event.path)
+            matched = False
+            if any_rule is not None and any_rule.fullmatch(path):
+                for rule in rules:
+                    if rule.matches(event, path):
+                        try:
+                            params = self._render(rule, event)
+                        except (ValueError, IndexError, AttributeError, TypeError) as e:
+                            # قالب غير صالح ("{0}" أو "{" وحيدة): تتخطى هذه القاعدة فقط
+                            print(f"⚠️ Rule '{rule.name}': bad params template: {e}")
+                            continue
+                        matches.append(RuleMatch(rule, event, rule.action, params))
+                        self.hits[rule.name] += 1
+                        matched = True
+                        if rule.stop:
+                            break
+            if not matched:
+                unmatched.append(event)
+        return matches, unmatched
+
+    def _render(self, rule: Rule, event: Event) -> dict:
+        p = Path(event.path)
+        values = _Template(
+            path=event.path, name=p.name, stem=p.stem, ext=p.suffix, dir=str(p.parent),
+            event=event.event_type, date=datetime.now().strftime("%Y-%m-%d"),
+        )
+        params = {}
+        for key, value in rule.params.items():
+            if isinstance(value, str):
+                value = value.format_map(values)
+                if key in PATH_PARAMS:
+                    value = self._resolve(value)
+            params[key] = value
+        return params
+
+
+_rule_engine: Optional[RuleEngine] = None
+
+def get_rule_engine() -> RuleEngine:
+    global _rule_engine
+    if _rule_engine is None:
+        _rule_engine = RuleEngine.load()
+    return _rule_engine
@@ -0,0 +1,106 @@
+# core/session.py
+"""
+👥 Sessions - جلسة لكل واجهة أو عميل API على نفس الـ Orchestrator
+- ExecutionContext مستقل لكل جلسة (cwd، السجل، التقدم) وملف ذاكرة خاص بها
+- طلبات الجلسة الواحدة بالترتيب (cwd حالة تسلسلية)، والجلسات المختلفة بالتوازي
+- التعارض على الملفات بين الجلسات تحله PathLocks في ExecutionGraph
+- الجلسات الخاملة تُغلق بعد idle_timeout (بعد حفظ ذاكرتها)
+"""
+import os
+import re
+import threading
+import time
+from typing import Optional
+from core.execution_context import ExecutionContext
+
+DEFAULT_SESSION = "default"
+MAX_SESSIONS = 64
+IDLE_TIMEOUT = 3600.0
+
+
+class Session:
+    def __init__(self, session_id: str, context: ExecutionContext, memory_file: str = "memory_dump.jsonl"):
+        self.id = session_id
+        self.context = context
+        self.memory_file = memory_file
+        self.lock = threading.Lock()  # طلب واحد في كل مرة لكل جلسة
+        self.tokens = set()           # توكنات الطلبات الجارية والمنتظرة (cancel)
+        self.requests = 0
+        self.last_active = time.monotonic()
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.tokens)
+
+    def cancel(self, reason: str = "cancelled by user") -> bool:
+        """إلغاء كل طلبات الجلسة (الجاري والمنتظر)"""
+        return any([token.cancel(reason) for token in list(self.tokens)])
+
+    def save(self):
+        self.context.save_memory(self.memory_file)
+
+
+class SessionManager:
+    def __init__(self, default_context: ExecutionContext, memory_dir: str = ".",
+                 max_sessions: int = MAX_SESSIONS, idle_timeout: float = IDLE_TIMEOUT):
+        self.base_path = default_context.base_path
+        self.memory_dir = memory_dir
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.default = Session(DEFAULT_SESSION, default_context)
+        self._sessions: dict[str, Session] = {DEFAULT_SESSION: self.default}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str = DEFAULT_SESSION, create: bool = True) -> Optional[Session]:
+        """الجلسة بالاسم - تُنشأ عند أول طلب (cwd يبدأ من base_path)"""
+        expired = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if not create:
+                    return None
+                if len(self._sessions) >= self.max_sessions:
+                    expired = self._expire_locked(time.monotonic())
+                if len(self._sessions) >= self.max_sessions:
+                    raise RuntimeError(f"Too many sessions ({self.max_sessions})")
+                safe = re.sub(r"[^\w.-]", "_", session_id)[:64]
+                session = self._sessions[session_id] = Session(
+                    session_id, ExecutionContext(self.base_path),
+                    os.path.join(self.memory_dir, f"memory_dump.{safe}.jsonl"))
+            session.last_active = time.monotonic()
+        for old in expired:
+            old.save()
+        return session
+
+    def close(self, session_id: str) -> bool:
+        """إغلاق جلسة: إلغاء طلباتها وحفظ ذاكرتها (الجلسة الافتراضية لا تُغلق)"""
+        if session_id == DEFAULT_SESSION:
+            return False
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.cancel("session closed")
+        session.save()
+        return True
+
+    def expire_idle(self) -> list[str]:
+        with self._lock:
+            expired = self._expire_locked(time.monotonic())
+        for session in expired:
+            session.save()
+        return [session.id for session in expired]
+
+    def _expire_locked(self, now: float) -> list[Session]:
+        expired = [s for s in self._sessions.values()
+                   if s is not self.default and not s.busy and now - s.last_active >= self.idle_timeout]
+        for session in expired:
+            del self._sessions[session.id]
+        return expired
+
+    def ids(self) -> list[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
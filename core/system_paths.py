@@ -112,3 +112,13 @@ class SystemPaths:
             return user_path
             
         return str(self.home_dir / user_path)
+
+
+_system_paths = None
+
+def get_system_paths() -> SystemPaths:
+    """نسخة واحدة طويلة العمر (الكشف عن المجلدات وطباعتها مرة واحدة فقط)"""
+    global _system_paths
+    if _system_paths is None:
+        _system_paths = SystemPaths()
+    return _system_paths
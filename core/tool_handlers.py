@@ -0,0 +1,60 @@
+# core/tool_handlers.py
+"""
+🔌 Tool Handlers - تنفيذ الأدوات الخاصة المسجلة في action_registry
+كل دالة: (orchestrator, params موحدة ومساراتها محولة) -> رسالة النتيجة.
+الوحدات الثقيلة (wikipedia/yfinance، pyautogui، AppOpener، الفهارس) تُستورد هنا عند أول استدعاء.
+"""
+from core.action_registry import shared
+
+
+def search_web(orchestrator, params: dict) -> str:
+    msg = shared("tools.search_tool:WebSearch").search(query=params["query"])
+    return f"🌍 Search Results:\n{msg}"
+
+
+def open_url(orchestrator, params: dict) -> str:
+    return shared("actions.smart_browser:SmartBrowser").open_url(params["url"])
+
+
+def see_screen(orchestrator, params: dict) -> str:
+    msg = shared("core.vision_engine:VisionEngine").see_screen()
+    return f"👁️ Screen Content:\n{msg}"
+
+
+def open_program(orchestrator, params: dict) -> str:
+    return shared("actions.app_launcher:AppLauncher").open_program(params["name"])
+
+
+def run_python_code(orchestrator, params: dict) -> str:
+    result = orchestrator.run_python_code(params["code"])
+    return f"🐍 نتيجة Python: {result}"
+
+
+def find_file(orchestrator, params: dict) -> str:
+    from tools.file_index import get_file_index
+    index = get_file_index()
+    if not index.wait_ready(timeout=10):
+        orchestrator._log("⏳ فهرس الملفات ما زال قيد البناء - النتائج قد تكون ناقصة")
+    matches = index.find(params["query"], limit=int(params["limit"]), root=params.get("folder"))
+    if matches:
+        return "📂 ملفات مطابقة:\n" + "\n".join(matches)
+    return "📂 لم يتم العثور على ملفات مطابقة"
+
+
+def search_files(orchestrator, params: dict) -> str:
+    from tools.content_index import get_content_index
+    hits = get_content_index().search(params["query"], limit=int(params["limit"]), root=params.get("folder"))
+    if hits:
+        lines = [f"📄 {path}\n   {snippet}" for path, snippet in hits]
+        return "🔤 نتائج البحث في الملفات:\n" + "\n".join(lines)
+    return "🔤 لا توجد ملفات تحتوي على هذا النص"
+
+
+def save_memory(orchestrator, params: dict) -> str:
+    orchestrator.save_to_memory(params["fact"])
+    return "💾 تم الحفظ في الذاكرة"
+
+
+def search_memory(orchestrator, params: dict) -> str:
+    results = orchestrator.search_memory(params["query"])
+    return f"🔍 نتائج البحث: {results}"
@@ -0,0 +1,100 @@
+# core/tool_runner.py
+"""
+🧰 Tool Runner - تنفيذ الأدوات الخاصة (بحث، شاشة، متصفح، برامج، Python) بالتوازي
+- Thread Pool منفصل لكل أداة بحد أقصى للتوازي (أداة بطيئة لا تحجز مكان غيرها)
+- مهلة (deadline) لكل أداة تُحسب من لحظة الإرسال: الأداة المتأخرة تُعلَّم كمنتهية المهلة
+  ولا تؤخر جمع نتائج الباقي
+- النتائج تُجمع بترتيب الخطة، وإلغاء الخطة (CancellationToken) يوقف الانتظار فوراً
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor, TimeoutError, wait
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# أداة -> (أقصى عدد متوازٍ، المهلة بالثواني)
+TOOL_LIMITS = {
+    "search_web": (4, 15.0),
+    "open_url": (2, 10.0),
+    "see_screen": (1, 20.0),       # لقطة شاشة واحدة في كل مرة
+    "open_app": (2, 15.0),
+    "open_program": (2, 15.0),
+    "run_python_code": (2, 30.0),
+    "find_file": (4, 15.0),
+    "search_files": (4, 10.0),
+}
+DEFAULT_LIMIT = (2, 30.0)
+
+
+@dataclass
+class ToolCall:
+    tool: str
+    future: Future
+    deadline: float
+    timeout: float
+
+
+class ToolRunner:
+    def __init__(self, limits: Optional[dict] = None, default: tuple = DEFAULT_LIMIT):
+        self.limits = {**TOOL_LIMITS, **(limits or {})}
+        self.default = default
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "timeouts": 0, "errors": 0, "cancelled": 0}
+
+    def _pool(self, tool: str) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(tool)
+            if pool is None:
+                workers = self.limits.get(tool, self.default)[0]
+                pool = self._pools[tool] = ThreadPoolExecutor(
+                    max_workers=max(1, workers), thread_name_prefix=f"tool-{tool}")
+            return pool
+
+    def submit(self, tool: str, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> ToolCall:
+        """إرسال استدعاء أداة - يرجع فوراً"""
+        if timeout is None:
+            timeout = self.limits.get(tool, self.default)[1]
+        self.stats["submitted"] += 1
+        future = self._pool(tool).submit(fn, *args, **kwargs)
+        return ToolCall(tool, future, time.monotonic() + timeout, timeout)
+
+    def result(self, call: ToolCall, token=None):
+        """انتظار نتيجة استدعاء حتى مهلته أو إلغاء token؛ الفشل والمهلة يتحولان لرسالة بدل استثناء"""
+        if token is not None and not call.future.done():
+            wakeup = Future()
+            token.on_cancel(lambda t: wakeup.done() or wakeup.set_result(None))
+            wait([call.future, wakeup], timeout=max(0.0, call.deadline - time.monotonic()),
+                 return_when=FIRST_COMPLETED)
+            if not call.future.done() and token.cancelled:
+                call.future.cancel()
+                self.stats["cancelled"] += 1
+                return f"🛑 {call.tool}: أُلغي"
+        try:
+            return call.future.result(timeout=max(0.0, call.deadline - time.monotonic()))
+        except (TimeoutError, CancelledError):
+            call.future.cancel()  # لم تبدأ بعد (في الطابور): لا تبدأ أبداً
+            self.stats["timeouts"] += 1
+            return f"⏱️ {call.tool}: انتهت المهلة ({call.timeout:.0f} ث)"
+        except Exception as e:
+            self.stats["errors"] += 1
+            return f"⚠️ {call.tool} فشل: {e}"
+
+    def gather(self, items: list, token=None) -> list:
+        """قائمة بترتيب الخطة: ToolCall تُستبدل بنتيجتها، والقيم الأخرى تبقى كما هي"""
+        return [self.result(item, token) if isinstance(item, ToolCall) else item for item in items]
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_tool_runner: Optional[ToolRunner] = None
+
+def get_tool_runner() -> ToolRunner:
+    global _tool_runner
+    if _tool_runner is None:
+        _tool_runner = ToolRunner()
+    return _tool_runner
@@ -6,6 +6,12 @@ ALLOWED_ACTIONS = {
     "create_folder",
     "create_file",
     "write_text",
+    "create_folders",
+    "create_files",
+    "write_files",
+    "copy_file",
+    "copy_tree",
+    "move",
     "run_python_code",
     "save_memory",
     "search_memory",
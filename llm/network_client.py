@@ -3,11 +3,19 @@
 📡 Network Client
 عميل يتصل بالسيرفر بدلاً من تحميل الموديل مباشرة
 """
+import asyncio
 import json
 import urllib.request
 import urllib.error
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 class NetworkPlanner:
+    concurrent = True  # طلبات HTTP مستقلة: عدة جلسات تخطط معاً
+
     def __init__(self, port=5000):
         self.url = f"http://localhost:{port}/plan"
         print(f"📡 NetworkPlanner: Connected to brain on port {port}")
@@ -35,3 +43,24 @@ class NetworkPlanner:
         except Exception as e:
             print(f"⚠️ NetworkPlanner Error: {e}")
             return {"steps": []}
+
+    async def aplan(self, user_input: str, memory_context: str = "") -> dict:
+        """نسخة asyncio: عدة طلبات تخطيط تنتظر الشبكة معاً بدون Thread لكل طلب"""
+        if not aiohttp:
+            return await asyncio.to_thread(self.plan, user_input, memory_context)
+
+        data = {
+            "input": user_input,
+            "context": memory_context
+        }
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.url, json=data) as response:
+                    return json.loads(await response.text())
+        except aiohttp.ClientConnectionError:
+            print("⚠️ NetworkPlanner: Connection refused. Is server running?")
+            return {"steps": [], "error": "Connection refused"}
+        except Exception as e:
+            print(f"⚠️ NetworkPlanner Error: {e}")
+            return {"steps": []}
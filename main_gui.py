@@ -57,10 +57,10 @@ def main():
     from core.memory_manager import get_memory
     from llm.network_client import NetworkPlanner
     
-    from core.system_paths import SystemPaths
+    from core.system_paths import get_system_paths
     
     # 🔥 تفعيل البوصلة الذكية
-    sys_paths = SystemPaths()
+    sys_paths = get_system_paths()
     root_path = sys_paths.get_root_dir()
     
     print(f"⚠️ WARNING: Agent Root is USER HOME: {root_path}")
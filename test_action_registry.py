@@ -0,0 +1,56 @@
+# test_action_registry.py
+"""
+🧪 Action Registry - أسماء بديلة، مسارات محولة، باراميترات ناقصة، واستيراد الأدوات عند أول استخدام فقط
+"""
+import os
+import subprocess
+import sys
+from core.action_registry import GRAPH, TOOL, get_registry
+from core.execution_context import ExecutionContext
+
+
+def test_normalize_aliases_and_paths():
+    registry = get_registry()
+    spec = registry.get("write_text")
+    params = spec.normalize({"filename": "Desktop/a.txt", "content": "hi"}, lambda p: "/home/u/" + p)
+    assert params == {"file": "/home/u/Desktop/a.txt", "text": "hi"}
+
+    move = registry.get("move")
+    assert move.normalize({"source": "a", "to": "b"}) == {"src": "a", "dest": "b"}
+
+    find = registry.get("find_file")
+    assert find.kind == TOOL and find.normalize({"name": "report"}) == {"query": "report", "limit": 20}
+
+    try:
+        registry.get("search_web").normalize({"query": ""})
+        assert False, "missing query must fail"
+    except ValueError as e:
+        assert "query" in str(e)
+
+
+def test_create_maps_params_to_constructor():
+    ctx = ExecutionContext(os.getcwd())
+    spec = get_registry().get("write_text")
+    assert spec.kind == GRAPH
+    action = spec.create(ctx, {"name": "/tmp/x.txt", "text": "hello"})
+    assert str(action.path) == "/tmp/x.txt" and action.text == "hello"
+
+    copy = get_registry().get("copy_file").create(ctx, {"from": "/tmp/a", "destination": "/tmp/b"})
+    assert str(copy.src) == "/tmp/a" and str(copy.dest) == "/tmp/b"
+
+
+def test_tools_are_loaded_lazily():
+    code = ("import sys, core.orchestrator; "
+            "print(sorted(m for m in ('tools.search_tool', 'actions.smart_browser', 'actions.app_launcher', "
+            "'core.vision_engine', 'core.tool_handlers') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+if __name__ == "__main__":
+    test_normalize_aliases_and_paths()
+    test_create_maps_params_to_constructor()
+    test_tools_are_loaded_lazily()
+    print("✅ Action registry tests passed")
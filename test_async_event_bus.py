@@ -0,0 +1,148 @@
+# test_async_event_bus.py
+"""
+🧪 AsyncEventBus - نفس سلوك EventBus على asyncio: Debounce، الترتيب، المهلة، المسارات، والإيقاف
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from core.async_event_bus import AsyncEventBus
+from core.execution_context import ExecutionContext
+from core.memory_manager import MemoryManager
+
+
+def test_debounce_coalesces_with_one_timer_per_path():
+    bus = AsyncEventBus(debounce_seconds=0.1)
+    delivered = []
+    bus.set_callback(delivered.append)
+    bus.start()
+
+    for i in range(1000):
+        bus.push("created" if i == 0 else "modified", f"/storm/file_{i % 10}.txt")
+    time.sleep(0.05)
+    assert bus.get_metrics()["debouncing"] == 10  # TimerHandle واحد لكل مسار
+    time.sleep(0.4)
+    metrics = bus.get_metrics()
+    bus.stop()
+
+    assert sorted(e.path for e in delivered) == sorted(f"/storm/file_{i}.txt" for i in range(10))
+    assert all(e.event_type == "modified" for e in delivered)  # آخر حدث للمسار
+    assert metrics["delivered"] == 10 and metrics["debouncing"] == 0
+
+
+def test_same_path_keeps_order():
+    bus = AsyncEventBus(debounce_seconds=0.01, suppress_seconds=0, max_concurrency=4)
+    seen = []
+
+    async def on_event(event):
+        # الأول أبطأ: لو لم تُسلسل المهام لسبقه التالي
+        await asyncio.sleep(0.1 if not seen and event.event_type == "created" else 0.01)
+        seen.append(event.timestamp)
+
+    bus.set_callback(on_event)
+    bus.start()
+    bus.push("created", "/ordered.txt")
+    for _ in range(4):
+        time.sleep(0.03)
+        bus.push("modified", "/ordered.txt")
+    time.sleep(0.5)
+    bus.stop()
+
+    assert len(seen) == 5 and seen == sorted(seen)
+
+
+def test_callback_timeout_does_not_block_other_paths():
+    bus = AsyncEventBus(debounce_seconds=0.01, suppress_seconds=0, callback_timeout=0.2)
+    delivered = []
+
+    async def on_event(event):
+        if event.path == "/slow.txt":
+            await asyncio.sleep(5)
+        delivered.append(event.path)
+
+    bus.set_callback(on_event)
+    bus.start()
+    bus.push("modified", "/slow.txt")
+    time.sleep(0.05)
+    for i in range(5):
+        bus.push("created", f"/fast_{i}.txt")
+    time.sleep(0.4)
+    metrics = bus.get_metrics()
+    bus.stop()
+
+    assert sorted(delivered) == [f"/fast_{i}.txt" for i in range(5)]
+    assert metrics["callback_timeouts"] == 1 and metrics["callbacks_pending"] == 0
+
+
+def test_stop_drains_pending_events():
+    bus = AsyncEventBus(debounce_seconds=10.0)
+    delivered = []
+    batches = []
+
+    async def on_event(event):
+        await asyncio.sleep(0.1)
+        delivered.append(event.path)
+
+    bus.set_callback(on_event)
+    bus.start()
+    for i in range(3):
+        bus.push("modified", f"/pending_{i}.txt")
+    time.sleep(0.05)
+    start = time.perf_counter()
+    bus.stop()
+
+    # لم ننتظر نافذة الـ Debounce، لكن كل callback انتهى قبل أن تعود stop()
+    assert time.perf_counter() - start < 2
+    assert sorted(delivered) == [f"/pending_{i}.txt" for i in range(3)]
+    assert bus.push("modified", "/late.txt") == "dropped"
+
+    bus = AsyncEventBus(debounce_seconds=10.0)
+    bus.set_batch_callback(batches.append, window=10.0)
+    bus.start()
+    for i in range(5):
+        bus.push("created", f"/batch/{i}.txt")
+    time.sleep(0.05)
+    bus.stop()
+    assert len(batches) == 1 and len(batches[0]) == 5
+
+
+def test_orchestrator_submit_uses_async_bus_lanes():
+    from core.orchestrator import Orchestrator
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = Orchestrator(ExecutionContext(tmp), session_workers=1)
+        orchestrator.memory = MemoryManager(os.path.join(tmp, "knowledge_base.json"))
+        received = []
+        done = threading.Event()
+
+        def process(text, mode="user"):
+            received.append((text, mode))
+            done.set()
+
+        orchestrator.process = process
+        bus = AsyncEventBus(debounce_seconds=5.0)
+        orchestrator.start_async_event_listener(bus)
+        try:
+            start = time.perf_counter()
+            assert orchestrator.submit("افتح المفكرة") == "enqueued"
+            # الأوامر لا تنتظر نافذة الـ Debounce ولا نافذة الدفعات
+            assert done.wait(2) and time.perf_counter() - start < 1
+            assert received == [("افتح المفكرة", "user")]
+            try:
+                bus.push("command", "x", lane="unknown")
+                assert False, "expected unknown lane"
+            except ValueError:
+                pass
+        finally:
+            orchestrator.stop_event_listener()
+            orchestrator.shutdown()
+            orchestrator.memory.close()
+
+
+if __name__ == "__main__":
+    test_debounce_coalesces_with_one_timer_per_path()
+    test_same_path_keeps_order()
+    test_callback_timeout_does_not_block_other_paths()
+    test_stop_drains_pending_events()
+    test_orchestrator_submit_uses_async_bus_lanes()
+    print("✅ AsyncEventBus tests passed")
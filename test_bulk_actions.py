@@ -0,0 +1,149 @@
+# test_bulk_actions.py
+"""
+🧪 Bulk Actions - create_folders / create_files / write_files بخطوة واحدة وسجل Rollback واحد
+"""
+import os
+import tempfile
+import time
+from actions.file_ops import WriteFilesAction, expand_pattern
+from core.execution_context import ExecutionContext
+from core.execution_graph import ExecutionGraph
+from core.execution_plan import ExecutionPlan, ExecutionStep
+from core.journal import Journal
+
+
+def _run(tmp, *steps):
+    graph = ExecutionGraph(ExecutionPlan([ExecutionStep(a, p) for a, p in steps]),
+                           ExecutionContext(tmp), journal=Journal(os.path.join(tmp, ".journal")))
+    return graph.run(), graph
+
+
+def test_expand_pattern():
+    assert expand_pattern("day{1..3}") == ["day1", "day2", "day3"]
+    assert expand_pattern("{08..10}") == ["08", "09", "10"]
+    assert expand_pattern("{0..10..5}") == ["0", "5", "10"]
+    assert expand_pattern("{2024,2025}/{1..2}") == ["2024/1", "2024/2", "2025/1", "2025/2"]
+    assert expand_pattern("report{final}.txt") == ["report{final}.txt"]
+    try:
+        expand_pattern("x{1..1000000}")
+        assert False, "expected limit"
+    except ValueError:
+        pass
+
+
+def test_bulk_create_and_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        work = os.path.join(tmp, "work")
+        os.makedirs(os.path.join(work, "day2"))
+        ok, graph = _run(
+            tmp,
+            ("create_folders", {"folder": work, "names": "day{1..50}"}),
+            ("create_folders", {"folder": work, "names": ["{2024,2025}/{01..12}"]}),
+            ("create_files", {"folder": os.path.join(work, "day1"), "names": "note_{1..5}.txt", "content": "hi"}),
+            ("write_files", {"folder": work, "files": {"a.txt": "A", "day3/b.txt": "B"}}),
+        )
+        assert ok and len(graph.history) == 4
+        assert len([n for n in os.listdir(work) if n.startswith("day")]) == 50
+        assert len(os.listdir(os.path.join(work, "2025"))) == 12
+        with open(os.path.join(work, "day1", "note_5.txt"), encoding="utf-8") as f:
+            assert f.read() == "hi"
+        with open(os.path.join(work, "day3", "b.txt"), encoding="utf-8") as f:
+            assert f.read() == "B"
+        assert not [n for n in os.listdir(work) if n.endswith((".tmp", ".jbak"))]
+
+
+def test_bulk_rollback_is_single_record():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "keep.txt"), "w", encoding="utf-8") as f:
+            f.write("original")
+        ok, graph = _run(
+            tmp,
+            ("create_folders", {"folder": os.path.join(tmp, "new"), "names": "d{1..20}"}),
+            ("write_files", {"folder": tmp, "files": [{"name": "keep.txt", "text": "changed"},
+                                                      {"name": "fresh.txt", "text": "x"}]}),
+            ("write_text", {"file": os.path.join(tmp, "missing", "x.txt"), "text": "boom"}),  # يفشل
+        )
+        assert not ok
+        assert sorted(os.listdir(tmp)) == [".journal", "keep.txt"]
+        with open(os.path.join(tmp, "keep.txt"), encoding="utf-8") as f:
+            assert f.read() == "original"
+
+
+def test_bulk_is_faster_than_single_steps():
+    with tempfile.TemporaryDirectory() as tmp:
+        single = os.path.join(tmp, "single")
+        start = time.perf_counter()
+        assert _run(tmp, *[("create_folder", {"name": os.path.join(single, f"day{i}")})
+                           for i in range(1, 201)])[0]
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        assert _run(tmp, ("create_folders", {"folder": os.path.join(tmp, "bulk"), "names": "day{1..200}"}))[0]
+        bulk_time = time.perf_counter() - start
+        print(f"200 folders: single steps {single_time * 1000:.1f} ms, bulk {bulk_time * 1000:.1f} ms")
+        assert bulk_time < single_time
+
+
+def test_bulk_files_create_missing_folders():
+    with tempfile.TemporaryDirectory() as tmp:
+        notes = os.path.join(tmp, "new", "notes")
+        docs = os.path.join(tmp, "docs")
+        ok, _ = _run(
+            tmp,
+            ("create_files", {"folder": notes, "names": ["a.txt", "sub/deep/b.txt"], "content": "x"}),
+            ("write_files", {"folder": docs, "files": {"readme.txt": "R", "sub/x.txt": "X"}}),
+        )
+        assert ok
+        assert os.path.isfile(os.path.join(notes, "sub", "deep", "b.txt"))
+        with open(os.path.join(docs, "sub", "x.txt"), encoding="utf-8") as f:
+            assert f.read() == "X"
+
+        # التراجع يحذف المجلدات التي أُنشئت أيضاً
+        ok, _ = _run(
+            tmp,
+            ("create_files", {"folder": os.path.join(tmp, "gone"), "names": "sub/f{1..3}.txt"}),
+            ("write_files", {"folder": docs, "files": {"other/y.txt": "Y"}}),
+            ("write_text", {"file": os.path.join(tmp, "missing", "x.txt"), "text": "boom"}),  # يفشل
+        )
+        assert not ok
+        assert not os.path.exists(os.path.join(tmp, "gone"))
+        assert sorted(os.listdir(docs)) == ["readme.txt", "sub"]
+
+
+def test_large_bulk_plan_schedules_in_linear_time():
+    with tempfile.TemporaryDirectory() as tmp:
+        steps = [("create_files", {"folder": os.path.join(tmp, f"big{i}"), "names": f"f_{{1..10000}}.txt"})
+                 for i in range(2)]
+        graph = ExecutionGraph(ExecutionPlan([ExecutionStep(a, p) for a, p in steps]),
+                               ExecutionContext(tmp), journal=Journal(os.path.join(tmp, ".journal")))
+        actions = graph._build_actions()
+        start = time.perf_counter()
+        graph._dependencies(actions)
+        assert time.perf_counter() - start < 0.5
+
+        start = time.perf_counter()
+        ok, _ = _run(tmp, *steps)
+        assert ok and len(os.listdir(os.path.join(tmp, "big1"))) == 10000
+        assert time.perf_counter() - start < 10
+
+
+def test_write_files_rejects_entries_without_name():
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [{"name": "a.txt", "text": "A"}, {"text": "no name"}]
+        try:
+            WriteFilesAction(ExecutionContext(tmp), files, tmp)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            assert "without a name" in str(e)
+        assert not _run(tmp, ("write_files", {"folder": tmp, "files": files}))[0]
+        assert os.listdir(tmp) == []
+
+
+if __name__ == "__main__":
+    test_expand_pattern()
+    test_bulk_create_and_write()
+    test_bulk_rollback_is_single_record()
+    test_bulk_is_faster_than_single_steps()
+    test_bulk_files_create_missing_folders()
+    test_large_bulk_plan_schedules_in_linear_time()
+    test_write_files_rejects_entries_without_name()
@@ -0,0 +1,141 @@
+# test_cancellation.py
+"""
+🧪 Cancellation - مهلة لكل خطوة، إلغاء الخطة من Thread آخر، والتراجع العكسي بعدهما
+"""
+import os
+import tempfile
+import threading
+import time
+import core.execution_graph as execution_graph
+from core.base_action import BaseAction
+from core.cancellation import CancellationToken, OperationCancelled, StepTimeout
+from core.execution_context import ExecutionContext
+from core.execution_graph import ExecutionGraph
+from core.execution_plan import ExecutionPlan, ExecutionStep
+from core.journal import Journal
+from core.tool_runner import ToolRunner
+
+
+class WaitAction(BaseAction):
+    """cooperative: ينتظر التوكن. hang: يتجاهله (Popen أو قرص شبكة معلق)"""
+    release = threading.Event()
+    log = []
+
+    def __init__(self, context, path, seconds=5.0, hang=False):
+        super().__init__(context)
+        self.path = context.cwd / path
+        self.seconds = seconds
+        self.hang = hang
+
+    def execute(self, token=None):
+        if self.hang:
+            self.release.wait(self.seconds)
+        elif token.wait(self.seconds):
+            token.raise_if_cancelled()
+        self.log.append(("done", self.path.name))
+
+    def rollback(self):
+        self.log.append(("undo", self.path.name))
+
+
+class WaitGraph(ExecutionGraph):
+    def _create_action(self, step):
+        if step.action == "wait":
+            action = WaitAction(self.ctx, **{k: v for k, v in step.params.items() if k != "timeout"})
+            if "timeout" in step.params:
+                action.timeout = step.params["timeout"]
+            return action
+        return super()._create_action(step)
+
+
+def _graph(tmp, steps, **kwargs):
+    plan = ExecutionPlan([ExecutionStep(a, p) for a, p in steps])
+    return WaitGraph(plan, ExecutionContext(tmp), journal=Journal(os.path.join(tmp, ".journal")), **kwargs)
+
+
+def test_hung_step_times_out_and_rolls_back():
+    grace = execution_graph.CANCEL_GRACE
+    execution_graph.CANCEL_GRACE = 0.2
+    WaitAction.log = []
+    WaitAction.release.clear()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            graph = _graph(tmp, [
+                ("create_folder", {"name": os.path.join(tmp, "out")}),
+                ("wait", {"path": "a", "seconds": 0.05}),          # نسبي: داخل out (cwd)
+                ("wait", {"path": "b", "seconds": 30, "hang": True, "timeout": 0.3}),
+                ("create_file", {"name": os.path.join(tmp, "out", "b", "never.txt")}),
+            ])
+            start = time.perf_counter()
+            assert not graph.run()
+            elapsed = time.perf_counter() - start
+
+            assert 0.3 <= elapsed < 2, elapsed
+            assert isinstance(graph.error, StepTimeout) and "wait" in str(graph.error)
+            assert [a.path.name for a in graph.abandoned] == ["b"]
+            assert WaitAction.log == [("done", "a"), ("undo", "a")]
+            assert not os.path.exists(os.path.join(tmp, "out"))
+    finally:
+        WaitAction.release.set()
+        execution_graph.CANCEL_GRACE = grace
+
+
+def test_cancel_from_another_thread():
+    WaitAction.log = []
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, "keep.txt")
+        with open(target, "w", encoding="utf-8") as f:
+            f.write("original")
+
+        def stream():
+            while True:
+                yield "x" * 1024
+                time.sleep(0.001)
+
+        token = CancellationToken()
+        graph = _graph(tmp, [
+            ("create_folder", {"name": os.path.join(tmp, "made")}),
+            ("wait", {"path": "w", "seconds": 30}),
+            ("write_text", {"file": target, "text": stream()}),
+        ], token=token)
+        threading.Timer(0.2, token.cancel, args=("user pressed stop",)).start()
+
+        start = time.perf_counter()
+        assert not graph.run()
+        assert time.perf_counter() - start < 1.5
+        assert isinstance(graph.error, OperationCancelled) and not isinstance(graph.error, StepTimeout)
+        assert "user pressed stop" in str(graph.error) and graph.abandoned == []
+
+        with open(target, encoding="utf-8") as f:
+            assert f.read() == "original"
+        assert sorted(os.listdir(tmp)) == [".journal", "keep.txt"]  # لا مؤقتات ولا نسخ احتياطية ولا made
+        assert os.listdir(os.path.join(tmp, ".journal")) == []
+
+
+def test_cancelled_before_start_runs_nothing():
+    WaitAction.log = []
+    with tempfile.TemporaryDirectory() as tmp:
+        token = CancellationToken()
+        token.cancel()
+        graph = _graph(tmp, [("wait", {"path": "a", "seconds": 0})], token=token)
+        assert not graph.run() and WaitAction.log == []
+
+
+def test_tool_gather_stops_on_cancel():
+    runner = ToolRunner(limits={"slow": (2, 10.0)})
+    token = CancellationToken()
+    items = [runner.submit("slow", time.sleep, 2), runner.submit("slow", lambda: "fast")]
+    threading.Timer(0.1, token.cancel).start()
+    start = time.perf_counter()
+    results = runner.gather(items, token)
+    assert time.perf_counter() - start < 1
+    assert results[0].startswith("🛑") and results[1] == "fast"
+    runner.shutdown()
+
+
+if __name__ == "__main__":
+    test_hung_step_times_out_and_rolls_back()
+    test_cancel_from_another_thread()
+    test_cancelled_before_start_runs_nothing()
+    test_tool_gather_stops_on_cancel()
+    print("✅ Cancellation tests passed")
@@ -0,0 +1,162 @@
+# test_content_index.py
+"""
+🧪 ContentIndex - بحث داخل الملفات مع تحديث تزايدي من أحداث الـ watcher
+"""
+import functools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+import tools.content_index as content_index
+import tools.file_index as file_index
+from core.tool_handlers import search_files
+from tools.content_index import ContentIndex, pause_indexing
+
+
+class FakeMonitor:
+    """بديل SystemMonitor: add_listener ثم emit كما يفعل Thread الـ watchdog"""
+
+    def __init__(self):
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, *args):
+        for listener in self.listeners:
+            listener(*args)
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_incremental_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = os.path.join(tmp, "Documents")
+        _write(os.path.join(docs, "meeting.txt"), "Budget review moved to Thursday")
+        _write(os.path.join(docs, "ملاحظات.md"), "اجتماع الميزانية يوم الخميس")
+        _write(os.path.join(docs, "__pycache__", "x.py"), "budget")   # مستبعد
+        with open(os.path.join(docs, "photo.txt"), "wb") as f:
+            f.write(b"\x89PNG\x00\x00budget")                           # ثنائي
+
+        index = ContentIndex(db_path=os.path.join(tmp, "content.db"), max_file_size=1024)
+        index.index_tree([docs])
+        assert index.wait_idle(timeout=10)
+
+        assert [os.path.basename(p) for p, _ in index.search("budget")] == ["meeting.txt"]
+        assert [os.path.basename(p) for p, _ in index.search("الميزانية")] == ["ملاحظات.md"]
+        assert index.search("budg thurs")  # كل كلمة مطلوبة مع مطابقة البادئة
+        assert len(index.search('budg"et (')) == 1  # رموز FTS5 في نص المستخدم لا تكسر الاستعلام
+
+        # تعديل وحذف عبر أحداث SystemMonitor
+        meeting = os.path.join(docs, "meeting.txt")
+        _write(meeting, "Cancelled")
+        index.on_fs_event("modified", meeting)
+        os.remove(os.path.join(docs, "ملاحظات.md"))
+        index.on_fs_event("deleted", os.path.join(docs, "ملاحظات.md"))
+        assert index.wait_idle(timeout=10)
+        assert index.search("budget") == [] and index.search("الميزانية") == []
+        assert index.search("cancelled")[0][0] == meeting
+
+        # ملف لم يتغير لا يُعاد قراءته
+        indexed = index.get_stats()["indexed"]
+        index.index_tree([docs])
+        assert index.wait_idle(timeout=10)
+        stats = index.get_stats()
+        assert stats["indexed"] == indexed and stats["binary"] >= 1
+        index.close()
+
+
+def test_pause_indexing():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ContentIndex(db_path=os.path.join(tmp, "content.db"))
+        path = os.path.join(tmp, "a.txt")
+        _write(path, "hello")
+        with pause_indexing():
+            index.on_fs_event("created", path)
+            assert not index.wait_idle(timeout=0.3)
+        assert index.wait_idle(timeout=10)
+        assert index.search("hello")
+        index.close()
+
+
+def test_created_directory_is_crawled_by_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, "archive")
+        for i in range(20):
+            _write(os.path.join(archive, f"sub{i % 4}", f"note{i}.txt"), f"invoice number {i}")
+        index = ContentIndex(db_path=os.path.join(tmp, "content.db"))
+        crawled_on = []
+        crawl = index._crawl
+        index._crawl = lambda *a, **k: crawled_on.append(threading.current_thread()) or crawl(*a, **k)
+
+        # Thread الـ watchdog لا يمشي الشجرة بنفسه
+        index.on_fs_event("created", archive, is_directory=True)
+        assert index.wait_idle(timeout=10)
+        assert crawled_on and threading.current_thread() not in crawled_on
+        assert len(index.search("invoice", limit=50)) == 20
+
+        # حُذف المجلد ثم أُنشئ من جديد قبل المعالجة: المسح يحذف أيضاً ما اختفى
+        with pause_indexing():
+            os.remove(os.path.join(archive, "sub0", "note0.txt"))
+            index.on_fs_event("deleted", archive, is_directory=True)
+            index.on_fs_event("created", archive, is_directory=True)
+        assert index.wait_idle(timeout=10)
+        assert len(index.search("invoice", limit=50)) == 19
+        index.close()
+
+
+def test_shared_index_follows_monitor_events():
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = os.path.join(tmp, "Documents")
+        _write(os.path.join(docs, "old.txt"), "quarterly forecast")
+        monitors = {}
+        saved = (file_index.default_roots, file_index._root_monitor,
+                 content_index.ContentIndex, content_index._content_index)
+        file_index.default_roots = lambda: [Path(docs)]
+        file_index._root_monitor = lambda root: monitors.setdefault(root, FakeMonitor())
+        content_index.ContentIndex = functools.partial(ContentIndex, db_path=os.path.join(tmp, "content.db"))
+        content_index._content_index = None
+        try:
+            index = content_index.get_content_index()
+            assert list(monitors) == [docs]
+            deadline = time.monotonic() + 10
+            while not index.get_stats()["files"] and time.monotonic() < deadline:  # المسح الأولي في الخلفية
+                time.sleep(0.02)
+            assert "old.txt" in search_files(None, {"query": "forecast", "limit": 20})
+
+            new_file = os.path.join(docs, "new.md")
+            _write(new_file, "shipping manifest")
+            monitors[docs].emit("created", new_file, False)
+            assert index.wait_idle(timeout=10)
+            assert new_file in search_files(None, {"query": "manifest", "limit": 20})
+
+            os.remove(new_file)
+            monitors[docs].emit("deleted", new_file, False)
+            assert index.wait_idle(timeout=10)
+            assert "لا توجد" in search_files(None, {"query": "manifest", "limit": 20})
+
+            # اتصالات القراءة لكل Thread تُغلق مع الفهرس
+            conns = list(index._reader_conns)
+            index.close()
+            assert conns and index._reader_conns == []
+            try:
+                conns[0].execute("SELECT 1")
+                assert False, "reader connection must be closed"
+            except sqlite3.ProgrammingError:
+                pass
+        finally:
+            (file_index.default_roots, file_index._root_monitor,
+             content_index.ContentIndex, content_index._content_index) = saved
+
+
+if __name__ == "__main__":
+    test_incremental_index()
+    test_pause_indexing()
+    test_created_directory_is_crawled_by_workers()
+    test_shared_index_follows_monitor_events()
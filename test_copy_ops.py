@@ -0,0 +1,128 @@
+# test_copy_ops.py
+"""
+🧪 Copy / Move - نسخ داخل النواة، rename على نفس القرص، تقدم للواجهة، وRollback
+"""
+import errno
+import os
+import tempfile
+from actions import copy_ops
+from core.execution_context import ExecutionContext
+from core.execution_graph import ExecutionGraph
+from core.execution_plan import ExecutionPlan, ExecutionStep
+from core.journal import Journal
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _run(tmp, ctx, *steps):
+    plan = ExecutionPlan([ExecutionStep(a, p) for a, p in steps])
+    return ExecutionGraph(plan, ctx, journal=Journal(os.path.join(tmp, ".journal"))).run()
+
+
+def test_copy_and_move_with_progress():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp)
+        messages = []
+        ctx.progress_callback = messages.append
+        big = os.urandom(3 * 1024 * 1024)
+        _write(os.path.join(tmp, "src", "big.bin"), big)
+        for i in range(200):
+            _write(os.path.join(tmp, "src", f"sub{i % 5}", f"f{i}.txt"), b"x" * i)
+        os.symlink("big.bin", os.path.join(tmp, "src", "link"))
+        os.makedirs(os.path.join(tmp, "backup"))
+
+        assert _run(tmp, ctx,
+                    ("copy_file", {"src": "src/big.bin", "dest": "backup"}),
+                    ("copy_tree", {"src": "src", "dest": "tree"}),
+                    ("move", {"src": "src/sub0", "dest": "moved"}))
+        assert _read(os.path.join(tmp, "backup", "big.bin")) == big
+        assert _read(os.path.join(tmp, "tree", "sub3", "f3.txt")) == b"xxx"
+        assert os.readlink(os.path.join(tmp, "tree", "link")) == "big.bin"
+        assert os.path.isdir(os.path.join(tmp, "moved")) and not os.path.exists(os.path.join(tmp, "src", "sub0"))
+        assert any("100%" in m for m in messages), messages
+        assert not [n for n in os.listdir(tmp) if n.endswith((".tmp", ".jbak"))]
+
+
+def test_rollback_and_cross_device_move():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp)
+        _write(os.path.join(tmp, "a.txt"), b"A")
+        _write(os.path.join(tmp, "b.txt"), b"old B")
+        _write(os.path.join(tmp, "docs", "n.txt"), b"N")
+
+        real_rename = os.rename
+
+        def exdev_rename(src, dest, *args, **kwargs):
+            if str(src).endswith("docs"):
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return real_rename(src, dest, *args, **kwargs)
+
+        calls = []
+        copy_file = copy_ops.copy_file
+        copy_ops.copy_file = lambda *a, **k: calls.append(a[0]) or copy_file(*a, **k)
+        os.rename = exdev_rename
+        try:
+            assert not _run(tmp, ctx,
+                            ("copy_file", {"src": "a.txt", "dest": "b.txt"}),     # يستبدل b.txt
+                            ("move", {"src": "docs", "dest": "archive"}),        # قرص "آخر": نسخ + حذف
+                            ("move", {"src": "a.txt", "dest": "c.txt"}),
+                            # يعتمد على الخطوتين السابقتين (archive و c.txt) ثم يفشل
+                            ("copy_file", {"src": "archive/missing.txt", "dest": "c.txt"}))
+        finally:
+            os.rename = real_rename
+            copy_ops.copy_file = copy_file
+        assert any(str(c).endswith("n.txt") for c in calls)  # docs نُسخ فعلاً (EXDEV)
+
+        assert sorted(os.listdir(tmp)) == [".journal", "a.txt", "b.txt", "docs"]
+        assert _read(os.path.join(tmp, "b.txt")) == b"old B"
+        assert _read(os.path.join(tmp, "docs", "n.txt")) == b"N"
+
+
+def test_copy_into_itself_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp)
+        _write(os.path.join(tmp, "A", "x.txt"), b"X")
+        os.makedirs(os.path.join(tmp, "A", "sub"))
+        for action, dest in (("copy_tree", "A/backup"), ("copy_tree", "A/sub"), ("move", "A/backup")):
+            graph = ExecutionGraph(ExecutionPlan([ExecutionStep(action, {"src": "A", "dest": dest})]),
+                                   ctx, journal=Journal(os.path.join(tmp, ".journal")))
+            assert not graph.run()
+            assert "into itself" in str(graph.error), graph.error
+        assert sorted(os.listdir(os.path.join(tmp, "A"))) == ["sub", "x.txt"]
+        assert os.listdir(os.path.join(tmp, "A", "sub")) == []
+
+        try:
+            copy_ops.copy_tree(os.path.join(tmp, "A"), os.path.join(tmp, "A", "sub", "deep"))
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_buffer_fallback():
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.urandom(2 * 1024 * 1024 + 7)
+        _write(os.path.join(tmp, "in.bin"), data)
+        saved = os.__dict__.pop("copy_file_range", None), os.__dict__.pop("sendfile", None)
+        try:
+            copy_ops.copy_file(os.path.join(tmp, "in.bin"), os.path.join(tmp, "out.bin"))
+        finally:
+            for name, fn in zip(("copy_file_range", "sendfile"), saved):
+                if fn is not None:
+                    setattr(os, name, fn)
+        assert _read(os.path.join(tmp, "out.bin")) == data
+
+
+if __name__ == "__main__":
+    test_copy_and_move_with_progress()
+    test_rollback_and_cross_device_move()
+    test_copy_into_itself_is_rejected()
+    test_buffer_fallback()
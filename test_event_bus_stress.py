@@ -0,0 +1,284 @@
+# test_event_bus_stress.py
+"""
+🧪 EventBus Stress Benchmark
+يدفع 100k حدث على 1000 مسار ويتأكد أن كل مسار سُلِّم مرة واحدة بعد هدوئه
+ويتأكد أن عدد الـ Threads والذاكرة ثابتة أثناء عاصفة من المسارات المختلفة
+"""
+import threading
+import time
+from collections import Counter
+from core.event_bus import BoundedEventQueue, Event, EventBus, ExpiringSet
+
+TOTAL_EVENTS = 100_000
+PATHS = 1_000
+DEBOUNCE = 0.2
+
+
+def test_event_bus_stress():
+    print(f"🧪 Pushing {TOTAL_EVENTS:,} events over {PATHS:,} paths (debounce={DEBOUNCE}s)...")
+    bus = EventBus(debounce_seconds=DEBOUNCE)
+    delivered = Counter()
+    done = threading.Event()
+
+    def on_event(event):
+        delivered[event.path] += 1
+        if len(delivered) == PATHS:
+            done.set()
+
+    bus.set_callback(on_event)
+    bus.start()
+
+    start = time.perf_counter()
+    for i in range(TOTAL_EVENTS):
+        bus.push("modified", f"/storm/file_{i % PATHS}.txt")
+    push_time = time.perf_counter() - start
+
+    finished = done.wait(timeout=30)
+    drain_time = time.perf_counter() - start
+    bus.stop()
+
+    print(f"📤 Push: {TOTAL_EVENTS / push_time:,.0f} events/sec")
+    print(f"📥 Drained in {drain_time:.2f}s ({TOTAL_EVENTS / drain_time:,.0f} events/sec)")
+    print(f"📊 Metrics: {bus.get_metrics()}")
+
+    assert finished, f"only {len(delivered)}/{PATHS} paths delivered"
+    assert set(delivered.values()) == {1}, "a path was delivered more than once"
+    # الحدث الأخير لكل مسار يُسلَّم بعد نافذة واحدة من نهاية الدفع تقريباً
+    assert drain_time < push_time + DEBOUNCE + 5
+
+
+def test_event_bus_quiet_window():
+    print("🧪 Checking that a busy path waits until it is quiet...")
+    bus = EventBus(debounce_seconds=DEBOUNCE)
+    delivered = []
+    bus.set_callback(lambda e: delivered.append((e, time.monotonic())))
+    bus.start()
+
+    last_push = None
+    for _ in range(10):
+        bus.push("modified", "/busy/file.txt")
+        last_push = time.monotonic()
+        time.sleep(DEBOUNCE / 4)
+
+    time.sleep(DEBOUNCE * 3)
+    bus.stop()
+
+    assert len(delivered) == 1
+    assert delivered[0][1] - last_push >= DEBOUNCE * 0.9
+
+
+def test_event_bus_suppression_is_bounded():
+    unique_paths = 20_000
+    print(f"🧪 Storm of {unique_paths:,} unique paths: threads and memory must stay bounded...")
+    bus = EventBus(debounce_seconds=0.05, callback_workers=0)
+    bus._processed.max_size = 5_000
+    delivered = []
+    peak_threads = 0
+    done = threading.Event()
+
+    def on_event(event):
+        nonlocal peak_threads
+        delivered.append(event.path)
+        peak_threads = max(peak_threads, threading.active_count())
+        if len(delivered) == unique_paths:
+            done.set()
+
+    bus.set_callback(on_event)
+    threads_before = threading.active_count()
+    bus.start()
+
+    for i in range(unique_paths):
+        bus.push("created", f"/storm/unique_{i}.txt")
+
+    assert done.wait(timeout=30), f"only {len(delivered)}/{unique_paths} delivered"
+    bus.stop()
+
+    print(f"🧵 Threads: before={threads_before} peak={peak_threads}")
+    print(f"🧠 Suppression set size: {len(bus._processed):,}")
+    # Thread الـ EventBus فقط، بدون Timer لكل حدث
+    assert peak_threads <= threads_before + 1
+    assert len(bus._processed) <= 5_000
+
+
+def test_event_bus_batches():
+    print("🧪 Unzipping 300 files into two folders should produce one batch...")
+    bus = EventBus(debounce_seconds=0.05)
+    batches = []
+    bus.set_batch_callback(batches.append, window=0.5)
+    bus.start()
+
+    for i in range(300):
+        folder = "/watched/archive" if i % 3 else "/watched/archive/images"
+        bus.push("created", f"{folder}/item_{i}.dat")
+
+    time.sleep(1.0)
+    bus.stop()
+
+    assert len(batches) == 1
+    groups = batches[0].groups()
+    assert len(batches[0]) == 300
+    assert {k: len(v) for k, v in groups.items()} == {
+        ("/watched/archive/images", "created"): 100,
+        ("/watched/archive", "created"): 200,
+    }
+
+
+def test_slow_callback_does_not_stall_bus():
+    print("🧪 A slow handler on one path must not block the others...")
+    bus = EventBus(debounce_seconds=0.05, suppress_seconds=0, callback_workers=4,
+                   callback_timeout=0.5)
+    delivered = []
+    lock = threading.Lock()
+
+    def on_event(event):
+        if event.path == "/slow.txt":
+            time.sleep(1.5)
+        with lock:
+            delivered.append((event.path, event.timestamp))
+
+    bus.set_callback(on_event)
+    bus.start()
+
+    bus.push("modified", "/slow.txt")
+    time.sleep(0.1)
+    for i in range(20):
+        bus.push("created", f"/fast_{i}.txt")
+    time.sleep(0.4)
+
+    with lock:
+        fast = [p for p, _ in delivered if p.startswith("/fast_")]
+    assert len(fast) == 20, "fast paths waited behind the slow handler"
+
+    time.sleep(0.5)
+    metrics = bus.get_metrics()
+    bus.stop()
+    print(f"📊 Metrics: {metrics}")
+    assert metrics["callback_timeouts"] == 1
+
+
+def test_same_path_keeps_order():
+    bus = EventBus(debounce_seconds=0.01, suppress_seconds=0, callback_workers=4)
+    seen = []
+
+    def on_event(event):
+        time.sleep(0.02)
+        seen.append(event.timestamp)
+
+    bus.set_callback(on_event)
+    bus.start()
+    for _ in range(5):
+        bus.push("modified", "/ordered.txt")
+        time.sleep(0.05)
+    time.sleep(0.5)
+    bus.stop()
+
+    assert len(seen) == 5 and seen == sorted(seen)
+
+
+def test_timed_out_callback_keeps_path_busy():
+    print("🧪 A timed-out handler must finish before the next event for its path starts...")
+    bus = EventBus(debounce_seconds=0.01, suppress_seconds=0, callback_workers=2,
+                   callback_timeout=0.2)
+    running, overlaps, seen = [], [], []
+    lock = threading.Lock()
+
+    def on_event(event):
+        with lock:
+            if event.path in running:
+                overlaps.append(event.path)
+            running.append(event.path)
+        time.sleep(0.6 if not seen else 0.01)
+        with lock:
+            seen.append(event.path)
+            running.remove(event.path)
+
+    bus.set_callback(on_event)
+    bus.start()
+    bus.push("modified", "/hung.txt")
+    time.sleep(0.1)
+    bus.push("modified", "/hung.txt")
+    time.sleep(0.3)  # تجاوز الأول المهلة لكنه ما زال يعمل
+    with lock:
+        assert seen == [] and running == ["/hung.txt"]
+    time.sleep(0.6)
+    metrics = bus.get_metrics()
+    bus.stop()
+
+    assert metrics["callback_timeouts"] == 1
+    assert seen == ["/hung.txt", "/hung.txt"] and overlaps == []
+
+
+def test_interactive_lane_skips_watcher_backlog():
+    print("🧪 A user command must not wait behind a backlog of file events...")
+    bus = EventBus(debounce_seconds=0.01, suppress_seconds=0, callback_workers=2)
+    started = {}
+
+    def on_event(event):
+        started[event.path] = time.time()
+        if event.lane == "watcher":
+            time.sleep(0.2)
+
+    bus.set_callback(on_event)
+    bus.start()
+
+    for i in range(50):
+        bus.push("modified", f"/build/out_{i}.o")
+    time.sleep(0.1)
+    pushed = time.time()
+    bus.push("command", "user-1", lane="interactive", data="افتح المفكرة")
+    time.sleep(0.3)
+    metrics = bus.get_metrics()
+    bus.stop()
+
+    print(f"📊 Lanes: { {k: v['wait_max'] for k, v in metrics['lanes'].items()} }")
+    assert "user-1" in started and started["user-1"] - pushed < 0.1
+    assert metrics["lanes"]["watcher"]["queue_depth"] + metrics["callbacks_pending"] > 0
+
+
+def test_bounded_queue_policies():
+    events = [Event("modified", f"/q/{i % 3}.txt", float(i)) for i in range(10)]
+
+    q = BoundedEventQueue(maxsize=4, policy="drop_oldest")
+    for e in events:
+        q.put(e)
+    assert q.qsize() == 4 and q.dropped == 6
+    assert [e.timestamp for e in q.get_many(10, 0)] == [6.0, 7.0, 8.0, 9.0]
+
+    q = BoundedEventQueue(maxsize=4, policy="coalesce")
+    for e in events:
+        q.put(e)
+    assert q.qsize() == 3 and q.coalesced == 7 and q.dropped == 0
+    # كل مسار يحتفظ بآخر حدث له وبمكانه الأصلي في الطابور
+    assert [(e.path, e.timestamp) for e in q.get_many(10, 0)] == [
+        ("/q/0.txt", 9.0), ("/q/1.txt", 7.0), ("/q/2.txt", 8.0)
+    ]
+
+    q = BoundedEventQueue(maxsize=2, policy="block", put_timeout=0.05)
+    statuses = [q.put(e) for e in events[:3]]
+    assert statuses == ["enqueued", "enqueued", "dropped"]
+
+
+def test_expiring_set_sweep():
+    s = ExpiringSet(ttl=5.0)
+    for i in range(1000):
+        s.add(f"p{i}", now=float(i) / 100)
+    s.add("p0", now=20.0)  # إعادة إضافة تمدد الصلاحية
+
+    assert s.contains("p999", now=10.0)
+    s.sweep(now=15.0)
+    assert len(s) == 1 and s.contains("p0", now=15.0)
+    s.sweep(now=30.0)
+    assert len(s) == 0
+
+
+if __name__ == "__main__":
+    test_event_bus_stress()
+    test_event_bus_quiet_window()
+    test_event_bus_suppression_is_bounded()
+    test_event_bus_batches()
+    test_slow_callback_does_not_stall_bus()
+    test_same_path_keeps_order()
+    test_timed_out_callback_keeps_path_busy()
+    test_interactive_lane_skips_watcher_backlog()
+    test_bounded_queue_policies()
+    test_expiring_set_sweep()
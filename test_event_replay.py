@@ -0,0 +1,43 @@
+# test_event_replay.py
+"""
+🧪 Event Replay - تسجيل ثم إعادة تشغيل أحداث في EventBus مع فحص صحة الـ Debounce
+"""
+import os
+import tempfile
+from tools.event_replay import EventRecorder, compare, load_events, replay, synthetic_events
+
+
+def test_record_and_load():
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "events.jsonl")
+        recorder = EventRecorder(out, flush_every=2)
+        recorder.on_fs_event("created", "/w/a.txt")
+        recorder.on_fs_event("created", "/w/folder", True)
+        recorder.on_fs_event("moved", "/w/a.txt", False, "/w/b.txt")
+        recorder.on_fs_event("modified", "/w/b.txt")
+        recorder.close()
+
+        events = load_events(out)
+        assert [(e["type"], e["path"]) for e in events] == [
+            ("created", "/w/a.txt"), ("modified", "/w/b.txt")]
+        assert events[0]["t"] <= events[1]["t"]
+
+
+def test_replay_debounce_is_correct():
+    events = list(synthetic_events(seconds=5, seed=3))
+    report = replay(events, speed=0, debounce=0.1, batch_window=0.2)
+    print(report["debounce"], report["latency"])
+
+    assert report["events"] == len(events)
+    assert report["debounce"]["ok"]
+    assert report["debounce"]["delivered"] == report["paths"]  # بأقصى سرعة: دفقة واحدة لكل مسار
+    assert report["latency"]["p50"] >= 0.1
+
+    assert compare(report, report) == []
+    worse = {**report, "events_per_sec": report["events_per_sec"] * 2}
+    assert compare(report, worse) == ["events_per_sec"]
+
+
+if __name__ == "__main__":
+    test_record_and_load()
+    test_replay_debounce_is_correct()
@@ -0,0 +1,105 @@
+# test_execution_graph.py
+"""
+🧪 ExecutionGraph - تنفيذ متوازٍ حسب الاعتماديات مع Rollback للخطوات المكتملة فقط
+"""
+import os
+import tempfile
+import threading
+import time
+from core.base_action import BaseAction
+from core.execution_context import ExecutionContext
+from core.execution_graph import ExecutionGraph
+from core.execution_plan import ExecutionPlan, ExecutionStep
+from core.journal import Journal
+
+
+class SleepAction(BaseAction):
+    """Action بطيء يسجل ترتيب البدء/الانتهاء/التراجع"""
+    log = []
+    lock = threading.Lock()
+
+    def __init__(self, context, path, seconds=0.2, fail=False):
+        super().__init__(context)
+        self.path = None if path is None else context.cwd / path
+        self.seconds = seconds
+        self.fail = fail
+        self.label = path
+
+    def execute(self, token=None):
+        time.sleep(self.seconds)
+        if self.fail:
+            raise RuntimeError(f"boom: {self.label}")
+        with self.lock:
+            self.log.append(("done", self.label))
+
+    def rollback(self):
+        with self.lock:
+            self.log.append(("undo", self.label))
+
+    def resources(self):
+        return None if self.path is None else [self.path]
+
+
+class SleepGraph(ExecutionGraph):
+    def _create_action(self, step):
+        if step.action == "sleep":
+            return SleepAction(self.ctx, **step.params)
+        return super()._create_action(step)
+
+
+def _plan(*steps):
+    return ExecutionPlan([ExecutionStep(a, p) for a, p in steps])
+
+
+def test_independent_steps_run_in_parallel():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp)
+        SleepAction.log = []
+        plan = _plan(*[("sleep", {"path": f"dir_{i}/file.txt"}) for i in range(8)])
+        start = time.perf_counter()
+        assert SleepGraph(plan, ctx, max_workers=8, journal=Journal(os.path.join(tmp, ".journal"))).run()
+        elapsed = time.perf_counter() - start
+        assert len(SleepAction.log) == 8 and elapsed < 0.2 * 8 / 2
+
+
+def test_dependencies_follow_paths_and_cwd():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp)
+        plan = _plan(
+            ("create_folder", {"name": "project"}),
+            ("create_file", {"name": "readme.txt"}),          # نسبي: داخل project (cwd)
+            ("write_text", {"file": "readme.txt", "text": "hello"}),
+            ("create_folder", {"name": os.path.join(tmp, "other")}),
+            ("create_file", {"name": os.path.join(tmp, "other", "a.txt")}),
+        )
+        graph = ExecutionGraph(plan, ctx, max_workers=4, journal=Journal(os.path.join(tmp, ".journal")))
+        deps = graph._dependencies(graph._build_actions())
+        assert deps == [set(), {0}, {0, 1}, set(), {3}]
+
+        assert graph.run()
+        with open(os.path.join(tmp, "project", "readme.txt"), encoding="utf-8") as f:
+            assert f.read() == "hello"
+        assert ctx.cwd == (ctx.base_path / "other").resolve()  # cwd النهائي كالتسلسلي
+
+
+def test_rollback_only_completed_steps():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp)
+        SleepAction.log = []
+        plan = _plan(
+            ("sleep", {"path": "a", "seconds": 0.05}),
+            ("sleep", {"path": "a/b"}),                # يعتمد على a: لا يبدأ بعد الفشل
+            ("sleep", {"path": "e", "seconds": 0.02}),
+            ("sleep", {"path": "c", "seconds": 0.01, "fail": True}),
+            ("sleep", {"path": "c/d"}),                # يعتمد على الخطوة الفاشلة: لا يبدأ
+            ("sleep", {"path": None, "seconds": 0}),   # حاجز: لا يبدأ قبل انتهاء الكل
+        )
+        assert not SleepGraph(plan, ctx, max_workers=4, journal=Journal(os.path.join(tmp, ".journal"))).run()
+        # الخطوات الجارية تكتمل، لا خطوات جديدة، والتراجع بعكس ترتيب الاكتمال
+        assert SleepAction.log == [("done", "e"), ("done", "a"), ("undo", "a"), ("undo", "e")]
+
+
+if __name__ == "__main__":
+    test_independent_steps_run_in_parallel()
+    test_dependencies_follow_paths_and_cwd()
+    test_rollback_only_completed_steps()
@@ -0,0 +1,151 @@
+# test_file_index.py
+"""
+🧪 FileIndex - بحث بالاسم (بادئة / glob / تقريبي) وتحديث حي ولقطة على القرص
+"""
+import functools
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+import tools.file_index as file_index
+from core.tool_handlers import find_file
+from tools.file_index import FileIndex
+
+
+class FakeMonitor:
+    """بديل SystemMonitor: add_listener ثم emit كما يفعل Thread الـ watchdog"""
+
+    def __init__(self):
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, *args):
+        for listener in self.listeners:
+            listener(*args)
+
+
+def _make_tree(root):
+    files = [
+        "Downloads/Quarterly Report 2024.pdf",
+        "Downloads/report_draft.docx",
+        "Downloads/setup.exe",
+        "Documents/notes/meeting.txt",
+        "Documents/notes/.git/HEAD",
+        "Documents/taxes/receipt_01.pdf",
+        "Desktop/todo.txt",
+    ]
+    for rel in files:
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+
+
+def test_queries_and_live_updates():
+    with tempfile.TemporaryDirectory() as tmp:
+        _make_tree(tmp)
+        index = FileIndex(snapshot_path=None)
+        index.build([tmp])
+
+        assert [os.path.basename(p) for p in index.find("report")] == [
+            "report_draft.docx", "Quarterly Report 2024.pdf"]       # البادئة أولاً
+        assert {os.path.basename(p) for p in index.find("*.pdf")} == {
+            "Quarterly Report 2024.pdf", "receipt_01.pdf"}
+        assert [os.path.basename(p) for p in index.find("receipt_0[!2].pdf")] == ["receipt_01.pdf"]
+        assert index.find("todo*meeting*") == []  # * لا يعبر من اسم لآخر في النص المجمع
+        assert os.path.basename(index.find("mtng")[0]) == "meeting.txt"  # تقريبي
+        assert index.find("HEAD") == []                                   # .git مستبعد
+        assert index.find("*.pdf", root=os.path.join(tmp, "Documents")) == [
+            os.path.join(tmp, "Documents", "taxes", "receipt_01.pdf")]
+
+        # أحداث SystemMonitor
+        new_file = os.path.join(tmp, "Desktop", "budget.xlsx")
+        index.on_fs_event("created", new_file)
+        assert index.find("budget") == [new_file]
+        index.on_fs_event("moved", new_file, False, os.path.join(tmp, "Desktop", "budget_final.xlsx"))
+        assert [os.path.basename(p) for p in index.find("budget")] == ["budget_final.xlsx"]
+        index.on_fs_event("deleted", os.path.join(tmp, "Documents", "notes"), True)
+        assert index.find("meeting") == []
+
+
+def test_snapshot_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        _make_tree(tmp)
+        snapshot = os.path.join(tmp, "file_index.json.gz")
+        index = FileIndex(snapshot_path=snapshot)
+        index.build([tmp])
+        index.save()
+
+        restored = FileIndex(snapshot_path=snapshot)
+        assert restored.load() and len(restored) == len(index)
+        assert restored.find("*.pdf") == index.find("*.pdf")
+
+
+def test_million_entries_benchmark():
+    print("🧪 Indexing 1,000,000 synthetic names...")
+    rng = random.Random(7)
+    words = ["report", "invoice", "photo", "backup", "notes", "draft", "final", "data",
+             "project", "scan", "budget", "meeting", "résumé", "تقرير", "صورة"]
+    exts = [".pdf", ".docx", ".jpg", ".txt", ".xlsx", ".png", ".zip"]
+
+    index = FileIndex(snapshot_path=None)
+    start = time.perf_counter()
+    for d in range(1000):
+        pid = index._intern_dir(f"/home/user/Documents/folder_{d}")
+        for f in range(1000):
+            name = f"{rng.choice(words)}_{rng.choice(words)}_{d}_{f}{rng.choice(exts)}"
+            index._add_child(pid, name, False)
+    index._rebuild()
+    print(f"📇 Built in {time.perf_counter() - start:.2f}s ({len(index):,} entries)")
+
+    # تحديثات حية بعد البناء (الذيل غير المرتب)
+    for i in range(1000):
+        index.add(f"/home/user/Desktop/live_{i}.txt")
+
+    for query in ["invoice_final_42", "budget", "invoice_*_42_*.pdf", "*_7_1?.*", "mtngfnl", "live_99"]:
+        start = time.perf_counter()
+        results = index.find(query, limit=20)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔎 {query!r}: {len(results)} results in {elapsed:.1f} ms")
+        assert results
+
+    start = time.perf_counter()
+    index.find("invoice_final_42")
+    assert (time.perf_counter() - start) < 0.05  # البادئة: بحث ثنائي
+
+
+def test_shared_index_follows_monitor_events():
+    with tempfile.TemporaryDirectory() as tmp:
+        _make_tree(tmp)
+        docs = os.path.join(tmp, "Documents")
+        monitors = {}
+        saved = (file_index.default_roots, file_index._root_monitor, file_index.FileIndex, file_index._file_index)
+        file_index.default_roots = lambda: [Path(docs)]
+        file_index._root_monitor = lambda root: monitors.setdefault(root, FakeMonitor())
+        file_index.FileIndex = functools.partial(FileIndex, snapshot_path=None)
+        file_index._file_index = None
+        try:
+            params = {"query": "budget_2025", "limit": 20}
+            assert "لم يتم العثور" in find_file(None, params)
+            assert list(monitors) == [docs]  # مراقب للجذر ربطه get_file_index
+
+            new_file = os.path.join(docs, "budget_2025.xlsx")
+            open(new_file, "w").close()
+            monitors[docs].emit("created", new_file, False)
+            assert new_file in find_file(None, params)
+
+            os.remove(new_file)
+            monitors[docs].emit("deleted", new_file, False)
+            assert "لم يتم العثور" in find_file(None, params)
+        finally:
+            (file_index.default_roots, file_index._root_monitor,
+             file_index.FileIndex, file_index._file_index) = saved
+
+
+if __name__ == "__main__":
+    test_queries_and_live_updates()
+    test_snapshot_roundtrip()
+    test_shared_index_follows_monitor_events()
+    test_million_entries_benchmark()
@@ -0,0 +1,97 @@
+# test_fingerprint.py
+"""
+🧪 FingerprintCache - modified بدون تغيير في المحتوى لا يمر
+"""
+import os
+import tempfile
+from watch.fingerprint import FingerprintCache
+
+
+def test_noop_modified_is_suppressed():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.txt")
+        with open(path, "w") as f:
+            f.write("hello")
+
+        cache = FingerprintCache(settle=0)
+        assert cache.observe("created", path)
+        assert not cache.observe("modified", path)  # نفس الحجم والوقت
+        assert cache.drain(2)  # الـ Hash الخلفي بعد أن يهدأ الملف
+
+        # لمسة من عميل مزامنة: mtime يتغير والمحتوى لا
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert not cache.observe("modified", path)
+
+        with open(path, "w") as f:
+            f.write("hellO")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+        assert cache.observe("modified", path)
+
+        assert cache.observe("deleted", path) and len(cache) == 0
+        assert cache.stats()["suppressed"] == 2
+        cache.close()
+
+
+def test_large_files_are_hashed_in_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "big.bin")
+        with open(path, "wb") as f:
+            f.write(os.urandom(64 * 1024) * 40)
+
+        cache = FingerprintCache(chunk_size=64 * 1024, max_hash_size=1024 * 1024, settle=0)
+        cache.observe("created", path)
+        assert cache.drain(2) and cache.stats()["hashed_bytes"] == 0  # أكبر من الحد: الحجم والوقت فقط
+
+        cache = FingerprintCache(chunk_size=64 * 1024, settle=0)
+        cache.observe("created", path)
+        assert cache.drain(2) and cache.stats()["hashed_bytes"] == os.path.getsize(path)
+        cache.close()
+
+
+def test_growing_file_is_hashed_once_after_it_settles():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "download.bin")
+        cache = FingerprintCache(settle=0.2)
+        with open(path, "wb") as f:
+            assert cache.observe("created", path)
+            for _ in range(20):
+                f.write(os.urandom(64 * 1024))
+                f.flush()
+                assert cache.observe("modified", path)  # الحجم تغير: يمر بدون قراءة
+        # Thread الـ observer لم يقرأ شيئاً
+        assert cache.stats()["hashed_bytes"] == 0 and cache.stats()["hash_pending"] == 1
+
+        assert cache.drain(2)
+        size = os.path.getsize(path)
+        assert cache.stats()["hashed_bytes"] == size  # مرة واحدة بعد الهدوء
+
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert not cache.observe("modified", path)  # لمسة بعد الهدوء: تُسقط
+        cache.close()
+
+
+def test_cache_is_lru_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FingerprintCache(max_entries=10, settle=0)
+        paths = []
+        for i in range(25):
+            path = os.path.join(tmp, f"f{i}.txt")
+            with open(path, "w") as f:
+                f.write(str(i))
+            paths.append(path)
+            cache.observe("created", path)
+            cache.observe("modified", paths[0])  # المسار الأول مستخدم دائماً
+
+        assert len(cache) == 10
+        assert not cache.observe("modified", paths[0])  # ما زال في الـ Cache
+        assert cache.observe("modified", paths[1])       # خرج منه: يمر
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_noop_modified_is_suppressed()
+    test_large_files_are_hashed_in_chunks()
+    test_growing_file_is_hashed_once_after_it_settles()
+    test_cache_is_lru_bounded()
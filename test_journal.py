@@ -0,0 +1,142 @@
+# test_journal.py
+"""
+🧪 Transaction Journal - Rollback بالنقل (rename) بدل القراءة + الاستعادة بعد تعطل البرنامج
+"""
+import os
+import tempfile
+from pathlib import Path
+from actions.file_ops import DeleteFileAction
+from core.execution_context import ExecutionContext
+from core.execution_graph import ExecutionGraph
+from core.execution_plan import ExecutionPlan, ExecutionStep
+from core.journal import Journal
+from watch.filters import get_default_filter
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_backup_is_rename_not_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Journal(os.path.join(tmp, ".journal"))
+        path = os.path.join(tmp, "big.bin")
+        with open(path, "wb") as f:
+            f.truncate(64 * 1024 * 1024)  # ملف sparse: القراءة أو النسخ سيكونان ملحوظين
+        inode = os.stat(path).st_ino
+
+        tx = journal.begin()
+        entry = tx.backup(path)
+        assert not os.path.exists(path) and os.stat(entry["backup"]).st_ino == inode
+        assert get_default_filter().is_ignored(entry["backup"])
+
+        kept = tx.backup(os.path.join(tmp, "missing.txt"))
+        assert kept is None
+        assert tx.restore(entry) and os.stat(path).st_ino == inode
+        tx.commit()
+        assert os.listdir(journal.directory) == [] and sorted(os.listdir(tmp)) == [".journal", "big.bin"]
+
+
+def test_graph_commit_and_rollback():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Journal(os.path.join(tmp, ".journal"))
+        ctx = ExecutionContext(tmp)
+        _write(os.path.join(tmp, "notes.txt"), "old")
+
+        ok = ExecutionGraph(ExecutionPlan([
+            ExecutionStep("write_text", {"file": "notes.txt", "text": "new"}),
+            ExecutionStep("create_file", {"name": "fresh.txt"}),
+            ExecutionStep("write_text", {"file": "missing/x.txt", "text": "x"}),  # يفشل
+        ]), ctx, journal=journal).run()
+        assert not ok
+        assert _read(os.path.join(tmp, "notes.txt")) == "old"
+        assert sorted(os.listdir(tmp)) == [".journal", "notes.txt"]
+
+        ok = ExecutionGraph(ExecutionPlan([
+            ExecutionStep("write_text", {"file": "notes.txt", "text": "new"}),
+        ]), ctx, journal=journal).run()
+        assert ok and _read(os.path.join(tmp, "notes.txt")) == "new"
+        assert sorted(os.listdir(tmp)) == [".journal", "notes.txt"]  # لا نسخ احتياطية متبقية
+        assert os.listdir(journal.directory) == []
+
+
+def test_recover_after_crash():
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, ".journal")
+        a, b, c = (os.path.join(tmp, n) for n in ("a.txt", "b.txt", "c.txt"))
+        _write(a, "original a")
+        _write(b, "original b")
+
+        # معاملة لم تكتمل: تعديل a، حذف b، إنشاء c ثم "تعطل"
+        tx = Journal(directory).begin()
+        tx.backup(a)
+        _write(a, "half written")
+        tx.backup(b)
+        tx.created(c)
+        _write(c, "new")
+        tx._file.close()
+
+        # معاملة اكتملت لكن تعطلنا قبل حذف نسختها الاحتياطية
+        done = Journal(directory).begin()
+        _write(os.path.join(tmp, "d.txt"), "old d")
+        entry = done.backup(os.path.join(tmp, "d.txt"))
+        _write(os.path.join(tmp, "d.txt"), "new d")
+        done._record({"op": "commit"})
+        done._file.close()
+
+        assert Journal(directory).recover() == 2
+        assert _read(a) == "original a" and _read(b) == "original b" and not os.path.exists(c)
+        assert _read(os.path.join(tmp, "d.txt")) == "new d" and not os.path.exists(entry["backup"])
+        assert os.listdir(directory) == []
+        assert Journal(directory).recover() == 0
+
+
+def test_action_outside_graph_needs_journal():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keep.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("data")
+        action = DeleteFileAction(ExecutionContext(tmp), path)
+        try:
+            action.execute()
+            assert False, "expected RuntimeError"
+        except RuntimeError as e:
+            assert "DeleteFileAction" in str(e) and "ExecutionGraph" in str(e)
+        assert _read(path) == "data"
+
+        action.journal = Journal(os.path.join(tmp, ".journal")).begin()
+        action.execute()
+        assert not os.path.exists(path)
+        action.rollback()
+        assert _read(path) == "data"
+
+
+def test_default_directory_is_per_user():
+    old = os.environ.get("XDG_STATE_HOME")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["XDG_STATE_HOME"] = tmp
+        try:
+            directory = Journal().directory
+        finally:
+            if old is None:
+                del os.environ["XDG_STATE_HOME"]
+            else:
+                os.environ["XDG_STATE_HOME"] = old
+    # لا يعتمد على مجلد التشغيل الحالي
+    assert directory.is_absolute() and not str(directory).startswith(os.getcwd() + os.sep)
+    if os.name == "posix" and os.uname().sysname != "Darwin":
+        assert directory == Path(tmp) / "Jarvis" / "journal"
+
+
+if __name__ == "__main__":
+    test_backup_is_rename_not_copy()
+    test_graph_commit_and_rollback()
+    test_recover_after_crash()
+    test_action_outside_graph_needs_journal()
+    test_default_directory_is_per_user()
@@ -0,0 +1,56 @@
+# test_jsonl_log.py
+"""
+🧪 JSONL Log - التدوير، ضغط gzip، والقراءة عبر كل الملفات المدوّرة بالترتيب
+"""
+import gzip
+import json
+import os
+import tempfile
+from core.execution_context import ExecutionContext
+from core.jsonl_log import JsonlLog
+
+
+def _records(start, count):
+    return [{"n": i, "message": "سجل " + "x" * 50} for i in range(start, start + count)]
+
+
+def test_rotation_and_read_back():
+    for compress in (True, False):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "memory.jsonl")
+            log = JsonlLog(path, max_bytes=1024, backup_count=3, compress=compress)
+            for start in range(0, 100, 10):
+                assert log.append(_records(start, 10)) == 10
+            assert log.append([]) == 0
+
+            suffix = ".gz" if compress else ""
+            assert sorted(os.listdir(tmp)) == sorted(
+                ["memory.jsonl"] * os.path.exists(path) + [f"memory.jsonl.{i}{suffix}" for i in (1, 2, 3)])
+            if compress:
+                with gzip.open(os.path.join(tmp, "memory.jsonl.1.gz"), "rt", encoding="utf-8") as f:
+                    assert json.loads(f.readline())["message"].startswith("سجل")
+
+            # الأقدم خرج بعد backup_count، والباقي متصل ومرتب من الأقدم للأحدث
+            numbers = [r["n"] for r in log.read()]
+            assert numbers == list(range(numbers[0], 100)) and numbers[0] > 0
+
+
+def test_context_keeps_all_pending_records():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp, history_capacity=10)
+        for i in range(25):
+            ctx.log_event(f"event {i}")
+        filename = os.path.join(tmp, "memory_dump.jsonl")
+        ctx.save_memory(filename)
+        ctx.log_event("event 25")
+        ctx.save_memory(filename)
+
+        records = list(JsonlLog(filename).read())
+        assert [r["message"] for r in records] == [f"event {i}" for i in range(26)]
+        assert len(ctx.event_log) == 10  # الذاكرة الحية تبقى محدودة
+
+
+if __name__ == "__main__":
+    test_rotation_and_read_back()
+    test_context_keeps_all_pending_records()
+    print("✅ JSONL log tests passed")
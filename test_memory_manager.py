@@ -0,0 +1,115 @@
+# test_memory_manager.py
+"""
+🧪 Memory Manager - الكتابة المؤجلة: تعديلات متتالية = كتابة واحدة، flush/close لا يفقدان شيئاً،
+والتعديل من عدة Threads لا يضيع أي تحديث
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import core.memory_manager as memory_manager
+from core.memory_manager import MemoryManager
+
+
+@contextlib.contextmanager
+def _count_writes(path):
+    """عدد مرات استبدال ملف الذاكرة (os.replace) أثناء الـ with"""
+    writes = []
+    real_replace = memory_manager.os.replace
+
+    def replace(src, dest, *args, **kwargs):
+        if os.path.abspath(str(dest)) == os.path.abspath(path):
+            writes.append(time.perf_counter())
+        return real_replace(src, dest, *args, **kwargs)
+
+    memory_manager.os.replace = replace
+    try:
+        yield writes
+    finally:
+        memory_manager.os.replace = real_replace
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_rapid_mutations_coalesce_into_one_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge_base.json")
+        with _count_writes(path) as writes:
+            memory = MemoryManager(path, flush_interval=0.3, flush_every=1000)
+            for i in range(50):
+                memory.log_action(f"action {i}")
+            assert not os.path.exists(path)  # لم يُكتب شيء بعد
+            time.sleep(0.8)
+            memory.close()
+            assert len(writes) == 1
+            assert len(_load(path)["history"]) == 50
+
+        # flush_every يوقظ الـ Flusher قبل انتهاء المهلة
+        path = os.path.join(tmp, "burst.json")
+        with _count_writes(path) as writes:
+            memory = MemoryManager(path, flush_interval=60, flush_every=10)
+            for i in range(10):
+                memory.log_action(f"burst {i}")
+            time.sleep(0.3)
+            assert len(writes) == 1
+            memory.close()
+            assert len(writes) == 1  # لا تعديلات معلقة: close لا يكتب مرة أخرى
+
+
+def test_flush_and_close_persist_pending_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge_base.json")
+        memory = MemoryManager(path, flush_interval=60)
+        with contextlib.redirect_stdout(io.StringIO()):
+            memory.store("the user likes tea")
+            memory.flush()
+            assert _load(path)["facts"] == ["the user likes tea"]
+
+            memory.set_preference("language", "ar")
+            memory.close()
+            memory.close()  # آمن للتكرار
+        assert _load(path)["preferences"] == {"language": "ar"}
+        assert not os.path.exists(path + ".tmp")
+
+        reloaded = MemoryManager(path)
+        assert reloaded.get_preference("language") == "ar"
+        assert reloaded.get_all_facts() == ["the user likes tea"]
+        reloaded.close()
+
+
+def test_concurrent_mutations_lose_no_updates():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge_base.json")
+        memory = MemoryManager(path, flush_interval=0.01, flush_every=5)
+        start = threading.Barrier(8)
+
+        def worker(n):
+            start.wait()
+            for i in range(100):
+                memory.store(f"fact {n}-{i}")
+                memory.set_preference(f"key {n}-{i}", i)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            memory.close()
+
+        data = _load(path)
+        assert len(data["facts"]) == 800 and len(set(data["facts"])) == 800
+        assert len(data["preferences"]) == 800
+
+
+if __name__ == "__main__":
+    test_rapid_mutations_coalesce_into_one_write()
+    test_flush_and_close_persist_pending_changes()
+    test_concurrent_mutations_lose_no_updates()
+    print("✅ Memory manager tests passed")
@@ -0,0 +1,75 @@
+# test_path_filter.py
+"""
+🧪 PathFilter - أنماط .gitignore للـ watcher
+"""
+import time
+from watch.filters import PathFilter
+
+ROOT = "/watched"
+
+
+def test_default_ignores():
+    f = PathFilter(root=ROOT)
+    ignored = [
+        "/watched/.git/objects/ab/cdef",
+        "/watched/src/__pycache__/mod.cpython-311.pyc",
+        "/watched/notes.txt.swp",
+        "/watched/report.docx~",
+        "/watched/~$report.docx",
+        "/watched/memory_dump.jsonl",
+        "/watched/memory_dump.jsonl.1.gz",
+        "/watched/knowledge_base.json.tmp",
+        "/watched/Downloads/movie.mkv.crdownload",
+    ]
+    allowed = [
+        "/watched/notes.txt",
+        "/watched/src/git_helper.py",
+        "/watched/docs/.gitignore",
+        "/watched/my.git.backup/readme.md",
+    ]
+    for path in ignored:
+        assert f.is_ignored(path), path
+    for path in allowed:
+        assert not f.is_ignored(path), path
+
+
+def test_gitignore_semantics():
+    f = PathFilter(ignore=["/build/", "logs/**/*.log", "*.log", "!keep.log", "data?.csv"], root=ROOT)
+    assert f.is_ignored("/watched/build/out.o")
+    assert not f.is_ignored("/watched/src/build/out.o")  # مرتبط بالجذر
+    assert not f.is_ignored("/watched/build")             # / في النهاية = مجلد فقط
+    assert f.is_ignored("/watched/logs/a/b/c.log")
+    assert f.is_ignored("/watched/app.log")
+    assert not f.is_ignored("/watched/logs/keep.log")     # آخر قاعدة مطابقة تفوز
+    assert f.is_ignored("/watched/data1.csv")
+    assert not f.is_ignored("/watched/data10.csv")
+
+
+def test_include_and_stats():
+    f = PathFilter(include=["*.py", "docs/"], root=ROOT)
+    assert f.allow("/watched/app.py")
+    assert f.allow("/watched/docs/guide.md")
+    assert not f.allow("/watched/image.png")
+    assert not f.allow("/watched/__pycache__/app.cpython-311.pyc")
+
+    stats = f.stats()
+    assert stats["checked"] == 4 and stats["dropped"] == 2 and stats["passed"] == 2
+    assert stats["hits"] == {"<not included>": 1, "__pycache__/": 1}
+
+
+def test_filter_throughput():
+    f = PathFilter(root=ROOT)
+    paths = [f"/watched/project/src/module_{i}/file_{i}.py" for i in range(100_000)]
+    start = time.perf_counter()
+    for p in paths:
+        f.allow(p)
+    elapsed = time.perf_counter() - start
+    print(f"⚡ {len(paths) / elapsed:,.0f} paths/sec")
+    assert f.stats()["dropped"] == 0
+
+
+if __name__ == "__main__":
+    test_default_ignores()
+    test_gitignore_semantics()
+    test_include_and_stats()
+    test_filter_throughput()
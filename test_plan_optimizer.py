@@ -0,0 +1,120 @@
+# test_plan_optimizer.py
+"""
+🧪 Plan Optimizer - اختبارات Golden على مستوى الخطة + تكافؤ التنفيذ مع الخطة الأصلية
+"""
+import os
+import tempfile
+from core.decision_engine import optimize
+from core.execution_context import ExecutionContext
+from core.execution_graph import ExecutionGraph
+from core.execution_plan import ExecutionPlan, ExecutionStep
+from core.journal import Journal
+
+BASE = os.path.abspath(os.sep + "base")
+
+
+def J(*parts):
+    return os.path.join(BASE, *parts)
+
+
+# (اسم الحالة، الخطوات الأصلية، الخطوات المتوقعة، عدد المحذوف)
+GOLDEN = [
+    ("folder chain collapses to deepest",
+     [("create_folder", {"name": "A"}), ("create_folder", {"name": "B"}), ("create_folder", {"name": "C"})],
+     [("create_folder", {"name": J("A", "B", "C")})], 2),
+
+    ("create_file then write_text fuses",
+     [("create_folder", {"name": J("data")}),
+      ("create_file", {"name": J("data", "a.txt"), "content": ""}),
+      ("write_text", {"file": J("data", "a.txt"), "name": J("data", "a.txt"), "text": "hi"})],
+     [("create_folder", {"name": J("data")}),
+      ("write_text", {"file": J("data", "a.txt"), "text": "hi"})], 1),
+
+    ("create_file with content becomes write_text",
+     [("create_file", {"name": "notes.txt", "content": "x"})],
+     [("write_text", {"file": J("notes.txt"), "text": "x"})], 0),
+
+    ("duplicate folder and file",
+     [("create_folder", {"name": J("w")}), ("create_file", {"name": J("w", "x")}),
+      ("create_folder", {"name": J("w")}), ("create_file", {"name": J("w", "x")}),
+      ("create_folder", {"name": J("v")})],
+     [("create_folder", {"name": J("w")}), ("create_file", {"name": J("w", "x")}),
+      ("create_folder", {"name": J("v")})], 2),
+
+    ("last folder kept for final cwd",
+     [("create_folder", {"name": J("a")}), ("create_folder", {"name": J("b")}),
+      ("create_folder", {"name": J("a")})],
+     [("create_folder", {"name": J("a")}), ("create_folder", {"name": J("b")}),
+      ("create_folder", {"name": J("a")})], 0),
+
+    ("overwritten write is dead",
+     [("write_text", {"file": J("f"), "text": "1"}), ("open_app", {"app": "calc"}),
+      ("write_text", {"file": J("f"), "text": "2"})],
+     [("open_app", {"app": "calc"}), ("write_text", {"file": J("f"), "text": "2"})], 1),
+
+    ("read in between blocks fusion",
+     [("write_text", {"file": J("f"), "text": "1"}), ("copy_file", {"src": J("f"), "dest": J("g")}),
+      ("write_text", {"file": J("f"), "text": "2"})],
+     [("write_text", {"file": J("f"), "text": "1"}), ("copy_file", {"src": J("f"), "dest": J("g")}),
+      ("write_text", {"file": J("f"), "text": "2"})], 0),
+
+    ("delete breaks folder dedupe; self move is a no-op",
+     [("create_folder", {"name": J("d")}), ("delete_folder", {"name": J("d")}),
+      ("create_folder", {"name": J("d")}), ("move", {"from": "../x", "to": J("d", "x")}),
+      ("move", {"src": J("d", "y"), "dest": J("d", "y")})],
+     [("create_folder", {"name": J("d")}), ("delete_folder", {"name": J("d")}),
+      ("create_folder", {"name": J("d")}), ("move", {"src": J("x"), "dest": J("d", "x")})], 1),
+
+    ("unknown action is a barrier",
+     [("create_file", {"name": J("f")}), ("mystery", {}), ("write_text", {"file": J("f"), "text": "t"})],
+     [("create_file", {"name": J("f")}), ("mystery", {}), ("write_text", {"file": J("f"), "text": "t"})], 0),
+]
+
+
+def test_golden_plans():
+    for name, raw, expected, eliminated in GOLDEN:
+        plan, report = optimize(ExecutionPlan([ExecutionStep(a, dict(p)) for a, p in raw]), BASE)
+        got = [(s.action, s.params) for s in plan.steps]
+        assert got == expected, f"{name}:\n  got      {got}\n  expected {expected}"
+        assert report["eliminated"] == eliminated, f"{name}: {report}"
+
+
+def _execute(tmp, steps):
+    ctx = ExecutionContext(tmp)
+    ok = ExecutionGraph(ExecutionPlan(steps), ctx, journal=Journal(os.path.join(tmp, ".journal"))).run()
+    tree = sorted(os.path.relpath(os.path.join(r, n), tmp)
+                  for r, ds, fs in os.walk(tmp) for n in ds + fs if ".journal" not in r + n)
+    return ok, tree, os.path.relpath(ctx.cwd, tmp)
+
+
+def test_optimized_plan_is_equivalent():
+    raw = [("create_folder", {"name": "proj"}), ("create_folder", {"name": "src"}),
+           ("create_file", {"name": "main.py"}), ("write_text", {"file": "main.py", "text": "print(1)"}),
+           ("create_folder", {"name": "proj"}), ("create_file", {"name": "README.md", "content": "# p"})]
+    results = []
+    for optimized in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            steps = [ExecutionStep(a, dict(p)) for a, p in raw]
+            if optimized:
+                plan, report = optimize(ExecutionPlan(steps), ExecutionContext(tmp).cwd)
+                assert report["eliminated"] == 2
+                steps = plan.steps
+            results.append(_execute(tmp, steps))
+    assert results[0] == results[1], results
+
+
+def test_fused_chain_rolls_back_all_levels():
+    with tempfile.TemporaryDirectory() as tmp:
+        plan, _ = optimize(ExecutionPlan([
+            ExecutionStep("create_folder", {"name": "a"}), ExecutionStep("create_folder", {"name": "b"}),
+            ExecutionStep("write_text", {"file": os.path.join(tmp, "missing", "x"), "text": "boom"}),
+        ]), tmp)
+        assert len(plan.steps) == 2
+        ok, tree, _ = _execute(tmp, plan.steps)
+        assert not ok and tree == []
+
+
+if __name__ == "__main__":
+    test_golden_plans()
+    test_optimized_plan_is_equivalent()
+    test_fused_chain_rolls_back_all_levels()
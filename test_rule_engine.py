@@ -0,0 +1,123 @@
+# test_rule_engine.py
+"""
+🧪 RuleEngine - قواعد محلية تطابق أحداث الملفات قبل الـ LLM
+"""
+import json
+import os
+import tempfile
+import time
+from core.event_bus import Event
+from core.rule_engine import RuleEngine
+
+HOME = "/home/user"
+
+
+def _resolve(path):
+    aliases = {"downloads": f"{HOME}/Downloads", "documents": f"{HOME}/Documents"}
+    head, _, tail = path.partition("/")
+    base = aliases.get(head.lower())
+    if base:
+        return f"{base}/{tail}" if tail else base
+    return path if os.path.isabs(path) else f"{HOME}/{path}"
+
+
+def _engine(tmp, rules):
+    path = os.path.join(tmp, "rules.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"rules": rules}, f)
+    return RuleEngine.load(path, resolve_path=_resolve), path
+
+
+def test_rules_match_and_render():
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = os.path.join(tmp, "big.pdf")
+        with open(pdf, "wb") as f:
+            f.write(b"x" * 100)
+        engine, _ = _engine(tmp, [
+            {"name": "partial", "path": "Downloads/**", "extensions": ["part"], "action": "ignore"},
+            {"name": "pdfs", "path": "Downloads/*.pdf", "events": ["created"],
+             "action": "write_text", "params": {"file": "Documents/{stem}.txt", "text": "{event} {name}"}},
+            {"name": "big-files", "path": f"{tmp}/*", "min_size": 50, "action": "log"},
+            {"name": "disabled", "enabled": False, "path": "**", "action": "ignore"},
+        ])
+        assert [r.name for r in engine.rules] == ["partial", "pdfs", "big-files"]
+
+        events = [
+            Event("created", f"{HOME}/Downloads/report.pdf", 0),
+            Event("modified", f"{HOME}/Downloads/report.pdf", 0),         # نوع حدث مختلف
+            Event("created", f"{HOME}/Downloads/sub/movie.mkv.part", 0),
+            Event("created", f"{HOME}/Downloads/sub/report.pdf", 0),      # * لا يعبر المجلدات
+            Event("created", pdf, 0),
+        ]
+        matches, unmatched = engine.evaluate(events)
+        assert [(m.rule.name, m.event.path) for m in matches] == [
+            ("pdfs", f"{HOME}/Downloads/report.pdf"),
+            ("partial", f"{HOME}/Downloads/sub/movie.mkv.part"),
+            ("big-files", pdf),
+        ]
+        assert matches[0].params == {"file": f"{HOME}/Documents/report.txt", "text": "created report.pdf"}
+        assert [e.path for e in unmatched] == [f"{HOME}/Downloads/report.pdf", f"{HOME}/Downloads/sub/report.pdf"]
+        assert engine.hits["pdfs"] == 1
+
+
+def test_rules_reload_and_reject_unknown_action():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, path = _engine(tmp, [{"path": "Downloads/*", "action": "ignore"}])
+        assert len(engine.rules) == 1
+
+        time.sleep(0.01)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"rules": [{"path": "Downloads/*", "action": "format_disk"}]}, f)
+        os.utime(path, ns=(0, time.time_ns() + 10**9))
+        engine.evaluate([])
+        assert len(engine.rules) == 1  # ملف غير صالح: تبقى القواعد السابقة
+
+
+def test_rules_reject_tool_actions():
+    with tempfile.TemporaryDirectory() as tmp:
+        for action in ("run_python_code", "open_url", "search_web"):
+            engine, _ = _engine(tmp, [{"path": "Downloads/*", "action": action,
+                                       "params": {"code": "print('{name}')"}}])
+            assert engine.rules == [], action
+        engine, _ = _engine(tmp, [{"path": "Downloads/*", "action": "move",
+                                   "params": {"src": "{path}", "dest": "Documents"}}])
+        assert [r.action for r in engine.rules] == ["move"]
+
+
+def test_bad_template_skips_only_that_rule():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, _ = _engine(tmp, [
+            {"name": "positional", "path": "Downloads/*", "continue": True,
+             "action": "log", "params": {"message": "{0}"}},
+            {"name": "brace", "path": "Downloads/*", "continue": True,
+             "action": "log", "params": {"message": "{name"}},
+            {"name": "attr", "path": "Downloads/*", "continue": True,
+             "action": "log", "params": {"message": "{name.nope}"}},
+            {"name": "good", "path": "Downloads/*", "action": "log", "params": {"message": "{name}"}},
+        ])
+        matches, unmatched = engine.evaluate([Event("created", f"{HOME}/Downloads/a.txt", 0)])
+        assert [(m.rule.name, m.params) for m in matches] == [("good", {"message": "a.txt"})]
+        assert unmatched == []
+        assert engine.hits == {"positional": 0, "brace": 0, "attr": 0, "good": 1}
+
+
+def test_shipped_rules_move_downloaded_pdfs():
+    rules = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+    engine = RuleEngine.load(rules, resolve_path=_resolve)
+    matches, unmatched = engine.evaluate([
+        Event("created", f"{HOME}/Downloads/report.pdf", 0),
+        Event("created", f"{HOME}/Downloads/report.pdf.crdownload", 0),
+        Event("modified", f"{HOME}/Downloads/report.pdf", 0),
+    ])
+    assert [(m.rule.name, m.action) for m in matches] == [
+        ("move-downloaded-pdfs", "move"), ("ignore-partial-downloads", "ignore")]
+    assert matches[0].params == {"src": f"{HOME}/Downloads/report.pdf", "dest": f"{HOME}/Documents/report.pdf"}
+    assert [e.event_type for e in unmatched] == ["modified"]
+
+
+if __name__ == "__main__":
+    test_rules_match_and_render()
+    test_rules_reload_and_reject_unknown_action()
+    test_rules_reject_tool_actions()
+    test_bad_template_skips_only_that_rule()
+    test_shipped_rules_move_downloaded_pdfs()
@@ -0,0 +1,226 @@
+# test_sessions.py
+"""
+🧪 Sessions - عدة جلسات على نفس الـ Orchestrator: cwd ورسائل مستقلة، أقفال المسارات،
+وخدمة الطلبات بالتوازي عبر serve()
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from core.cancellation import CancellationToken, OperationCancelled
+from core.execution_context import ExecutionContext
+from core.memory_manager import MemoryManager
+from core.path_locks import PathLocks
+
+
+class Planner:
+    """كل طلب "folder|file|text" -> create_folder ثم write_text داخله (مسارات مطلقة)"""
+    concurrent = True
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = []  # (النص، البداية، النهاية)
+        self.lock = threading.Lock()
+
+    def plan(self, text, memory_context):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        start = time.perf_counter()
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+            self.calls.append((text, start, time.perf_counter()))
+        folder, name, body = text.split("|")
+        return {"steps": [
+            {"action": "create_folder", "params": {"name": folder}},
+            {"action": "write_text", "params": {"file": os.path.join(folder, name), "text": body}},
+        ]}
+
+
+def _orchestrator(tmp, planner):
+    from core.orchestrator import Orchestrator
+    orchestrator = Orchestrator(ExecutionContext(tmp), planner=planner, session_workers=4)
+    orchestrator.sessions.memory_dir = tmp
+    orchestrator.sessions.default.memory_file = os.path.join(tmp, "memory_dump.jsonl")
+    orchestrator.memory = MemoryManager(os.path.join(tmp, "knowledge_base.json"))
+    return orchestrator
+
+
+def _close(orchestrator):
+    orchestrator.shutdown()
+    orchestrator.memory.close()
+
+
+def test_path_locks_hierarchy_and_cancel():
+    locks = PathLocks()
+    root = os.path.abspath(os.sep + "data")
+    held = locks.acquire([os.path.join(root, "a", "b")], owner="s1")
+
+    # مسار منفصل: فوراً
+    with locks.acquire([os.path.join(root, "c")], owner="s2"):
+        pass
+
+    # المجلد الأب يتعارض مع الابن المحجوز: ينتظر حتى release
+    acquired = threading.Event()
+
+    def parent():
+        with locks.acquire([os.path.join(root, "a")], owner="s3"):
+            acquired.set()
+
+    thread = threading.Thread(target=parent)
+    thread.start()
+    time.sleep(0.1)
+    assert not acquired.is_set() and locks.holders() == ["s1"]
+
+    # الإلغاء أثناء الانتظار
+    token = CancellationToken()
+    threading.Timer(0.1, token.cancel, args=("stop",)).start()
+    try:
+        locks.acquire([os.path.join(root, "a", "b", "x.txt")], owner="s4", token=token)
+        assert False, "must be cancelled"
+    except OperationCancelled as e:
+        assert "stop" in str(e)
+
+    held.release()
+    thread.join(2)
+    assert acquired.is_set() and locks.stats["waited"] == 1
+
+    # مسار غير معروف (None) يحجز الجذر
+    with locks.acquire(None, owner="barrier"):
+        try:
+            locks.acquire([os.path.join(root, "z")], timeout=0.05)
+            assert False, "root lease must block everything"
+        except TimeoutError:
+            pass
+
+
+def test_sessions_run_concurrently_with_own_cwd_and_messages():
+    with tempfile.TemporaryDirectory() as tmp:
+        planner = Planner()
+        orchestrator = _orchestrator(tmp, planner)
+        start = time.perf_counter()
+        futures = {sid: orchestrator.serve(f"{os.path.join(tmp, sid)}|note.txt|from {sid}", session_id=sid)
+                   for sid in ("alice", "bob", "carol", "dave")}
+        results = {sid: f.result(10) for sid, f in futures.items()}
+        elapsed = time.perf_counter() - start
+
+        assert planner.peak == 4 and elapsed < 4 * planner.delay, elapsed
+        for sid, result in results.items():
+            assert result.success, result.message
+            session = orchestrator.sessions.get(sid)
+            assert str(session.context.cwd) == os.path.realpath(os.path.join(tmp, sid))
+            with open(os.path.join(tmp, sid, "note.txt"), encoding="utf-8") as f:
+                assert f.read() == f"from {sid}"
+            # سجل كل طلب يخصه وحده
+            assert result.messages[0] == f"📝 معالجة: {os.path.join(tmp, sid)}|note.txt|from {sid}"
+            assert not any(other in m for m in result.messages for other in results if other != sid)
+            assert os.path.exists(os.path.join(tmp, f"memory_dump.{sid}.jsonl"))
+        assert str(orchestrator.context.cwd) == os.path.realpath(tmp)  # الجلسة الافتراضية لم تتغير
+        _close(orchestrator)
+
+
+def test_same_session_is_serialized_and_shared_file_is_locked():
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = _orchestrator(tmp, Planner(delay=0.05))
+        shared = os.path.join(tmp, "shared")
+        planner = orchestrator.planner
+        own = os.path.join(tmp, "own")
+        futures = [orchestrator.serve(f"{shared}|log.txt|writer {i}", session_id=f"s{i}") for i in range(6)]
+        futures += [orchestrator.serve(f"{own}|{i}.txt|{i}", session_id="same") for i in range(3)]
+        assert all(f.result(10).success for f in futures)
+
+        # طلبات نفس الجلسة لا تتداخل (حتى مع planner متزامن)
+        same = sorted((start, end) for text, start, end in planner.calls if text.startswith(own))
+        assert len(same) == 3 and all(a[1] <= b[0] for a, b in zip(same, same[1:]))
+        assert sorted(os.listdir(own)) == ["0.txt", "1.txt", "2.txt"]
+        with open(os.path.join(shared, "log.txt"), encoding="utf-8") as f:
+            assert f.read() in {f"writer {i}" for i in range(6)}
+        assert [n for n in os.listdir(shared) if n != "log.txt"] == []  # لا مؤقتات ولا نسخ متبقية
+        _close(orchestrator)
+
+
+def test_aprocess_sessions_keep_own_messages():
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = _orchestrator(tmp, Planner(delay=0.1))
+
+        async def main():
+            return await asyncio.gather(*[
+                orchestrator.aprocess(f"{os.path.join(tmp, sid)}|n.txt|{sid}", session_id=sid)
+                for sid in ("x", "y")])
+
+        x, y = asyncio.run(main())
+        assert x.success and y.success
+        assert all("/y" not in m for m in x.messages) and all("/x" not in m for m in y.messages)
+        assert str(orchestrator.sessions.get("y").context.cwd) == os.path.realpath(os.path.join(tmp, "y"))
+        _close(orchestrator)
+
+
+def test_cancelled_aprocess_keeps_session_lock_consistent():
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = _orchestrator(tmp, Planner(delay=0))
+        session = orchestrator.sessions.get("s")
+
+        async def cancel_after(coro, delay):
+            task = asyncio.ensure_future(coro)
+            await asyncio.sleep(delay)
+            task.cancel()
+            try:
+                await task
+                assert False, "must be cancelled"
+            except asyncio.CancelledError:
+                pass
+
+        # 1. الإلغاء أثناء انتظار القفل: لا يبقى محجوزاً بعد تحريره من صاحبه
+        session.lock.acquire()
+        asyncio.run(cancel_after(orchestrator.aprocess(f"{tmp}|a.txt|a", session_id="s"), 0.1))
+        session.lock.release()
+        time.sleep(0.2)
+        assert session.lock.acquire(timeout=1)
+        session.lock.release()
+        assert not session.busy
+
+        # 2. الإلغاء أثناء التنفيذ: التوكن يُلغى والقفل يبقى حتى ينتهي الـ Thread
+        seen = {}
+
+        def slow_execute(text, mode, raw, request):
+            seen["cancelled"] = request.token.wait(5)
+            seen["locked_while_running"] = session.lock.locked()
+            return orchestrator.__class__._execute_plan(orchestrator, text, mode, raw, request)
+
+        orchestrator._execute_plan = slow_execute
+
+        asyncio.run(cancel_after(orchestrator.aprocess(f"{tmp}|b.txt|b", session_id="s"), 0.2))
+        assert seen == {"cancelled": True, "locked_while_running": True}
+        assert session.lock.acquire(timeout=1)
+        session.lock.release()
+        assert not os.path.exists(os.path.join(tmp, "b.txt"))
+        _close(orchestrator)
+
+
+def test_cancel_targets_one_session():
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = _orchestrator(tmp, Planner(delay=0.3))
+        slow = orchestrator.serve(f"{os.path.join(tmp, 'a')}|x.txt|1", session_id="a")
+        other = orchestrator.serve(f"{os.path.join(tmp, 'b')}|y.txt|2", session_id="b")
+        time.sleep(0.1)
+        assert orchestrator.cancel(session_id="a")
+        assert not orchestrator.cancel(session_id="missing")
+        cancelled, kept = slow.result(10), other.result(10)
+        assert not cancelled.success and "🛑" in cancelled.message
+        assert kept.success and not os.path.exists(os.path.join(tmp, "a"))
+        assert orchestrator.close_session("b") and "b" not in orchestrator.sessions.ids()
+        _close(orchestrator)
+
+
+if __name__ == "__main__":
+    test_path_locks_hierarchy_and_cancel()
+    test_sessions_run_concurrently_with_own_cwd_and_messages()
+    test_same_session_is_serialized_and_shared_file_is_locked()
+    test_aprocess_sessions_keep_own_messages()
+    test_cancelled_aprocess_keeps_session_lock_consistent()
+    test_cancel_targets_one_session()
+    print("✅ Session tests passed")
@@ -0,0 +1,84 @@
+# test_tool_runner.py
+"""
+🧪 Tool Runner - أدوات خاصة بالتوازي، حد لكل أداة، مهلة لا تحجز الباقي، ونتائج بترتيب الخطة
+"""
+import tempfile
+import threading
+import time
+from core.action_registry import TOOL, ActionRegistry, ActionSpec
+from core.tool_runner import ToolRunner
+
+
+def fake_tool(orchestrator, params):
+    time.sleep(0.3)
+    return f"{params['tool']} done"
+
+
+def test_parallel_limits_and_deadlines():
+    runner = ToolRunner(limits={"slow": (1, 0.3), "fast": (4, 5.0), "serial": (1, 5.0)})
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def serial():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.1)
+        with lock:
+            running[0] -= 1
+        return "s"
+
+    def boom():
+        raise RuntimeError("no network")
+
+    start = time.perf_counter()
+    items = ["inline",
+             runner.submit("slow", time.sleep, 2),
+             runner.submit("slow", lambda: "never starts"),     # في طابور slow حتى المهلة
+             *[runner.submit("fast", lambda i=i: (time.sleep(0.2), f"fast{i}")[1]) for i in range(4)],
+             runner.submit("serial", serial), runner.submit("serial", serial),
+             runner.submit("fast", boom)]
+    results = runner.gather(items)
+    elapsed = time.perf_counter() - start
+
+    assert results[0] == "inline"
+    assert results[1].startswith("⏱️ slow") and results[2].startswith("⏱️ slow")
+    assert results[3:7] == ["fast0", "fast1", "fast2", "fast3"]
+    assert results[7:9] == ["s", "s"] and peak[0] == 1
+    assert "no network" in results[9]
+    assert elapsed < 0.8, elapsed  # المهلة (0.3) وليس مجموع الأزمنة أو الأداة العالقة (2)
+    assert runner.stats["timeouts"] == 2 and runner.stats["errors"] == 1
+    runner.shutdown()
+
+
+def test_orchestrator_runs_tools_concurrently():
+    from core.execution_context import ExecutionContext
+    from core.orchestrator import Orchestrator
+
+    class Planner:
+        def plan(self, text, memory_context):
+            return {"steps": [
+                {"action": "search_web", "params": {"tool": "search_web"}},
+                {"action": "see_screen", "params": {"tool": "see_screen"}},
+                {"action": "run_python_code", "params": {"tool": "run_python_code"}},
+            ]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = Orchestrator(ExecutionContext(tmp), planner=Planner())
+        orchestrator.tools = ToolRunner()
+        orchestrator.registry = ActionRegistry(
+            ActionSpec(name, TOOL, "test_tool_runner:fake_tool")
+            for name in ("search_web", "see_screen", "run_python_code"))
+        start = time.perf_counter()
+        result = orchestrator.process("lookup, screenshot and calculate")
+        elapsed = time.perf_counter() - start
+        assert result.success
+        assert result.message.index("search_web") < result.message.index("see_screen") \
+            < result.message.index("run_python_code")
+        assert elapsed < 0.6, elapsed  # ~0.3 بدل 0.9
+        orchestrator.tools.shutdown()
+
+
+if __name__ == "__main__":
+    test_parallel_limits_and_deadlines()
+    test_orchestrator_runs_tools_concurrently()
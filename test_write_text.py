@@ -0,0 +1,82 @@
+# test_write_text.py
+"""
+🧪 WriteTextAction - كتابة ذرية على دفعات (ملف مؤقت + fsync + os.replace)
+"""
+import io
+import os
+import stat
+import tempfile
+from actions.file_ops import WriteTextAction, iter_chunks, write_atomic
+from core.execution_context import ExecutionContext
+from core.journal import Journal
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_sources_are_streamed():
+    assert b"".join(iter_chunks("مرحبا" * 10, chunk_size=7)) == ("مرحبا" * 10).encode("utf-8")
+    assert b"".join(bytes(c) for c in iter_chunks(b"x" * 10, chunk_size=3)) == b"x" * 10
+    assert b"".join(iter_chunks(io.StringIO("abc" * 5), chunk_size=4)) == b"abc" * 5
+    assert b"".join(iter_chunks(("line %d\n" % i for i in range(3)))) == b"line 0\nline 1\nline 2\n"
+
+
+def test_crash_mid_write_keeps_original():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "notes.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("original")
+        os.chmod(path, 0o640)
+
+        def broken():
+            yield "partial "
+            raise IOError("disk full")
+
+        try:
+            write_atomic(path, broken())
+            assert False, "expected failure"
+        except IOError:
+            pass
+        assert _read(path) == "original" and os.listdir(tmp) == ["notes.txt"]
+
+        backup, written = write_atomic(path, ("chunk %d " % i for i in range(1000)))
+        assert backup is None and written == os.path.getsize(path)
+        assert _read(path).startswith("chunk 0 chunk 1 ")
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+
+def test_rollback_restores_original():
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = ExecutionContext(tmp)
+        path = os.path.join(tmp, "notes.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("original")
+
+        tx = Journal(os.path.join(tmp, ".journal")).begin()
+        action = WriteTextAction(ctx, "notes.txt", io.StringIO("new content"))
+        action.journal = tx
+        action.execute()
+        assert _read(path) == "new content"
+        action.rollback()
+        tx.abort()
+        assert _read(path) == "original" and sorted(os.listdir(tmp)) == [".journal", "notes.txt"]
+
+
+def test_new_file_gets_default_mode():
+    with tempfile.TemporaryDirectory() as tmp:
+        old = os.umask(0o022)
+        try:
+            write_atomic(os.path.join(tmp, "new.txt"), "x")
+        finally:
+            os.umask(old)
+        assert stat.S_IMODE(os.stat(os.path.join(tmp, "new.txt")).st_mode) == 0o644
+        assert os.listdir(tmp) == ["new.txt"]
+
+
+if __name__ == "__main__":
+    test_sources_are_streamed()
+    test_crash_mid_write_keeps_original()
+    test_rollback_restores_original()
+    test_new_file_gets_default_mode()
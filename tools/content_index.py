@@ -0,0 +1,400 @@
+# tools/content_index.py
+"""
+🔤 Content Index - فهرس نصي كامل لمحتوى الملفات (SQLite FTS5)
+يُغذّى من أحداث SystemMonitor: فقط الملفات التي تغيرت يُعاد تقطيعها.
+- Workers قليلة تقرأ وتفك ترميز الملفات (بحد أقصى للحجم)
+- Thread كاتب واحد يجمع التحديثات في Transactions
+- البحث باتصال منفصل (WAL) فلا ينتظر الكاتب
+- الفهرسة تتوقف مؤقتاً أثناء معالجة أوامر المستخدم (pause_indexing)
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterable, Optional
+from watch.filters import PathFilter, get_default_filter
+
+TEXT_EXTENSIONS = {
+    ".txt", ".md", ".markdown", ".rst", ".log", ".csv", ".tsv", ".json", ".xml", ".html",
+    ".htm", ".ini", ".cfg", ".conf", ".yaml", ".yml", ".toml", ".tex", ".srt",
+    ".py", ".js", ".ts", ".java", ".c", ".h", ".cpp", ".hpp", ".cs", ".go", ".rs",
+    ".php", ".rb", ".sql", ".sh", ".bat", ".ps1", ".css",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    name, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# ===== الإيقاف المؤقت أثناء الأوامر التفاعلية =====
+
+_interactive_lock = threading.Lock()
+_interactive_count = 0
+_indexing_allowed = threading.Event()
+_indexing_allowed.set()
+
+
+@contextmanager
+def pause_indexing():
+    """أثناء هذا السياق لا تقرأ الـ Workers أي ملف جديد (يُستخدم حول Orchestrator.process)"""
+    global _interactive_count
+    with _interactive_lock:
+        _interactive_count += 1
+        _indexing_allowed.clear()
+    try:
+        yield
+    finally:
+        with _interactive_lock:
+            _interactive_count -= 1
+            if _interactive_count == 0:
+                _indexing_allowed.set()
+
+
+def _decode(data: bytes) -> Optional[str]:
+    """فك الترميز (UTF-8 ثم UTF-16 بـ BOM ثم Windows-1256 للعربية)؛ None للملفات الثنائية"""
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16", errors="replace")
+    if b"\x00" in data[:8192]:
+        return None
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1256", errors="replace")
+
+
+def _fts_query(text: str) -> str:
+    """نص المستخدم -> استعلام FTS5 آمن (كل كلمة مطلوبة، مع مطابقة البادئة)"""
+    terms = ["".join(ch for ch in word if ch.isalnum() or ch == "_") for word in text.split()]
+    return " ".join(f'"{t}"*' for t in terms if t)
+
+
+class ContentIndex:
+    def __init__(self, db_path: str = "content_index.db", max_file_size: int = 2 * 1024 * 1024,
+                 workers: int = 2, max_pending: int = 50_000, batch_size: int = 200,
+                 path_filter: Optional[PathFilter] = None):
+        self.db_path = db_path
+        self.max_file_size = max_file_size
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.path_filter = path_filter or get_default_filter()
+        self.roots: list[str] = []
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        # البصمات المعروفة (لتجاوز الملفات التي لم تتغير بدون فتحها)
+        self._known: dict[str, tuple[int, int]] = {
+            path: (size, mtime) for path, size, mtime in
+            self._db.execute("SELECT path, size, mtime_ns FROM files")
+        }
+
+        # path -> "index" | "delete" | "delete_tree" | "crawl" (أحداث متكررة لنفس المسار تندمج)
+        self._pending: "OrderedDict[str, str]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._writes: "queue.Queue[tuple]" = queue.Queue(maxsize=batch_size * 4)
+        self._running = True
+        self._readers = threading.local()
+        self._reader_conns: list[sqlite3.Connection] = []  # تُغلق في close()
+        self._stats_lock = threading.Lock()  # القراءة والكتابة والمستدعي يعدلون العدادات
+        self.stats = {
+            "indexed": 0, "deleted": 0, "unchanged": 0, "too_large": 0, "binary": 0,
+            "errors": 0, "dropped": 0, "bytes": 0, "batches": 0,
+        }
+
+        self._threads = [threading.Thread(target=self._writer_loop, daemon=True)]
+        self._threads += [threading.Thread(target=self._reader_loop, daemon=True)
+                          for _ in range(workers)]
+        for t in self._threads:
+            t.start()
+        atexit.register(self.close)
+
+    # ===== الأحداث =====
+
+    def on_fs_event(self, event_type: str, path: str, is_directory: bool = False,
+                    dest_path: Optional[str] = None):
+        """مستمع SystemMonitor (add_listener)"""
+        if event_type == "moved":
+            self.on_fs_event("deleted", path, is_directory)
+            if dest_path:
+                self.on_fs_event("created", dest_path, is_directory)
+            return
+        if is_directory:
+            if event_type == "deleted":
+                self._enqueue(os.path.join(path, ""), "delete_tree")
+            elif event_type == "created":
+                # مجلد منقول/مفكوك: محتواه لن يصل كأحداث. المسح (os.walk) على Workers القراءة
+                # لا في Thread الـ watchdog
+                self._enqueue(os.path.join(path, ""), "crawl")
+            return
+        if event_type == "deleted":
+            if path in self._known:
+                self._enqueue(path, "delete")
+        elif self._wanted(path):
+            self._enqueue(path, "index")
+
+    def attach(self, monitor):
+        """ربط الفهرس بـ SystemMonitor ليبقى محدثاً"""
+        monitor.add_listener(self.on_fs_event)
+
+    def _wanted(self, path: str) -> bool:
+        ext = os.path.splitext(path)[1].lower()
+        return ext in TEXT_EXTENSIONS and not self.path_filter.is_ignored(path)
+
+    def _enqueue(self, path: str, op: str):
+        with self._cond:
+            if path in self._pending:
+                # مجلد حُذف ثم أُنشئ قبل معالجته: المسح يحذف أيضاً ما لم يعد موجوداً تحته
+                if op == "crawl" and self._pending[path] in ("delete_tree", "recrawl"):
+                    op = "recrawl"
+                self._pending.move_to_end(path)
+            elif len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)  # الأقدم يخرج؛ المسح التالي سيلتقطه
+                self._count("dropped")
+            self._pending[path] = op
+            self._cond.notify()
+
+    def index_tree(self, roots: Iterable[str]):
+        """مسح أولي: جدولة الملفات الجديدة/المتغيرة وحذف ما اختفى"""
+        self.roots = [os.path.normpath(str(r)) for r in roots]
+        seen: set[str] = set()
+        for root in self.roots:
+            self._crawl(root, seen)
+        prefixes = tuple(os.path.join(r, "") for r in self.roots)
+        for path in list(self._known):
+            if path.startswith(prefixes) and path not in seen:
+                self._enqueue(path, "delete")
+
+    def _crawl(self, root: str, seen: Optional[set] = None, prune: bool = False):
+        """جدولة ملفات root؛ prune=True: حذف المفهرس تحته الذي لم يعد موجوداً"""
+        if prune and seen is None:
+            seen = set()
+        for folder, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not self.path_filter.is_ignored(os.path.join(folder, d))]
+            for name in files:
+                path = os.path.join(folder, name)
+                if seen is not None:
+                    seen.add(path)
+                if self._wanted(path):
+                    self._enqueue(path, "index")
+        if prune:
+            prefix = os.path.join(root, "")
+            for path in list(self._known):
+                if path.startswith(prefix) and path not in seen:
+                    self._enqueue(path, "delete")
+
+    # ===== القراءة (Workers) =====
+
+    def _next_job(self) -> Optional[tuple[str, str]]:
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait()
+            if not self._running:
+                return None
+            self._inflight += 1
+            return self._pending.popitem(last=False)
+
+    def _reader_loop(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)  # Linux: لكل Thread
+        except (AttributeError, OSError):
+            pass
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            path, op = job
+            _indexing_allowed.wait()  # بعد أخذ المهمة: Worker كان ينتظر قبل الإيقاف لا يتجاوزه
+            try:
+                if op in ("crawl", "recrawl"):
+                    self._crawl(os.path.normpath(path), prune=op == "recrawl")
+                    record = None
+                else:
+                    record = self._read(path) if op == "index" else (op, path)
+                if record is not None:
+                    self._writes.put(record)  # مسدود إذا تأخر الكاتب (Backpressure)
+            except Exception as e:
+                self._count("errors")
+                print(f"⚠️ Content index read error ({path}): {e}")
+            finally:
+                with self._cond:
+                    self._inflight -= 1
+                    self._cond.notify_all()
+
+    def _read(self, path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return ("delete", path) if path in self._known else None
+        fingerprint = (st.st_size, st.st_mtime_ns)
+        if self._known.get(path) == fingerprint:
+            self._count("unchanged")
+            return None
+        if st.st_size > self.max_file_size:
+            self._count("too_large")
+            return ("delete", path) if path in self._known else None
+        with open(path, "rb") as f:
+            data = f.read(self.max_file_size + 1)
+        text = _decode(data)
+        if text is None:
+            self._count("binary")
+            return None
+        self._count("bytes", len(data))
+        return ("index", path, fingerprint, os.path.basename(path), text)
+
+    # ===== الكتابة (Thread واحد) =====
+
+    def _writer_loop(self):
+        while self._running or not self._writes.empty():
+            try:
+                first = self._writes.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + 0.2
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            except Exception as e:
+                self._count("errors")
+                print(f"⚠️ Content index write error: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+                with self._cond:
+                    self._cond.notify_all()
+
+    def _apply(self, batch: list[tuple]):
+        db = self._db
+        with db:  # Transaction واحدة للدفعة
+            for record in batch:
+                op, path = record[0], record[1]
+                if op == "delete_tree":
+                    rows = db.execute("SELECT id, path FROM files WHERE path >= ? AND path < ?",
+                                      (path, path + "\U0010ffff")).fetchall()
+                    for row_id, file_path in rows:
+                        self._delete_row(row_id, file_path)
+                    continue
+                row = db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+                if op == "delete":
+                    if row:
+                        self._delete_row(row[0], path)
+                    continue
+
+                _, _, (size, mtime_ns), name, text = record
+                if row:
+                    row_id = row[0]
+                    db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                               (size, mtime_ns, row_id))
+                    db.execute("DELETE FROM docs WHERE rowid = ?", (row_id,))
+                else:
+                    row_id = db.execute("INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                                        (path, size, mtime_ns)).lastrowid
+                db.execute("INSERT INTO docs (rowid, name, body) VALUES (?, ?, ?)",
+                           (row_id, name, text))
+                self._known[path] = (size, mtime_ns)
+                self._count("indexed")
+        self._count("batches")
+
+    def _delete_row(self, row_id: int, path: str):
+        self._db.execute("DELETE FROM docs WHERE rowid = ?", (row_id,))
+        self._db.execute("DELETE FROM files WHERE id = ?", (row_id,))
+        self._known.pop(path, None)
+        self._count("deleted")
+
+    # ===== البحث =====
+
+    def search(self, query: str, limit: int = 20, root: Optional[str] = None) -> list[tuple[str, str]]:
+        """(المسار، مقتطف) مرتبة حسب الصلة (bm25)"""
+        match = _fts_query(query)
+        if not match:
+            return []
+        sql = ("SELECT files.path, snippet(docs, 1, '«', '»', '…', 12) FROM docs "
+               "JOIN files ON files.id = docs.rowid WHERE docs MATCH ?")
+        params: list = [match]
+        if root:
+            prefix = os.path.join(os.path.normpath(root), "")
+            sql += " AND files.path >= ? AND files.path < ?"
+            params += [prefix, prefix + "\U0010ffff"]
+        sql += " ORDER BY bm25(docs, 5.0, 1.0) LIMIT ?"
+        params.append(limit)
+
+        # اتصال قراءة مستقل لكل Thread: WAL يسمح بالقراءة أثناء كتابة الـ Thread الكاتب
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            # check_same_thread=False: يُغلق من close() في Thread آخر
+            conn = self._readers.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            with self._stats_lock:
+                self._reader_conns.append(conn)
+        return conn.execute(sql, params).fetchall()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """انتظار انتهاء كل الأعمال المعلقة (للاختبارات والقياس)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._inflight or self._writes.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=0.05 if remaining is None else min(remaining, 0.05))
+        return True
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            pending = len(self._pending)
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {**stats, "files": len(self._known), "pending": pending}
+
+    def close(self):
+        if not self._running:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=2)
+        with self._stats_lock:
+            conns, self._reader_conns = self._reader_conns, []
+        for conn in conns:
+            conn.close()
+        self._db.close()
+
+
+_content_index: Optional[ContentIndex] = None
+_content_index_lock = threading.Lock()
+
+def get_content_index() -> ContentIndex:
+    """فهرس محتوى سطح المكتب والمستندات والتنزيلات (المسح الأولي في الخلفية ثم أحداث SystemMonitor)"""
+    global _content_index
+    if _content_index is None:
+        with _content_index_lock:
+            if _content_index is None:
+                from tools.file_index import default_roots, watch_roots
+                roots = default_roots()
+                index = ContentIndex()
+                # المراقبة قبل المسح: ملف يتغير أثناءه يُعاد جدولته (نفس المسار يندمج في الطابور)
+                watch_roots(index, roots)
+                threading.Thread(target=index.index_tree, args=(roots,), daemon=True).start()
+                _content_index = index
+    return _content_index
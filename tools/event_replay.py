@@ -0,0 +1,353 @@
+# tools/event_replay.py
+"""
+🎞️ Event Replay - تسجيل أحداث الـ watcher وإعادة تشغيلها لقياس أداء الـ EventBus
+- record: تسجيل أحداث SystemMonitor الحقيقية في ملف JSONL
+- generate: توليد تسجيل اصطناعي (حفظ محرر، فك ضغط، build، تنزيل)
+- replay: دفع الأحداث لـ EventBus.push بالسرعة الأصلية أو مسرَّعة مع Orchestrator وهمي،
+  وقياس أحداث/ث، صحة الـ Debounce، وزمن الوصول (p50/p95/p99)، والمقارنة مع Baseline
+
+python -m tools.event_replay record ~/Downloads --out events.jsonl --seconds 600
+python -m tools.event_replay generate --out events.jsonl
+python -m tools.event_replay replay events.jsonl --speed 10 --save-baseline baseline.json
+python -m tools.event_replay replay events.jsonl --speed 10 --baseline baseline.json
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, Iterator, Optional
+from core.event_bus import EventBatch, EventBus, Event
+from core.jsonl_log import JsonlLog
+
+
+# ===== التسجيل =====
+
+class EventRecorder:
+    """مستمع SystemMonitor يكتب كل حدث مع توقيته النسبي (t بالثواني من بدء التسجيل)"""
+
+    def __init__(self, path: str, flush_every: int = 500):
+        # بدون تدوير: التسجيل الواحد يُقرأ كاملاً عند إعادة التشغيل
+        self.log = JsonlLog(path, max_bytes=0, backup_count=0, compress=False)
+        self.flush_every = flush_every
+        self.count = 0
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def attach(self, monitor):
+        monitor.add_listener(self.on_fs_event)
+
+    def on_fs_event(self, event_type: str, path: str, is_directory: bool = False,
+                    dest_path: Optional[str] = None):
+        record = {"t": round(time.monotonic() - self._start, 6), "type": event_type, "path": path}
+        if is_directory:
+            record["dir"] = True
+        if dest_path:
+            record["dest"] = dest_path
+        with self._lock:
+            self._buffer.append(record)
+            self.count += 1
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        records, self._buffer = self._buffer, []
+        self.log.append(records)
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+
+
+def load_events(path: str) -> list[dict]:
+    """الأحداث التي تصل للـ EventBus فعلاً (ملفات فقط، بدون النقل) مرتبة بالوقت"""
+    log = JsonlLog(path, max_bytes=0, backup_count=0, compress=False)
+    events = [r for r in log.read() if not r.get("dir") and r["type"] != "moved"]
+    events.sort(key=lambda r: r["t"])
+    return events
+
+
+def synthetic_events(seconds: float = 60.0, seed: int = 1) -> Iterator[dict]:
+    """
+    تسجيل اصطناعي بأنماط حقيقية: حفظ متكرر من محرر، فك ضغط أرشيف،
+    مخرجات build متتالية، وتنزيل كبير يُعدَّل باستمرار
+    """
+    rng = random.Random(seed)
+    events = []
+    t = 0.0
+    while t < seconds:
+        kind = rng.choice(("editor", "unzip", "build", "download"))
+        if kind == "editor":
+            path = f"/home/user/Documents/notes_{rng.randrange(20)}.md"
+            for i in range(rng.randrange(2, 6)):
+                events.append({"t": t + i * 0.01, "type": "modified", "path": path})
+        elif kind == "unzip":
+            folder = f"/home/user/Downloads/archive_{int(t)}"
+            for i in range(rng.randrange(50, 300)):
+                events.append({"t": t + i * 0.002, "type": "created", "path": f"{folder}/file_{i}.dat"})
+        elif kind == "build":
+            for i in range(rng.randrange(100, 500)):
+                path = f"/home/user/project/build/obj_{i % 80}.o"
+                events.append({"t": t + i * 0.001, "type": "modified", "path": path})
+        else:
+            path = f"/home/user/Downloads/video_{int(t)}.mp4"
+            events.append({"t": t, "type": "created", "path": path})
+            for i in range(1, rng.randrange(20, 60)):
+                events.append({"t": t + i * 0.05, "type": "modified", "path": path})
+        t += rng.uniform(0.5, 3.0)
+    events.sort(key=lambda r: r["t"])
+    return iter(events)
+
+
+# ===== إعادة التشغيل =====
+
+class StubOrchestrator:
+    """بديل Orchestrator: يسجل وقت تسليم كل حدث ويحاكي تكلفة المعالجة"""
+
+    def __init__(self, work_seconds: float = 0.0):
+        self.work_seconds = work_seconds
+        self.deliveries: list[tuple[float, Event]] = []
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def process_event_batch(self, batch: EventBatch):
+        now = time.time()
+        with self._lock:
+            self.batches += 1
+            self.deliveries.extend((now, e) for e in batch.events)
+        if self.work_seconds:
+            time.sleep(self.work_seconds)
+
+    def on_event(self, event: Event):
+        now = time.time()
+        with self._lock:
+            self.deliveries.append((now, event))
+        if self.work_seconds:
+            time.sleep(self.work_seconds)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def replay(events: Iterable[dict], speed: float = 1.0, debounce: float = 0.5,
+           batch_window: Optional[float] = 1.0, work_seconds: float = 0.0,
+           drain_timeout: float = 60.0, **bus_kwargs) -> dict:
+    """
+    دفع الأحداث لـ EventBus جديد وقياس النتيجة.
+    speed: 1 = التوقيت الأصلي، 10 = أسرع بعشر مرات، 0 = بأقصى سرعة.
+    batch_window: None = callback لكل حدث بدل الدفعات.
+    """
+    bus_kwargs.setdefault("suppress_seconds", 0)  # نقيس الـ Debounce وحده
+    bus = EventBus(debounce_seconds=debounce, **bus_kwargs)
+    stub = StubOrchestrator(work_seconds)
+    if batch_window is None:
+        bus.set_callback(stub.on_event)
+    else:
+        bus.set_batch_callback(stub.process_event_batch, window=batch_window)
+    bus.start()
+
+    pushes: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, int] = defaultdict(int)
+    start = time.monotonic()
+    count = 0
+    for record in events:
+        if speed > 0:
+            delay = start + record["t"] / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        pushes[record["path"]].append(time.time())
+        statuses[bus.push(record["type"], record["path"])] += 1
+        count += 1
+    push_seconds = time.monotonic() - start
+
+    # انتظار التسليم: هدوء كامل = لا Debounce ولا طابور ولا callbacks معلقة
+    deadline = time.monotonic() + drain_timeout
+    while time.monotonic() < deadline:
+        m = bus.get_metrics()
+        if not (m["queue_depth"] or m["debouncing"] or m["callbacks_pending"] or m["callbacks_running"]):
+            time.sleep((batch_window or 0) + 0.05)
+            m = bus.get_metrics()
+            if not (m["queue_depth"] or m["debouncing"] or m["callbacks_pending"] or m["callbacks_running"]):
+                break
+        time.sleep(0.02)
+    total_seconds = time.monotonic() - start
+    bus_metrics = bus.get_metrics()
+    bus.stop()
+
+    return _report(count, push_seconds, total_seconds, pushes, statuses, stub, debounce, bus_metrics)
+
+
+def _report(count, push_seconds, total_seconds, pushes, statuses, stub, debounce, bus_metrics) -> dict:
+    # صحة الـ Debounce: كل "دفقة" لمسار (أحداث تفصلها فجوات أقل من النافذة) = تسليم واحد
+    # لآخر حدث فيها، لا قبل أن يهدأ المسار
+    expected = 0
+    burst_ends: dict[str, list[float]] = {}
+    for path, times in pushes.items():
+        ends = [a for a, b in zip(times, times[1:]) if b - a > debounce] + [times[-1]]
+        burst_ends[path] = ends
+        expected += len(ends)
+
+    delivered_by_path: dict[str, list[tuple[float, Event]]] = defaultdict(list)
+    for delivered_at, event in stub.deliveries:
+        delivered_by_path[event.path].append((delivered_at, event))
+
+    latencies, early, stale = [], 0, 0
+    for path, deliveries in delivered_by_path.items():
+        ends = burst_ends.get(path, [])
+        for delivered_at, event in deliveries:
+            latencies.append(delivered_at - event.timestamp)
+            if delivered_at - event.timestamp < debounce * 0.9:
+                early += 1  # سُلِّم قبل انتهاء نافذة الهدوء
+            if not any(abs(event.timestamp - end) < 1e-3 for end in ends):
+                stale += 1  # ليس آخر حدث في دفقته
+    missing = sum(1 for path in pushes if path not in delivered_by_path)
+    delivered = len(stub.deliveries)
+
+    return {
+        "events": count,
+        "paths": len(pushes),
+        "push_events_per_sec": count / push_seconds if push_seconds else 0.0,
+        "events_per_sec": count / total_seconds if total_seconds else 0.0,
+        "seconds": total_seconds,
+        "statuses": dict(statuses),
+        "debounce": {
+            "expected": expected,
+            "delivered": delivered,
+            "duplicates": max(0, delivered - expected),
+            "missing_paths": missing,
+            "early": early,
+            "stale": stale,
+            "ok": missing == 0 and early == 0 and delivered <= expected,
+        },
+        "latency": {
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies, default=0.0),
+        },
+        "batches": stub.batches,
+        "bus": {k: v for k, v in bus_metrics.items() if k != "lanes"},
+    }
+
+
+# ===== المقارنة مع Baseline =====
+
+COMPARED = (
+    ("events_per_sec", True),
+    ("push_events_per_sec", True),
+    ("latency.p50", False),
+    ("latency.p95", False),
+    ("latency.p99", False),
+    ("debounce.duplicates", False),
+    ("debounce.missing_paths", False),
+)
+
+
+def _lookup(report: dict, key: str):
+    for part in key.split("."):
+        report = report[part]
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.10) -> list[str]:
+    """قائمة التراجعات (أسوأ من الـ Baseline بأكثر من tolerance)"""
+    regressions = []
+    for key, higher_is_better in COMPARED:
+        new, old = _lookup(report, key), _lookup(baseline, key)
+        print(f"   {key:<26} {old:>14,.4f} -> {new:>14,.4f}")
+        if higher_is_better and new < old * (1 - tolerance):
+            regressions.append(key)
+        elif not higher_is_better and new > old * (1 + tolerance) + 1e-3:
+            regressions.append(key)
+    return regressions
+
+
+def _print_report(report: dict):
+    d, lat = report["debounce"], report["latency"]
+    print(f"📤 {report['events']:,} events / {report['paths']:,} paths in {report['seconds']:.2f}s "
+          f"({report['events_per_sec']:,.0f} events/sec, push {report['push_events_per_sec']:,.0f}/sec)")
+    print(f"⏱️ Latency p50={lat['p50'] * 1000:.0f}ms p95={lat['p95'] * 1000:.0f}ms "
+          f"p99={lat['p99'] * 1000:.0f}ms max={lat['max'] * 1000:.0f}ms")
+    print(f"{'✅' if d['ok'] else '❌'} Debounce: expected={d['expected']:,} delivered={d['delivered']:,} "
+          f"duplicates={d['duplicates']} missing={d['missing_paths']} early={d['early']} stale={d['stale']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record / replay watcher event streams")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record")
+    rec.add_argument("path")
+    rec.add_argument("--out", default="events.jsonl")
+    rec.add_argument("--seconds", type=float, default=300)
+
+    gen = sub.add_parser("generate")
+    gen.add_argument("--out", default="events.jsonl")
+    gen.add_argument("--seconds", type=float, default=60)
+    gen.add_argument("--seed", type=int, default=1)
+
+    rep = sub.add_parser("replay")
+    rep.add_argument("file")
+    rep.add_argument("--speed", type=float, default=1.0)
+    rep.add_argument("--debounce", type=float, default=0.5)
+    rep.add_argument("--batch-window", type=float, default=1.0)
+    rep.add_argument("--no-batch", action="store_true")
+    rep.add_argument("--work", type=float, default=0.0, help="تكلفة المعالجة الوهمية لكل callback")
+    rep.add_argument("--workers", type=int, default=4)
+    rep.add_argument("--baseline")
+    rep.add_argument("--save-baseline")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        from watch.watcher import SystemMonitor
+        monitor = SystemMonitor(args.path, use_event_bus=False)
+        monitor.set_callback(lambda *_: None)
+        recorder = EventRecorder(args.out)
+        recorder.attach(monitor)
+        monitor.start()
+        try:
+            time.sleep(args.seconds)
+        except KeyboardInterrupt:
+            pass
+        monitor.stop()
+        recorder.close()
+        print(f"🎞️ Recorded {recorder.count:,} events -> {args.out}")
+        return 0
+
+    if args.command == "generate":
+        log = JsonlLog(args.out, max_bytes=0, backup_count=0, compress=False)
+        n = log.append(synthetic_events(args.seconds, args.seed))
+        print(f"🎞️ Generated {n:,} events -> {args.out}")
+        return 0
+
+    report = replay(
+        load_events(args.file), speed=args.speed, debounce=args.debounce,
+        batch_window=None if args.no_batch else args.batch_window,
+        work_seconds=args.work, callback_workers=args.workers,
+    )
+    _print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved -> {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("📊 Baseline comparison:")
+        regressions = compare(report, baseline)
+        if regressions:
+            print(f"❌ Regressions: {', '.join(regressions)}")
+            return 1
+        print("✅ No regressions")
+    return 0 if report["debounce"]["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
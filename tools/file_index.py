@@ -0,0 +1,502 @@
+# tools/file_index.py
+"""
+📇 File Index - فهرس أسماء الملفات في الذاكرة
+يُبنى بمسح واحد (os.scandir) للمجلدات المراقبة ويبقى محدثاً من أحداث SystemMonitor.
+يجيب عن البحث بالبادئة و glob والبحث التقريبي (fuzzy) خلال أجزاء من الثانية،
+ويُحفظ كلقطة مضغوطة على القرص لتشغيل سريع.
+
+التخزين:
+- المجلدات مخزنة مرة واحدة (interned) وكل ملف = (اسم، رقم المجلد الأب)
+- الأسماء بأحرف صغيرة مرتبة في نص واحد (سطر لكل اسم) للبحث الثنائي والـ Regex
+- الإضافات الجديدة تذهب لذيل صغير غير مرتب، ويُعاد الترتيب عندما يكبر
+"""
+import atexit
+import gzip
+import json
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator, Optional
+from watch.filters import PathFilter, get_default_filter, glob_to_regex
+
+SNAPSHOT_VERSION = 1
+
+
+class FileIndex:
+    def __init__(self, snapshot_path: Optional[str] = "file_index.json.gz",
+                 path_filter: Optional[PathFilter] = None, rebuild_threshold: int = 4096):
+        self.snapshot_path = snapshot_path
+        self.path_filter = path_filter or get_default_filter()
+        self.rebuild_threshold = rebuild_threshold
+        self.roots: list[str] = []
+
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._replay: Optional[list[tuple]] = None  # أحداث تصل أثناء إعادة المسح
+        self._saved_version = 0
+        self._version = 0
+        self._reset()
+
+    def _reset(self):
+        # المجلدات
+        self._dirs: list[Optional[str]] = []
+        self._dir_ids: dict[str, int] = {}
+        self._children: list[dict[str, int]] = []  # لكل مجلد: الاسم -> رقم المدخل
+        self._free_dirs: list[int] = []
+        # المدخلات (ملفات ومجلدات)
+        self._names: list[Optional[str]] = []
+        self._parent = array("i")
+        self._is_dir = bytearray()
+        self._free: list[int] = []
+        self._count = 0
+        # الجزء المرتب + الذيل
+        self._blob = ""
+        self._line_starts = array("q")
+        self._sorted_idx = array("i")
+        self._tail: set[int] = set()
+        self._base_dead = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ===== البناء =====
+
+    def start(self, roots: Iterable[str], rescan: bool = True):
+        """تحميل اللقطة (إن وجدت لنفس المجلدات) ثم إعادة المسح في الخلفية"""
+        roots = [os.path.normpath(str(r)) for r in roots]
+        if self.load() and self.roots == roots:
+            self._ready.set()
+        else:
+            with self._lock:
+                self._reset()
+        self.roots = roots
+        if rescan or not self._ready.is_set():
+            with self._lock:
+                self._replay = []
+            threading.Thread(target=self._scan_worker, args=(roots,), daemon=True).start()
+        atexit.register(self.save)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def build(self, roots: Iterable[str]):
+        """مسح متزامن كامل (بدون لقطة)"""
+        with self._lock:
+            self._reset()
+            self.roots = [os.path.normpath(str(r)) for r in roots]
+            for root in self.roots:
+                self._walk(root)
+            self._rebuild()
+            self._version += 1
+        self._ready.set()
+
+    def _scan_worker(self, roots: list[str]):
+        fresh = FileIndex(snapshot_path=None, path_filter=self.path_filter,
+                          rebuild_threshold=self.rebuild_threshold)
+        try:
+            fresh.build(roots)
+        except Exception as e:
+            print(f"⚠️ File index scan failed: {e}")
+            with self._lock:
+                self._replay = None
+            self._ready.set()
+            return
+
+        with self._lock:
+            for name in ("_dirs", "_dir_ids", "_children", "_free_dirs", "_names", "_parent",
+                         "_is_dir", "_free", "_count", "_blob", "_line_starts",
+                         "_sorted_idx", "_tail", "_base_dead"):
+                setattr(self, name, getattr(fresh, name))
+            replay, self._replay = self._replay or [], None
+            for args in replay:
+                self._apply(*args)
+            self._version += 1
+        self._ready.set()
+        print(f"📇 File index ready: {len(self):,} entries")
+        self.save()
+
+    def _walk(self, root: str):
+        """مسح بـ os.scandir (بدون تتبع الروابط الرمزية)"""
+        if not os.path.isdir(root):
+            return
+        self._intern_dir(root)
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            pid = self._dir_ids.get(folder)
+            if pid is None:
+                continue
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if self.path_filter.is_ignored(entry.path):
+                            continue
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        self._add_child(pid, entry.name, is_dir)
+                        if is_dir:
+                            self._intern_dir(entry.path)
+                            stack.append(entry.path)
+            except OSError:
+                continue  # صلاحيات أو مجلد حُذف أثناء المسح
+
+    # ===== التعديل =====
+
+    def _intern_dir(self, path: str) -> int:
+        did = self._dir_ids.get(path)
+        if did is None:
+            if self._free_dirs:
+                did = self._free_dirs.pop()
+                self._dirs[did] = path
+                self._children[did] = {}
+            else:
+                did = len(self._dirs)
+                self._dirs.append(path)
+                self._children.append({})
+            self._dir_ids[path] = did
+        return did
+
+    def _add_child(self, pid: int, name: str, is_dir: bool):
+        children = self._children[pid]
+        idx = children.get(name)
+        if idx is not None:
+            self._is_dir[idx] = is_dir
+            return
+        if self._free:
+            idx = self._free.pop()
+            self._names[idx] = name
+            self._parent[idx] = pid
+            self._is_dir[idx] = is_dir
+        else:
+            idx = len(self._names)
+            self._names.append(name)
+            self._parent.append(pid)
+            self._is_dir.append(is_dir)
+        children[name] = idx
+        self._tail.add(idx)
+        self._count += 1
+
+    def _remove_child(self, pid: int, name: str):
+        idx = self._children[pid].pop(name, None)
+        if idx is None:
+            return
+        if self._is_dir[idx]:
+            self._remove_tree(os.path.join(self._dirs[pid], name))
+        self._names[idx] = None
+        if idx in self._tail:
+            self._tail.discard(idx)
+        else:
+            self._base_dead += 1
+        self._free.append(idx)
+        self._count -= 1
+
+    def _remove_tree(self, path: str):
+        did = self._dir_ids.pop(path, None)
+        if did is None:
+            return
+        for name in list(self._children[did]):
+            self._remove_child(did, name)
+        self._dirs[did] = None
+        self._free_dirs.append(did)
+
+    def add(self, path: str, is_dir: bool = False):
+        path = os.path.normpath(path)
+        with self._lock:
+            parent, name = os.path.split(path)
+            self._add_child(self._intern_dir(parent), name, is_dir)
+            if is_dir:
+                self._intern_dir(path)
+                self._walk(path)  # مجلد منقول/مفكوك قد يحتوي ملفات مسبقاً
+            self._version += 1
+
+    def remove(self, path: str):
+        path = os.path.normpath(path)
+        with self._lock:
+            parent, name = os.path.split(path)
+            pid = self._dir_ids.get(parent)
+            if pid is not None:
+                self._remove_child(pid, name)
+            self._version += 1
+
+    def on_fs_event(self, event_type: str, path: str, is_directory: bool = False,
+                    dest_path: Optional[str] = None):
+        """مستمع SystemMonitor (add_listener)"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((event_type, path, is_directory, dest_path))
+            self._apply(event_type, path, is_directory, dest_path)
+
+    def _apply(self, event_type: str, path: str, is_directory: bool, dest_path: Optional[str]):
+        if event_type == "created":
+            self.add(path, is_directory)
+        elif event_type == "deleted":
+            self.remove(path)
+        elif event_type == "moved":
+            self.remove(path)
+            if dest_path and not self.path_filter.is_ignored(dest_path):
+                self.add(dest_path, is_directory)
+
+    def attach(self, monitor):
+        """ربط الفهرس بـ SystemMonitor ليبقى محدثاً"""
+        monitor.add_listener(self.on_fs_event)
+
+    # ===== الترتيب =====
+
+    def _maybe_rebuild(self):
+        if len(self._tail) > self.rebuild_threshold or \
+                self._base_dead > max(self.rebuild_threshold, len(self._sorted_idx) // 4):
+            self._rebuild()
+
+    def _rebuild(self):
+        """ترتيب كل الأسماء الحية في نص واحد (سطر لكل اسم)"""
+        live = sorted((name.lower(), i) for i, name in enumerate(self._names) if name is not None)
+        self._blob = "\n".join(key for key, _ in live) + "\n"
+        self._sorted_idx = array("i", (i for _, i in live))
+        starts = array("q")
+        pos = 0
+        for key, _ in live:
+            starts.append(pos)
+            pos += len(key) + 1
+        self._line_starts = starts
+        self._tail = set()
+        self._base_dead = 0
+
+    def _line_at(self, offset: int) -> int:
+        return bisect_right(self._line_starts, offset) - 1
+
+    def _key(self, line: int) -> str:
+        start = self._line_starts[line]
+        return self._blob[start:self._blob.index("\n", start)]
+
+    def _base_entry(self, line: int) -> Optional[int]:
+        """رقم المدخل لسطر في الجزء المرتب (None إذا حُذف أو أُعيد استخدامه)"""
+        idx = self._sorted_idx[line]
+        if self._names[idx] is None or idx in self._tail:
+            return None
+        return idx
+
+    # ===== البحث =====
+
+    def path_of(self, idx: int) -> str:
+        return os.path.join(self._dirs[self._parent[idx]], self._names[idx])
+
+    def find(self, query: str, limit: int = 20, root: Optional[str] = None) -> list[str]:
+        """
+        بحث بالاسم: glob إذا احتوى * أو ? أو [..]،
+        وإلا ترتيب: يبدأ بالنص ثم يحتويه ثم تقريبي (الأحرف بالترتيب)
+        """
+        q = query.strip().lower()
+        if not q:
+            return []
+        root = os.path.join(os.path.normpath(root), "") if root else None
+
+        with self._lock:
+            self._maybe_rebuild()
+            if any(c in q for c in "*?["):
+                tiers = [self._glob(q)]
+            else:
+                tiers = [self._prefix(q), self._substring(q), self._fuzzy(q)]
+
+            seen: set[int] = set()
+            results: list[str] = []
+            for tier in tiers:
+                ranked = []
+                for idx in tier:
+                    if idx in seen:
+                        continue
+                    seen.add(idx)
+                    path = self.path_of(idx)
+                    if root and not path.startswith(root):
+                        continue
+                    ranked.append((len(self._names[idx]), path))
+                    if len(ranked) >= limit * 20:
+                        break
+                ranked.sort()
+                results.extend(path for _, path in ranked)
+                if len(results) >= limit:
+                    break
+            return results[:limit]
+
+    def _tail_matches(self, predicate) -> Iterator[int]:
+        for idx in self._tail:
+            if predicate(self._names[idx].lower()):
+                yield idx
+
+    def _lower_bound(self, key: str) -> int:
+        lo, hi = 0, len(self._line_starts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _prefix_range(self, q: str) -> tuple[int, int]:
+        """أسطر الجزء المرتب التي تبدأ بـ q (بحثان ثنائيان)"""
+        return self._lower_bound(q), self._lower_bound(q + "\U0010ffff")
+
+    def _prefix(self, q: str) -> Iterator[int]:
+        lo, hi = self._prefix_range(q)
+        for line in range(lo, hi):
+            idx = self._base_entry(line)
+            if idx is not None:
+                yield idx
+        yield from self._tail_matches(lambda name: name.startswith(q))
+
+    def _scan(self, regex: "re.Pattern", lo: int = 0, hi: Optional[int] = None) -> Iterator[int]:
+        """مطابقة Regex على النص المجمع (أو على نطاق أسطر [lo, hi))"""
+        end = len(self._blob) if hi is None or hi >= len(self._line_starts) else self._line_starts[hi]
+        start = self._line_starts[lo] if lo < len(self._line_starts) else end
+        last = -1
+        for m in regex.finditer(self._blob, start, end):
+            line = self._line_at(m.start())
+            if line == last:
+                continue
+            last = line
+            idx = self._base_entry(line)
+            if idx is not None:
+                yield idx
+
+    def _substring(self, q: str) -> Iterator[int]:
+        yield from self._scan(re.compile(re.escape(q)))
+        yield from self._tail_matches(lambda name: q in name)
+
+    def _fuzzy(self, q: str) -> Iterator[int]:
+        chars = [re.escape(c) for c in q if not c.isspace()]
+        if not chars:
+            return
+        # كل فجوة تستثني الحرف التالي (طريقة مطابقة واحدة)، وبدون ^ يقفز
+        # المحرك مباشرة بين مواضع الحرف الأول بدل فحص كل سطر
+        regex = re.compile(chars[0] + "".join(f"[^\n{c}]*{c}" for c in chars[1:]))
+        yield from self._scan(regex)
+        yield from self._tail_matches(lambda name: regex.search(name) is not None)
+
+    def _glob(self, q: str) -> Iterator[int]:
+        line_regex = re.compile("^" + glob_to_regex(q, sep="/\n") + "$", re.MULTILINE)
+        head, *rest = re.split(r"[*?[]", q, maxsplit=1)
+        if head and rest:
+            # بداية ثابتة: المطابقة داخل النطاق المرتب فقط (بحث ثنائي)
+            yield from self._scan(line_regex, *self._prefix_range(head))
+        else:
+            literal = max(re.split(r"[*?]|\[[^\]]*\]", q), key=len)
+            if len(literal) < 2:
+                yield from self._scan(line_regex)
+            else:
+                # أطول جزء ثابت: بحث نصي سريع ثم مطابقة السطر المرشح فقط
+                regex = re.compile(glob_to_regex(q, sep="/\n"))
+                last = -1
+                for m in re.finditer(re.escape(literal), self._blob):
+                    line = self._line_at(m.start())
+                    if line == last:
+                        continue
+                    last = line
+                    idx = self._base_entry(line)
+                    if idx is not None and regex.fullmatch(self._key(line)):
+                        yield idx
+        yield from self._tail_matches(lambda name: line_regex.fullmatch(name) is not None)
+
+    # ===== اللقطة =====
+
+    def save(self, path: Optional[str] = None):
+        """حفظ لقطة مضغوطة (ذرية: ملف مؤقت ثم استبدال)"""
+        path = path or self.snapshot_path
+        if not path:
+            return
+        with self._lock:
+            if self._version == self._saved_version and os.path.exists(path):
+                return
+            dirs = []
+            for did, folder in enumerate(self._dirs):
+                if folder is None:
+                    continue
+                files, subdirs = [], []
+                for name, idx in self._children[did].items():
+                    (subdirs if self._is_dir[idx] else files).append(name)
+                dirs.append([folder, files, subdirs])
+            payload = {"version": SNAPSHOT_VERSION, "roots": self.roots, "dirs": dirs}
+            version = self._version
+
+        tmp = path + ".tmp"
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+            self._saved_version = version
+        except Exception as e:
+            print(f"⚠️ Failed to save file index: {e}")
+
+    def load(self, path: Optional[str] = None) -> bool:
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Failed to load file index: {e}")
+            return False
+        if payload.get("version") != SNAPSHOT_VERSION:
+            return False
+
+        with self._lock:
+            self._reset()
+            self.roots = payload["roots"]
+            for folder, _, _ in payload["dirs"]:
+                self._intern_dir(folder)
+            for folder, files, subdirs in payload["dirs"]:
+                pid = self._dir_ids[folder]
+                for name in files:
+                    self._add_child(pid, name, False)
+                for name in subdirs:
+                    self._add_child(pid, name, True)
+            self._rebuild()
+            self._version = self._saved_version = 1
+        print(f"📇 File index loaded: {len(self):,} entries")
+        return True
+
+
+_file_index: Optional[FileIndex] = None
+_file_index_lock = threading.Lock()
+
+def default_roots() -> list:
+    """سطح المكتب والمستندات والتنزيلات (الموجود منها فقط)"""
+    from core.system_paths import get_system_paths
+    paths = get_system_paths()
+    roots = [paths.desktop_dir, paths.home_dir / "Documents", paths.home_dir / "Downloads"]
+    return [r for r in roots if r.exists()]
+
+
+def _root_monitor(root: str):
+    from watch.watcher import get_root_monitor
+    return get_root_monitor(root)
+
+
+def watch_roots(index, roots) -> int:
+    """ربط فهرس (attach) بمراقب كل جذر ليبقى محدثاً بعد المسح الأول - يرجع عدد الجذور المراقبة"""
+    attached = 0
+    for root in roots:
+        try:
+            index.attach(_root_monitor(str(root)))
+            attached += 1
+        except Exception as e:  # watchdog غير مثبت أو الجذر غير قابل للمراقبة
+            print(f"⚠️ Live index updates disabled for {root}: {e}")
+    return attached
+
+
+def get_file_index() -> FileIndex:
+    """فهرس سطح المكتب والمستندات والتنزيلات (يُبنى عند أول استخدام ويتبع أحداث SystemMonitor)"""
+    global _file_index
+    if _file_index is None:
+        with _file_index_lock:
+            if _file_index is None:
+                roots = default_roots()
+                index = FileIndex()
+                index.start(roots)
+                watch_roots(index, roots)  # أحداث تصل أثناء المسح تُعاد بعده (_replay)
+                _file_index = index
+    return _file_index
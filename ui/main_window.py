@@ -161,6 +161,13 @@ class MainWindow(QMainWindow):
         self.send_btn.clicked.connect(self.send_message)
         self.send_btn.setFixedWidth(100)
         input_layout.addWidget(self.send_btn)
+
+        # ⏹ إلغاء الطلب الجاري (يظهر أثناء المعالجة فقط)
+        self.cancel_btn = QPushButton("⏹ إلغاء")
+        self.cancel_btn.clicked.connect(self.cancel_processing)
+        self.cancel_btn.setFixedWidth(100)
+        self.cancel_btn.setVisible(False)
+        input_layout.addWidget(self.cancel_btn)
         
         layout.addLayout(input_layout)
         
@@ -196,10 +203,16 @@ class MainWindow(QMainWindow):
         # تعطيل الإدخال
         self.input_field.setEnabled(False)
         self.send_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setVisible(True)
         
         # إرسال للـ Worker
-        self.worker.user_input = text
-        self.worker.start()
+        self.worker.process(text)
+
+    def cancel_processing(self):
+        """إلغاء الطلب الجاري"""
+        if self.worker and self.worker.cancel():
+            self.cancel_btn.setEnabled(False)
 
     def toggle_voice(self):
         """تفعيل/تعطيل الصوت التلقائي"""
@@ -286,10 +299,14 @@ class MainWindow(QMainWindow):
         """انتهاء المعالجة"""
         self.input_field.setEnabled(True)
         self.send_btn.setEnabled(True)
+        self.cancel_btn.setVisible(False)
         self.input_field.setFocus()
 
     def closeEvent(self, event):
         """إغلاق النافذة"""
         if self.worker:
             self.worker.stop()
+        # كتابة الذاكرة المعلقة قبل الخروج
+        from core.memory_manager import get_memory
+        get_memory().flush()
         event.accept()
@@ -5,6 +5,7 @@
 """
 from PyQt6.QtCore import QThread, pyqtSignal
 from typing import Optional
+from core.cancellation import CancellationToken
 
 
 class AgentWorker(QThread):
@@ -19,11 +20,16 @@ class AgentWorker(QThread):
         super().__init__()
         self.orchestrator = orchestrator
         self.user_input: Optional[str] = None
+        self.token: Optional[CancellationToken] = None
         self._running = True
+        # تقدم النسخ/النقل يظهر في شريط الحالة (emit آمن من أي Thread)
+        self.orchestrator.context.progress_callback = self.status_update.emit
 
     def process(self, text: str):
         """تعيين النص للمعالجة وبدء الخيط"""
         self.user_input = text
+        # التوكن يُنشأ هنا (خيط الـ GUI) فزر الإلغاء يعمل حتى قبل بدء الخيط
+        self.token = CancellationToken()
         if not self.isRunning():
             self.start()
 
@@ -36,7 +42,7 @@ class AgentWorker(QThread):
             self.status_update.emit("🤔 جاري التفكير...")
             
             # معالجة الطلب
-            result = self.orchestrator.process(self.user_input)
+            result = self.orchestrator.process(self.user_input, token=self.token)
             
             # إرسال النتيجة
             if result.success:
@@ -53,8 +59,16 @@ class AgentWorker(QThread):
             self.status_update.emit("⚠️ خطأ")
             self.finished_processing.emit(False)
 
+    def cancel(self) -> bool:
+        """إلغاء الطلب الجاري: الخطوة الحالية تتوقف وما نُفذ يُتراجع عنه"""
+        if self.token is None or not self.token.cancel("cancelled by user"):
+            return False
+        self.status_update.emit("🛑 جاري الإلغاء...")
+        return True
+
     def stop(self):
         """إيقاف الـ Worker"""
+        self.cancel()
         self._running = False
         self.quit()
         self.wait()
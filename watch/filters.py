@@ -0,0 +1,212 @@
+# watch/filters.py
+"""
+🧹 Path Filters - فلترة الأحداث قبل وصولها للـ EventBus
+أنماط بأسلوب .gitignore تُترجم لـ Regex مرة واحدة وتُفحص داخل Thread الـ watchdog
+"""
+import os
+import re
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+
+
+# ضجيج لا يحتاج أي رد فعل (بما فيه ملفات الوكيل نفسه)
+DEFAULT_IGNORE = (
+    ".git/",
+    ".svn/",
+    ".hg/",
+    "__pycache__/",
+    "node_modules/",
+    ".venv/",
+    "*.pyc",
+    "*.tmp",
+    "*.temp",
+    "*.swp",
+    "*.swo",
+    "*.swx",
+    "*~",
+    ".#*",
+    "~$*",            # ملفات القفل في Office
+    "*.crdownload",   # تنزيلات Chrome غير المكتملة
+    "*.part",
+    ".DS_Store",
+    "Thumbs.db",
+    "desktop.ini",
+    "memory_dump.json*",
+    "knowledge_base.json*",
+    "file_index.json*",
+    "content_index.db*",
+    ".journal/",
+    "*.jbak",         # نسخ Rollback الاحتياطية
+)
+
+
+def glob_to_regex(pattern: str, sep: str = "/") -> str:
+    """
+    ترجمة glob (مع ** و ? و [..]) لـ Regex - * لا يعبر حدود المجلدات.
+    sep: الحروف التي لا يعبرها * و ? (FileIndex يضيف \n: سطر لكل اسم)
+    """
+    one = "[^" + re.escape(sep) + "]"
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 2] == "**":
+                i += 2
+                if i < n and pattern[i] == "/":
+                    out.append("(?:.*/)?")  # **/ = صفر أو أكثر من المجلدات
+                    i += 1
+                else:
+                    out.append(".*")
+                continue
+            out.append(one + "*")
+        elif c == "?":
+            out.append(one)
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def compile_rule(pattern: str) -> tuple[bool, str]:
+    """
+    قاعدة .gitignore -> (مرتبطة بالجذر؟، Regex على مسار نسبي بفواصل /)
+    - نمط بدون / يطابق الاسم في أي مستوى
+    - نمط يحتوي / (أو يبدأ بها) مرتبط بجذر المراقبة
+    - / في النهاية = مجلدات فقط (أي أن المسار داخل هذا المجلد)
+    """
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    body = glob_to_regex(pattern)
+    suffix = "/" if dir_only else "(?:/|$)"
+    return anchored, body + suffix
+
+
+def _rule_regex(anchored: bool, core: str) -> str:
+    return ("^" if anchored else "(?:^|/)") + core
+
+
+class PathFilter:
+    """
+    فلتر المسارات: ignore (مع ! للاستثناء، آخر قاعدة مطابقة تفوز) و include اختياري.
+    كل الأنماط تُجمع في Regex واحد للمسار السريع: أغلب المسارات لا تطابق أي قاعدة.
+    """
+
+    def __init__(self, ignore: Iterable[str] = DEFAULT_IGNORE,
+                 include: Optional[Iterable[str]] = None, root: Optional[str] = None):
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        self.root = os.path.normpath(root) if root else None
+        self._root_prefix = os.path.join(self.root, "") if self.root else ""
+
+        self._rules: list[tuple[re.Pattern, bool, str]] = []
+        rules: list[tuple[bool, str]] = []
+        for line in ignore:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            compiled = compile_rule(line[1:] if negate else line)
+            self._rules.append((re.compile(_rule_regex(*compiled), flags), negate, line))
+            rules.append(compiled)
+        self._has_negation = any(negate for _, negate, _ in self._rules)
+        self._any_rule = self._combine(rules, flags)
+
+        include = [p.strip() for p in include or () if p.strip()]
+        self._include = self._combine([compile_rule(p) for p in include], flags)
+
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.hits: Counter[str] = Counter()
+
+    @staticmethod
+    def _combine(rules: list[tuple[bool, str]], flags) -> Optional[re.Pattern]:
+        """
+        Regex واحد لكل القواعد: البادئة (^|/) مشتركة بدل تكرارها لكل نمط،
+        فيجرب المحرك البدائل عند بداية كل جزء من المسار فقط.
+        """
+        anchored = [core for is_anchored, core in rules if is_anchored]
+        floating = [core for is_anchored, core in rules if not is_anchored]
+        parts = []
+        if anchored:
+            parts.append("^(?:" + "|".join(anchored) + ")")
+        if floating:
+            parts.append("(?:^|/)(?:" + "|".join(floating) + ")")
+        return re.compile("|".join(parts), flags) if parts else None
+
+    def _relative(self, path: str) -> str:
+        # watchdog يعطي مسارات تبدأ بالجذر: قص البادئة أرخص بكثير من relpath
+        if self.root and path.startswith(self._root_prefix):
+            path = path[len(self._root_prefix):]
+        if os.sep != "/":
+            path = path.replace(os.sep, "/")
+        return path.lstrip("/")
+
+    def match(self, path: str) -> Optional[str]:
+        """القاعدة التي تسقط هذا المسار (أو None إذا كان مسموحاً)"""
+        rel = self._relative(path)
+
+        if self._any_rule is not None and self._any_rule.search(rel):
+            if not self._has_negation:
+                for rx, _, text in self._rules:
+                    if rx.search(rel):
+                        return text
+            # آخر قاعدة مطابقة هي الحاسمة (مثل .gitignore)
+            for rx, negate, text in reversed(self._rules):
+                if rx.search(rel):
+                    if negate:
+                        break
+                    return text
+
+        if self._include is not None and not self._include.search(rel):
+            return "<not included>"
+        return None
+
+    def is_ignored(self, path: str) -> bool:
+        return self.match(path) is not None
+
+    def allow(self, path: str) -> bool:
+        """فحص مع تسجيل الإحصائيات (يُستدعى من Thread الـ watchdog)"""
+        rule = self.match(path)
+        with self._lock:
+            self.checked += 1
+            if rule is not None:
+                self.hits[rule] += 1
+        return rule is None
+
+    def stats(self) -> dict:
+        """كم حدث فُحص، وكم أُسقط، وكم مرة طابقت كل قاعدة"""
+        with self._lock:
+            dropped = sum(self.hits.values())
+            return {
+                "checked": self.checked,
+                "dropped": dropped,
+                "passed": self.checked - dropped,
+                "hits": dict(self.hits.most_common()),
+            }
+
+
+_default_filter: Optional[PathFilter] = None
+
+def get_default_filter() -> PathFilter:
+    """فلتر بالأنماط الافتراضية (بدون جذر) - مشترك للفحص خارج الـ watcher"""
+    global _default_filter
+    if _default_filter is None:
+        _default_filter = PathFilter()
+    return _default_filter
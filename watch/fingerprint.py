@@ -0,0 +1,203 @@
+# watch/fingerprint.py
+"""
+🧬 Fingerprint Cache - كشف أحداث modified التي لم يتغير فيها المحتوى
+المحررات وعملاء المزامنة (OneDrive) يلمسون الملفات دون تغييرها:
+نحتفظ لكل مسار بـ (الحجم، mtime_ns، Hash سريع) ونمرر الحدث فقط إذا تغير المحتوى فعلاً
+الـ Hash لا يُحسب في Thread الـ observer عند created ولا أثناء نمو الملف (الحجم يتغير =
+المحتوى تغير): Thread خلفي يحسبه بعد أن يهدأ الملف settle ثانية، فيبقى جاهزاً لمقارنة اللمسة التالية
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+
+class Fingerprint(NamedTuple):
+    size: int
+    mtime_ns: int
+    digest: Optional[bytes]  # None: أكبر من max_hash_size أو لم يهدأ بعد
+
+
+class FingerprintCache:
+    def __init__(self, max_entries: int = 50_000, chunk_size: int = 1024 * 1024,
+                 max_hash_size: int = 16 * 1024 * 1024, settle: float = 1.0):
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self.max_hash_size = max_hash_size
+        self.settle = settle
+        # LRU: أقدم مسار استُخدم يخرج أولاً
+        self._entries: "OrderedDict[str, Fingerprint]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # مسارات تنتظر الـ Hash الخلفي -> موعدها (settle ثابت: الترتيب = ترتيب المواعيد)
+        self._due: "OrderedDict[str, float]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._hashing = False
+        self._closed = False
+
+        self.checked = 0
+        self.suppressed = 0
+        self.hashed_bytes = 0
+
+    def _hash(self, path: str) -> Optional[bytes]:
+        """Hash بالقطع (لا يُحمَّل الملف كاملاً في الذاكرة)"""
+        h = hashlib.blake2b(digest_size=16)
+        read = 0
+        try:
+            with open(path, "rb") as f:
+                while chunk := f.read(self.chunk_size):
+                    h.update(chunk)
+                    read += len(chunk)
+        except OSError:
+            return None
+        finally:
+            with self._lock:
+                self.hashed_bytes += read
+        return h.digest()
+
+    def observe(self, event_type: str, path: str) -> bool:
+        """
+        تحديث البصمة للحدث، وإرجاع True إذا يجب تمريره.
+        created/deleted تمر دائماً؛ modified يمر فقط إذا تغير المحتوى.
+        القراءة المتزامنة الوحيدة: لمسة بنفس الحجم لملف له Hash (محدودة بـ max_hash_size)
+        """
+        if event_type == "deleted":
+            self.forget(path)
+            return True
+
+        with self._lock:
+            self.checked += 1
+            previous = self._entries.get(path)
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.forget(path)
+            return True
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+
+        if event_type == "modified" and previous is not None:
+            # نفس الحجم والوقت: لمسة بدون كتابة (لا داعي لقراءة الملف)
+            if (size, mtime_ns) == (previous.size, previous.mtime_ns):
+                return self._suppress(path)
+            if size == previous.size and previous.digest is not None:
+                digest = self._hash(path)
+                if digest is not None:
+                    self._store(path, Fingerprint(size, mtime_ns, digest))
+                    return self._suppress(path) if digest == previous.digest else True
+
+        # جديد أو ينمو: بدون قراءة الآن، والـ Hash بعد أن يهدأ
+        self._store(path, Fingerprint(size, mtime_ns, None))
+        if size <= self.max_hash_size:
+            self._schedule(path)
+        return True
+
+    def _suppress(self, path: str) -> bool:
+        with self._lock:
+            self.suppressed += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        return False
+
+    def _store(self, path: str, fingerprint: Fingerprint):
+        with self._lock:
+            self._entries[path] = fingerprint
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, path: str):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    # ===== الـ Hash الخلفي =====
+
+    def _schedule(self, path: str):
+        with self._cond:
+            self._due[path] = time.monotonic() + self.settle
+            self._due.move_to_end(path)
+            if self._worker is None:
+                self._closed = False
+                self._worker = threading.Thread(target=self._hash_loop, name="fingerprint-hasher", daemon=True)
+                self._worker.start()
+            self._cond.notify_all()
+
+    def _hash_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if self._due:
+                        path, due = next(iter(self._due.items()))
+                        delay = due - time.monotonic()
+                        if delay <= 0:
+                            del self._due[path]
+                            self._hashing = True
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.notify_all()  # drain()
+                        self._cond.wait()
+            try:
+                self._hash_settled(path)
+            finally:
+                with self._cond:
+                    self._hashing = False
+                    self._cond.notify_all()
+
+    def _hash_settled(self, path: str):
+        """Hash لملف هدأ - يُحفظ فقط إذا لم يتغير أثناء القراءة (وإلا حدثه التالي يعيد الجدولة)"""
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry.digest is not None:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if (st.st_size, st.st_mtime_ns) != (entry.size, entry.mtime_ns):
+            return
+        digest = self._hash(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if digest is None or (st.st_size, st.st_mtime_ns) != (entry.size, entry.mtime_ns):
+            return
+        with self._lock:
+            if self._entries.get(path) is entry:
+                self._entries[path] = entry._replace(digest=digest)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """انتظار انتهاء كل الـ Hash المعلق"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._due and not self._hashing, timeout)
+
+    def close(self):
+        with self._cond:
+            worker, self._worker = self._worker, None
+            self._closed = True
+            self._due.clear()
+            self._cond.notify_all()
+        if worker is not None:
+            worker.join(timeout=2)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """كم حدث modified أُسقط لأن المحتوى لم يتغير"""
+        with self._lock:
+            stats = {
+                "entries": len(self._entries),
+                "checked": self.checked,
+                "suppressed": self.suppressed,
+                "hashed_bytes": self.hashed_bytes,
+            }
+        with self._cond:
+            stats["hash_pending"] = len(self._due)
+        return stats
@@ -3,45 +3,97 @@
 👀 File Watcher - مراقبة الملفات
 يرسل الأحداث للـ EventBus بدلاً من المعالجة المباشرة
 """
+import os
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from typing import Callable, Optional
+from typing import Callable, Iterable, Optional
+from watch.filters import DEFAULT_IGNORE, PathFilter
+from watch.fingerprint import FingerprintCache
 
 
 class AgentWatcher(FileSystemEventHandler):
-    def __init__(self, event_callback: Callable[[str, str], None]):
+    def __init__(self, event_callback: Callable[[str, str], None],
+                 path_filter: Optional[PathFilter] = None,
+                 listener: Optional[Callable[..., None]] = None):
         self.callback = event_callback
+        self.path_filter = path_filter  # يُفحص هنا في Thread الـ watchdog قبل الـ Queue
+        # مستمع خام (مجلدات ونقل أيضاً) - مثل فهرس أسماء الملفات
+        self.listener = listener
 
-    def on_created(self, event):
+    def _allowed(self, path: str) -> bool:
+        return self.path_filter is None or self.path_filter.allow(path)
+
+    def _emit(self, event_type: str, event):
+        if not self._allowed(event.src_path):
+            return
+        if self.listener:
+            self.listener(event_type, event.src_path, event.is_directory)
         if not event.is_directory:
-            self.callback("created", event.src_path)
+            self.callback(event_type, event.src_path)
+
+    def on_created(self, event):
+        self._emit("created", event)
 
     def on_modified(self, event):
-        if not event.is_directory:
-            self.callback("modified", event.src_path)
+        self._emit("modified", event)
 
     def on_deleted(self, event):
-        if not event.is_directory:
-            self.callback("deleted", event.src_path)
+        self._emit("deleted", event)
+
+    def on_moved(self, event):
+        if self.listener and (self._allowed(event.src_path) or self._allowed(event.dest_path)):
+            self.listener("moved", event.src_path, event.is_directory, event.dest_path)
 
 
 class SystemMonitor:
-    def __init__(self, path_to_watch: str, use_event_bus: bool = True):
+    def __init__(self, path_to_watch: str, use_event_bus: bool = True, event_bus=None,
+                 ignore_patterns: Optional[Iterable[str]] = None,
+                 include_patterns: Optional[Iterable[str]] = None,
+                 dedupe_modified: bool = True, fingerprint_entries: int = 50_000):
         self.path = path_to_watch
         self.use_event_bus = use_event_bus
+        self.event_bus = event_bus  # EventBus أو AsyncEventBus (الافتراضي: get_event_bus)
+        # أنماط .gitignore (الأنماط المخصصة تُضاف بعد الافتراضية فيمكنها استثناؤها بـ !)
+        self.path_filter = PathFilter(
+            ignore=[*DEFAULT_IGNORE, *(ignore_patterns or ())],
+            include=include_patterns,
+            root=path_to_watch,
+        )
+        # بصمات المحتوى لإسقاط modified الذي لم يغير شيئاً
+        self.fingerprints = FingerprintCache(fingerprint_entries) if dedupe_modified else None
         self.observer: Optional[Observer] = None
         self.running = False
         self._custom_callback: Optional[Callable] = None
+        self._listeners: list[Callable[..., None]] = []
 
     def set_callback(self, callback: Callable[[str, str], None]):
         """تعيين callback مخصص (بديل عن EventBus)"""
         self._custom_callback = callback
 
+    def add_listener(self, listener: Callable[..., None]):
+        """
+        مستمع لكل حدث بعد الفلترة (ملفات ومجلدات ونقل):
+        listener(event_type, path, is_directory, dest_path=None)
+        """
+        self._listeners.append(listener)
+
+    def _notify_listeners(self, *args):
+        for listener in self._listeners:
+            try:
+                listener(*args)
+            except Exception as e:
+                print(f"⚠️ Watcher listener error: {e}")
+
     def _handle_event(self, event_type: str, path: str):
         """معالجة الحدث - إرساله للـ EventBus أو callback"""
+        if self.fingerprints is not None and not self.fingerprints.observe(event_type, path):
+            return
         if self.use_event_bus:
-            from core.event_bus import get_event_bus
-            get_event_bus().push(event_type, path)
+            if self.event_bus is None:
+                from core.event_bus import get_event_bus
+                self.event_bus = get_event_bus()
+            self.event_bus.push(event_type, path)
         elif self._custom_callback:
             self._custom_callback(event_type, path)
         else:
@@ -52,7 +104,7 @@ class SystemMonitor:
         if self.running:
             return
         
-        event_handler = AgentWatcher(self._handle_event)
+        event_handler = AgentWatcher(self._handle_event, self.path_filter, self._notify_listeners)
         self.observer = Observer()
         self.observer.schedule(event_handler, self.path, recursive=True)
         self.observer.start()
@@ -64,9 +116,38 @@ class SystemMonitor:
         if self.observer:
             self.observer.stop()
             self.observer.join()
+            if self.fingerprints is not None:
+                self.fingerprints.close()
             self.running = False
             print("🛑 Watcher stopped")
 
+    def filter_stats(self) -> dict:
+        """كم حدث أسقطه الفلتر قبل وصوله للـ EventBus (ولكل نمط)"""
+        return self.path_filter.stats()
+
+    def fingerprint_stats(self) -> dict:
+        """كم حدث modified أُسقط لأن المحتوى لم يتغير"""
+        return self.fingerprints.stats() if self.fingerprints else {}
+
+
+_root_monitors: dict[str, SystemMonitor] = {}
+_root_monitors_lock = threading.Lock()
+
+def get_root_monitor(path: str) -> SystemMonitor:
+    """
+    مراقب مشترك لجذر واحد تستمع له الفهارس (add_listener): يعمل حتى بدون EventBus،
+    ومراقب واحد لكل جذر مهما كان عدد الفهارس المرتبطة به
+    """
+    path = os.path.normpath(path)
+    with _root_monitors_lock:
+        monitor = _root_monitors.get(path)
+        if monitor is None:
+            monitor = SystemMonitor(path, use_event_bus=False, dedupe_modified=False)
+            monitor.set_callback(lambda event_type, event_path: None)  # المستمعون فقط
+            monitor.start()
+            _root_monitors[path] = monitor
+    return monitor
+
 
 # للتوافق مع الكود القديم
 class WatchHandler(FileSystemEventHandler):